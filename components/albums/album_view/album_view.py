@@ -2,11 +2,7 @@ from kivy.uix.screenmanager import Screen
 from kivy.properties import StringProperty, ListProperty
 from kivy.app import App
 from kivy.logger import Logger
-from kivy.uix.label import Label
-from kivy.uix.image import AsyncImage
-from kivy.uix.boxlayout import BoxLayout
 import os
-import json
 
 
 class AlbumViewScreen(Screen):
@@ -39,24 +35,17 @@ class AlbumViewScreen(Screen):
             self._show_error("Please select a project first")
             return
 
-        # Get paths to necessary directories
-        albums_meta_dir = os.path.join(app.current_project_path, "albums_metadata")
         images_dir = os.path.join(app.current_project_path, "images")
 
-        # Album metadata filename (convert spaces to underscores for filename)
-        album_filename = self.album_name.replace(' ', '_') + '.json'
-        album_file_path = os.path.join(albums_meta_dir, album_filename)
-
-        # Check if album metadata exists
-        if not os.path.exists(album_file_path):
-            Logger.warning(f"AlbumViewScreen: Album metadata not found: {album_file_path}")
-            self._show_error(f"Album metadata not found for '{self.album_name}'")
-            return
-
-        # Load album metadata
+        # Load album metadata (cached by the project repository)
         try:
-            with open(album_file_path, 'r') as f:
-                album_data = json.load(f)
+            album_data = app.repository.get_album(self.album_name)
+
+            # Check if album metadata exists
+            if album_data is None:
+                Logger.warning(f"AlbumViewScreen: Album metadata not found for {self.album_name}")
+                self._show_error(f"Album metadata not found for '{self.album_name}'")
+                return
 
             # Update album information
             self.album_name = album_data.get('name', self.album_name)
@@ -87,76 +76,27 @@ class AlbumViewScreen(Screen):
             return
 
         images_grid = self.ids.images_grid
-        images_grid.clear_widgets()
 
         # If no images found
         if not self.images:
             Logger.warning(f"AlbumViewScreen: No images found in album {self.album_name}")
-            label = Label(
-                text=f"No images in this album yet",
-                font_size='18sp'
-            )
-            images_grid.add_widget(label)
+            images_grid.show_message("No images in this album yet")
             return
 
         app = App.get_running_app()
 
-        # Add each image to the grid
-        for image_filename in self.images:
-            img_path = os.path.join(images_dir, image_filename)
-
-            # Check if image file exists
-            if not os.path.exists(img_path):
-                Logger.warning(f"AlbumViewScreen: Image file not found: {img_path}")
-                continue
-
-            # Create image widget
-            box = BoxLayout(
-                orientation='vertical',
-                size_hint_y=None,
-                height='180dp',
-                size_hint_x=None,
-                width='150dp'
-            )
-
-            # Image thumbnail
-            img = AsyncImage(
-                source=img_path,
-                allow_stretch=True,
-                keep_ratio=True,
-                size_hint_y=0.8
-            )
-
-            # Try to get image metadata for display name
-            display_name = os.path.basename(image_filename)
-            try:
-                meta_path = os.path.join(app.current_project_path, "images_metadata",
-                                         f"{os.path.splitext(image_filename)[0]}.json")
-                if os.path.exists(meta_path):
-                    with open(meta_path, 'r') as f:
-                        img_meta = json.load(f)
-                        display_name = img_meta.get('display_name', display_name)
-            except Exception as e:
-                Logger.error(f"AlbumViewScreen: Error loading image metadata: {str(e)}")
-
-            # Image name label
-            lbl = Label(
-                text=display_name,
-                size_hint_y=0.2,
-                text_size=(140, None),
-                halign='center',
-                shorten=True,
-                shorten_from='right'
-            )
-
-            box.add_widget(img)
-            box.add_widget(lbl)
-
-            # Bind to image selection event - updated to navigate to image view screen
-            box.bind(on_touch_down=lambda instance, touch, img_file=image_filename:
-            self.on_image_selected(instance, touch, img_file))
-
-            images_grid.add_widget(box)
+        # Fetch filenames and display names for the whole album in one index query
+        try:
+            images_list = app.repository.get_album_page(app.current_album or self.album_name)
+        except Exception as e:
+            Logger.error(f"AlbumViewScreen: Error querying project index: {str(e)}")
+            images_list = [(image_filename, os.path.basename(image_filename)) for image_filename in self.images]
+
+        # Cells resolve their thumbnail lazily, when they scroll into view
+        images_grid.source_resolver = lambda filename, on_ready: app.repository.thumbnail_source(
+            filename, images_grid.cell_width, on_ready=on_ready)
+        images_grid.set_images(images_list)
+        Logger.info(f"AlbumViewScreen: Texture cache {app.texture_cache.stats()}")
 
     def on_image_selected(self, instance, touch, image_filename):
         """Handle image selection - navigate to image view screen"""
@@ -169,6 +109,7 @@ class AlbumViewScreen(Screen):
 
             # Navigate to image view screen
             if self.manager:
+                self.manager.get_screen('image_view').back_screen = self.name
                 self.manager.current = 'image_view'
             else:
                 Logger.error("AlbumViewScreen: No screen manager found")
@@ -187,12 +128,4 @@ class AlbumViewScreen(Screen):
             Logger.error(f"AlbumViewScreen: Cannot show error, images_grid not found: {message}")
             return
 
-        images_grid = self.ids.images_grid
-        images_grid.clear_widgets()
-
-        label = Label(
-            text=message,
-            font_size='16sp',
-            color=(1, 0.3, 0.3, 1)
-        )
-        images_grid.add_widget(label)
\ No newline at end of file
+        self.ids.images_grid.show_message(message, error=True)
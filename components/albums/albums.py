@@ -1,18 +1,20 @@
 from kivy.uix.screenmanager import Screen
 from kivy.properties import ListProperty, StringProperty
-from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.app import App
 from kivy.logger import Logger
-import os
-import json
-from datetime import datetime
+
+
+# Number of tag buttons shown above the images grid
+TAG_FACET_LIMIT = 20
 
 
 class AlbumsScreen(Screen):
     """Screen for viewing albums and images"""
     current_album = StringProperty("")
     albums = ListProperty([])
+    # Tag filter of the images grid, see parse_tag_query for the syntax
+    tag_filter = StringProperty("")
 
     def __init__(self, **kwargs):
         super(AlbumsScreen, self).__init__(**kwargs)
@@ -35,51 +37,18 @@ class AlbumsScreen(Screen):
             self._show_error("Please select a project first")
             return
 
-        # Path to albums metadata directory
-        albums_meta_dir = os.path.join(app.current_project_path, "albums_metadata")
-        Logger.info(f"AlbumsScreen: Looking for albums in {albums_meta_dir}")
-
-        # Ensure the albums metadata directory exists
-        if not os.path.exists(albums_meta_dir):
-            Logger.info(f"AlbumsScreen: Creating albums metadata directory at {albums_meta_dir}")
-            try:
-                os.makedirs(albums_meta_dir)
-            except Exception as e:
-                Logger.error(f"AlbumsScreen: Error creating albums metadata directory: {str(e)}")
-                self._show_error(f"Error creating albums metadata directory: {str(e)}")
-                return
-
-        # Ensure Unsigned Images album exists
-        unsigned_album_file = os.path.join(albums_meta_dir, "Unsigned_Images.json")
-        if not os.path.exists(unsigned_album_file):
-            Logger.info(f"AlbumsScreen: Creating Unsigned Images album metadata")
-            try:
-                # Create the initial album metadata
-                album_data = {
-                    "name": "Unsigned Images",
-                    "description": "Default album for newly uploaded images",
-                    "created_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    "images": []
-                }
-                with open(unsigned_album_file, 'w') as f:
-                    json.dump(album_data, f, indent=4)
-            except Exception as e:
-                Logger.error(f"AlbumsScreen: Error creating Unsigned Images album metadata: {str(e)}")
-
-        # Load all album metadata files
-        self.albums = []
+        # Make sure the project structure and the Unsigned Images album exist
         try:
-            for filename in os.listdir(albums_meta_dir):
-                if filename.lower().endswith('.json'):
-                    # Extract album name from filename
-                    album_name = os.path.splitext(filename)[0].replace('_', ' ')
-                    self.albums.append(album_name)
-            Logger.info(f"AlbumsScreen: Found albums: {self.albums}")
+            app.repository.ensure_structure()
         except Exception as e:
-            Logger.error(f"AlbumsScreen: Error loading albums: {str(e)}")
-            self._show_error(f"Error loading albums: {str(e)}")
+            Logger.error(f"AlbumsScreen: Error creating project structure: {str(e)}")
+            self._show_error(f"Error creating albums metadata directory: {str(e)}")
             return
 
+        # Load all album names (cached by the project repository)
+        self.albums = app.repository.list_albums()
+        Logger.info(f"AlbumsScreen: Found albums: {self.albums}")
+
         # Check if we found any albums
         if not self.albums:
             Logger.warning("AlbumsScreen: No albums found")
@@ -128,6 +97,54 @@ class AlbumsScreen(Screen):
         self.update_albums_ui()  # Update highlighting
         self.load_album_images(album_name)
 
+    def apply_tag_filter(self, text):
+        """Filter the images grid by tags, e.g. "beach, sea | lake, -people" """
+        self.tag_filter = text.strip()
+        Logger.info(f"AlbumsScreen: Tag filter '{self.tag_filter}'")
+        if self.current_album:
+            self.load_album_images(self.current_album)
+
+    def add_tag_to_filter(self, tag):
+        """Narrow the current filter down to images that also have this tag"""
+        terms = [term.strip() for term in self.tag_filter.split(',') if term.strip()]
+        if tag not in terms:
+            terms.append(tag)
+        if hasattr(self, 'ids') and 'tag_filter_input' in self.ids:
+            self.ids.tag_filter_input.text = ", ".join(terms)
+        self.apply_tag_filter(", ".join(terms))
+
+    def clear_tag_filter(self):
+        """Show every image of the album again"""
+        if hasattr(self, 'ids') and 'tag_filter_input' in self.ids:
+            self.ids.tag_filter_input.text = ""
+        self.apply_tag_filter("")
+
+    def update_tag_facets(self, album_name):
+        """Show the most used tags of an album as buttons that add them to the filter"""
+        if not hasattr(self, 'ids') or 'facets_container' not in self.ids:
+            return
+
+        facets_container = self.ids.facets_container
+        facets_container.clear_widgets()
+
+        app = App.get_running_app()
+        try:
+            facets = app.repository.tag_facets(album_name, limit=TAG_FACET_LIMIT)
+        except Exception as e:
+            Logger.error(f"AlbumsScreen: Error loading tags: {str(e)}")
+            return
+
+        for tag, count in facets:
+            btn = Button(
+                text=f"{tag} ({count})",
+                size_hint_x=None,
+                width='120dp',
+                background_normal='',
+                background_color=(0.4, 0.4, 0.6, 1)
+            )
+            btn.bind(on_press=lambda instance, t=tag: self.add_tag_to_filter(t))
+            facets_container.add_widget(btn)
+
     def view_album(self, album_name):
         """Open the album view screen for the selected album"""
         Logger.info(f"AlbumsScreen: Opening album view for {album_name}")
@@ -156,89 +173,37 @@ class AlbumsScreen(Screen):
             Logger.warning("AlbumsScreen: No project path available")
             return
 
-        # Get paths to necessary directories
-        images_dir = os.path.join(app.current_project_path, "images")
-        albums_meta_dir = os.path.join(app.current_project_path, "albums_metadata")
-
-        # Album metadata filename (convert spaces to underscores)
-        album_filename = album_name.replace(' ', '_') + '.json'
-        album_file_path = os.path.join(albums_meta_dir, album_filename)
-
         # Check if album metadata exists
-        if not os.path.exists(album_file_path):
-            Logger.warning(f"AlbumsScreen: Album metadata not found: {album_file_path}")
+        if app.repository.get_album(album_name) is None:
+            Logger.warning(f"AlbumsScreen: Album metadata not found for {album_name}")
             self._show_error(f"Album metadata not found for '{album_name}'")
             return
 
-        # Load album metadata
-        try:
-            with open(album_file_path, 'r') as f:
-                album_data = json.load(f)
-
-            # Get the images list
-            images_list = album_data.get('images', [])
-            Logger.info(f"AlbumsScreen: Album {album_name} contains {len(images_list)} images")
+        self.update_tag_facets(album_name)
 
-            # Clear current images
-            images_grid = self.ids.images_grid
-            images_grid.clear_widgets()
+        # Load the whole album (filenames and display names) from the project index in one query
+        try:
+            if self.tag_filter:
+                images_list = app.repository.find_by_tags(self.tag_filter, album_name)
+                Logger.info(f"AlbumsScreen: {len(images_list)} images in {album_name} match '{self.tag_filter}'")
+            else:
+                images_list = app.repository.get_album_page(album_name)
+                Logger.info(f"AlbumsScreen: Album {album_name} contains {len(images_list)} images")
 
             # If no images found
             if not images_list:
-                Logger.warning(f"AlbumsScreen: No images found in album {album_name}")
-                label = Label(text=f"No images in this album yet", font_size='18sp')
-                images_grid.add_widget(label)
+                if self.tag_filter:
+                    self.ids.images_grid.show_message(f"No images match '{self.tag_filter}'")
+                else:
+                    Logger.warning(f"AlbumsScreen: No images found in album {album_name}")
+                    self.ids.images_grid.show_message("No images in this album yet")
                 return
 
-            # Add each image to the grid
-            for image_filename in images_list:
-                img_path = os.path.join(images_dir, image_filename)
-
-                # Check if image file exists
-                if not os.path.exists(img_path):
-                    Logger.warning(f"AlbumsScreen: Image file not found: {img_path}")
-                    continue
-
-                # Create image widget
-                from kivy.uix.boxlayout import BoxLayout
-                from kivy.uix.image import AsyncImage
-
-                box = BoxLayout(orientation='vertical', size_hint_y=None, height='180dp',
-                                size_hint_x=None, width='150dp')
-
-                # Image thumbnail
-                img = AsyncImage(
-                    source=img_path,
-                    allow_stretch=True,
-                    keep_ratio=True,
-                    size_hint_y=0.8
-                )
-
-                # Try to get image metadata for display name
-                display_name = os.path.basename(image_filename)
-                try:
-                    meta_path = os.path.join(app.current_project_path, "images_metadata",
-                                             f"{os.path.splitext(image_filename)[0]}.json")
-                    if os.path.exists(meta_path):
-                        with open(meta_path, 'r') as f:
-                            img_meta = json.load(f)
-                            display_name = img_meta.get('display_name', display_name)
-                except Exception as e:
-                    Logger.error(f"AlbumsScreen: Error loading image metadata: {str(e)}")
-
-                # Image name label
-                lbl = Label(
-                    text=display_name,
-                    size_hint_y=0.2,
-                    text_size=(140, None),
-                    halign='center',
-                    shorten=True,
-                    shorten_from='right'
-                )
-
-                box.add_widget(img)
-                box.add_widget(lbl)
-                images_grid.add_widget(box)
+            # Cells resolve their thumbnail lazily, when they scroll into view
+            images_grid = self.ids.images_grid
+            images_grid.source_resolver = lambda filename, on_ready: app.repository.thumbnail_source(
+                filename, images_grid.cell_width, on_ready=on_ready)
+            images_grid.set_images(images_list)
 
         except Exception as e:
             Logger.error(f"AlbumsScreen: Error loading album data: {str(e)}")
@@ -250,15 +215,7 @@ class AlbumsScreen(Screen):
             Logger.error(f"AlbumsScreen: Cannot show error, images_grid not found: {message}")
             return
 
-        images_grid = self.ids.images_grid
-        images_grid.clear_widgets()
-
-        label = Label(
-            text=message,
-            font_size='16sp',
-            color=(1, 0.3, 0.3, 1)
-        )
-        images_grid.add_widget(label)
+        self.ids.images_grid.show_message(message, error=True)
 
     def create_new_album(self):
         """Navigate to the create album screen"""
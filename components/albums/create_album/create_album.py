@@ -4,8 +4,6 @@ from kivy.app import App
 from kivy.logger import Logger
 from kivy.lang import Builder
 import os
-import json
-from datetime import datetime
 
 
 class CreateAlbumScreen(Screen):
@@ -36,43 +34,28 @@ class CreateAlbumScreen(Screen):
             self.ids.error_message.text = "Album name is required"
             return
 
-        # Clean the album name for filename
-        filename = album_name.replace(' ', '_') + '.json'
-
         # Get app reference and check project
         app = App.get_running_app()
         if not hasattr(app, 'current_project_path') or not app.current_project_path:
             self.ids.error_message.text = "No project selected"
             return
 
-        # Path to albums metadata directory
-        albums_meta_dir = os.path.join(app.current_project_path, "albums_metadata")
-        if not os.path.exists(albums_meta_dir):
-            try:
-                os.makedirs(albums_meta_dir)
-                Logger.info(f"CreateAlbumScreen: Created albums directory: {albums_meta_dir}")
-            except Exception as e:
-                self.ids.error_message.text = f"Error creating albums directory: {str(e)}"
-                Logger.error(f"CreateAlbumScreen: Error creating albums directory: {str(e)}")
-                return
+        # Make sure the albums metadata directory exists
+        try:
+            app.repository.ensure_structure()
+        except Exception as e:
+            self.ids.error_message.text = f"Error creating albums directory: {str(e)}"
+            Logger.error(f"CreateAlbumScreen: Error creating albums directory: {str(e)}")
+            return
 
         # Check if album already exists
-        album_path = os.path.join(albums_meta_dir, filename)
-        if os.path.exists(album_path):
+        if os.path.exists(app.repository.album_path(album_name)):
             self.ids.error_message.text = f"Album '{album_name}' already exists"
             return
 
         # Create the album metadata
         try:
-            album_data = {
-                "name": album_name,
-                "description": album_description,
-                "created_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "images": []
-            }
-
-            with open(album_path, 'w') as f:
-                json.dump(album_data, f, indent=4)
+            app.repository.create_album(album_name, album_description)
 
             Logger.info(f"CreateAlbumScreen: Created new album: {album_name}")
 
@@ -0,0 +1,186 @@
+from kivy.uix.screenmanager import Screen
+from kivy.properties import ListProperty, StringProperty
+from kivy.uix.button import Button
+from kivy.app import App
+from kivy.logger import Logger
+from datetime import datetime
+from components.core.derivative_worker.derivative_worker import PRIORITY_BACKFILL
+from components.core.progress_popup.progress_popup import ProgressPopup
+from components.core.project_repository.project_repository import EXIF_CHUNK_SIZE
+
+
+def month_label(month):
+    """Display name of a YYYY-MM month, e.g. "May 2024" """
+    return datetime.strptime(month, '%Y-%m').strftime('%B %Y')
+
+
+class TimelineScreen(Screen):
+    """Screen for browsing a project's images by capture date"""
+    # (YYYY-MM, image count) of every month with images, oldest first
+    months = ListProperty([])
+    current_month = StringProperty("")
+    # Day (YYYY-MM-DD) the grid is narrowed to, empty for the whole month
+    current_day = StringProperty("")
+    status_text = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super(TimelineScreen, self).__init__(**kwargs)
+        Logger.info("TimelineScreen: Initialized")
+
+    def on_enter(self):
+        """Reload the months, the capture-date index may have changed"""
+        Logger.info("TimelineScreen: on_enter called")
+        self.load_months()
+
+    def load_months(self):
+        """Load the month buckets from the project index"""
+        app = App.get_running_app()
+        if not hasattr(app, 'current_project_path') or not app.current_project_path:
+            Logger.warning("TimelineScreen: No project selected")
+            self._show_error("Please select a project first")
+            return
+
+        try:
+            self.months = app.repository.capture_months()
+            undated = app.repository.index.count_undated()
+        except Exception as e:
+            Logger.error(f"TimelineScreen: Error loading the timeline: {str(e)}")
+            self._show_error(f"Error loading the timeline: {str(e)}")
+            return
+
+        self.status_text = f"{undated} images without a capture date" if undated else ""
+        self.update_months_ui()
+
+        if not self.months:
+            self.ids.days_container.clear_widgets()
+            self.ids.images_grid.show_message("No images with a capture date yet")
+            return
+
+        # Keep the selected month if it still exists, otherwise start at the newest one
+        month_names = [month for month, _ in self.months]
+        self.select_month(self.current_month if self.current_month in month_names else month_names[-1])
+
+    def update_months_ui(self):
+        """Show one button per month, newest first"""
+        months_container = self.ids.months_container
+        months_container.clear_widgets()
+        for month, count in reversed(self.months):
+            btn = Button(
+                text=f"{month_label(month)} ({count})",
+                size_hint_y=None,
+                height='40dp',
+                background_normal='',
+                background_color=(0.3, 0.5, 0.7, 1) if month == self.current_month else (0.5, 0.5, 0.5, 1)
+            )
+            btn.bind(on_press=lambda instance, m=month: self.select_month(m))
+            months_container.add_widget(btn)
+
+    def select_month(self, month):
+        """Show every image of a month and its day buckets"""
+        Logger.info(f"TimelineScreen: Selected month {month}")
+        self.current_month = month
+        self.current_day = ""
+        self.update_months_ui()
+        self.update_days_ui()
+        self.load_images(month)
+
+    def select_day(self, day):
+        """Narrow the grid to one day of the current month, or back to the whole month"""
+        self.current_day = day
+        self.update_days_ui()
+        self.load_images(day or self.current_month)
+
+    def update_days_ui(self):
+        """Show the day buckets of the current month"""
+        app = App.get_running_app()
+        days_container = self.ids.days_container
+        days_container.clear_widgets()
+
+        try:
+            days = app.repository.capture_days(self.current_month)
+        except Exception as e:
+            Logger.error(f"TimelineScreen: Error loading days: {str(e)}")
+            return
+
+        buckets = [("", "All")] + [(day, f"{int(day[8:10])} ({count})") for day, count in days]
+        for day, text in buckets:
+            btn = Button(
+                text=text,
+                size_hint_x=None,
+                width='70dp',
+                background_normal='',
+                background_color=(0.3, 0.5, 0.7, 1) if day == self.current_day else (0.4, 0.4, 0.6, 1)
+            )
+            btn.bind(on_press=lambda instance, d=day: self.select_day(d))
+            days_container.add_widget(btn)
+
+    def load_images(self, period):
+        """Fill the grid with the images captured in a month or on a day"""
+        app = App.get_running_app()
+        try:
+            images_list = app.repository.get_captured(period)
+        except Exception as e:
+            Logger.error(f"TimelineScreen: Error loading images for {period}: {str(e)}")
+            self._show_error(f"Error loading images: {str(e)}")
+            return
+
+        Logger.info(f"TimelineScreen: {len(images_list)} images captured in {period}")
+        images_grid = self.ids.images_grid
+        if not images_list:
+            images_grid.show_message("No images in this period")
+            return
+
+        images_grid.source_resolver = lambda filename, on_ready: app.repository.thumbnail_source(
+            filename, images_grid.cell_width, on_ready=on_ready)
+        images_grid.set_images(images_list)
+
+    def read_camera_data(self):
+        """Read EXIF data of images that were ingested before capture dates were recorded"""
+        app = App.get_running_app()
+        if not hasattr(app, 'current_project_path') or not app.current_project_path:
+            return
+
+        repository = app.repository
+        missing = repository.missing_exif()
+        if not missing:
+            self.status_text = "Camera data of every image has been read"
+            return
+
+        Logger.info(f"TimelineScreen: Reading camera data of {len(missing)} images")
+        progress_popup = ProgressPopup("Reading Camera Data")
+        progress_popup.open()
+        chunks = [missing[start:start + EXIF_CHUNK_SIZE] for start in range(0, len(missing), EXIF_CHUNK_SIZE)]
+        progress = {"chunks": 0, "images": 0}
+
+        def on_read(key, result, error):
+            progress["chunks"] += 1
+            progress["images"] += len(result or ())
+            progress_popup.update(progress["images"], len(missing),
+                                  f"Read {progress['images']} of {len(missing)} images")
+            if progress["chunks"] == len(chunks):
+                progress_popup.finish()
+                self.load_months()
+
+        for chunk in chunks:
+            repository.request_exif(chunk, PRIORITY_BACKFILL, callback=on_read)
+
+    def on_image_selected(self, instance, touch, image_filename):
+        """Open an image in the image view screen"""
+        if instance.collide_point(*touch.pos):
+            Logger.info(f"TimelineScreen: Image selected: {image_filename}")
+            app = App.get_running_app()
+            app.current_image = image_filename
+
+            if self.manager:
+                self.manager.get_screen('image_view').back_screen = self.name
+                self.manager.current = 'image_view'
+            else:
+                Logger.error("TimelineScreen: No screen manager found")
+
+    def _show_error(self, message):
+        """Display an error message in the images grid area"""
+        if not hasattr(self, 'ids') or not hasattr(self.ids, 'images_grid'):
+            Logger.error(f"TimelineScreen: Cannot show error, images_grid not found: {message}")
+            return
+
+        self.ids.images_grid.show_message(message, error=True)
@@ -0,0 +1,94 @@
+from kivy.logger import Logger
+import os
+import json
+
+
+# Journal file kept next to each album snapshot, e.g. Unsigned_Images.journal.jsonl
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+# Fold the journal into the snapshot once it grows past this size
+COMPACT_THRESHOLD_BYTES = 256 * 1024
+
+ACTION_ADD = "add"
+ACTION_REMOVE = "remove"
+
+
+def journal_path(album_file):
+    """Return the journal path belonging to an album snapshot file"""
+    return os.path.splitext(album_file)[0] + JOURNAL_SUFFIX
+
+
+def append_event(album_file, action, filename):
+    """Append a single add/remove event to an album's journal"""
+    append_events(album_file, [(action, filename)])
+
+
+def append_events(album_file, events):
+    """
+    Append add/remove events to an album's journal
+
+    Appending never rewrites the snapshot, so adding an image costs the same
+    no matter how large the album is. The journal is compacted into the
+    snapshot once it passes COMPACT_THRESHOLD_BYTES.
+
+    Args:
+        album_file (str): Path to the album snapshot, e.g. albums_metadata/Unsigned_Images.json
+        events (list): (action, filename) tuples, action is ACTION_ADD or ACTION_REMOVE
+    """
+    path = journal_path(album_file)
+    lines = "".join(json.dumps({"action": action, "image": filename}) + "\n" for action, filename in events)
+    with open(path, 'ab') as f:
+        # Terminate a torn last line so it cannot swallow the first new event
+        if f.tell() > 0:
+            with open(path, 'rb') as tail:
+                tail.seek(-1, os.SEEK_END)
+                if tail.read(1) != b"\n":
+                    lines = "\n" + lines
+        f.write(lines.encode('utf-8'))
+
+    if os.path.getsize(path) > COMPACT_THRESHOLD_BYTES:
+        compact(album_file)
+
+
+def load_album(album_file):
+    """Load an album snapshot and replay its journal on top of it"""
+    with open(album_file, 'r') as f:
+        album_data = json.load(f)
+
+    path = journal_path(album_file)
+    if os.path.exists(path):
+        # Ordered set, so replaying an event twice (e.g. after an interrupted compaction) is harmless
+        images = dict.fromkeys(album_data.get("images", []))
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Torn last line from an interrupted write
+                    Logger.warning(f"AlbumJournal: Skipping unreadable journal line in {path}")
+                    continue
+                if event.get("action") == ACTION_ADD:
+                    images[event["image"]] = None
+                elif event.get("action") == ACTION_REMOVE:
+                    images.pop(event["image"], None)
+        album_data["images"] = list(images)
+
+    return album_data
+
+
+def compact(album_file):
+    """Fold an album's journal into its snapshot file and start a fresh journal"""
+    album_data = load_album(album_file)
+
+    # Write the new snapshot atomically before dropping the journal
+    tmp_file = album_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(album_data, f, indent=4)
+    os.replace(tmp_file, album_file)
+
+    path = journal_path(album_file)
+    if os.path.exists(path):
+        os.remove(path)
+
+    Logger.info(f"AlbumJournal: Compacted {album_file} ({len(album_data['images'])} images)")
+    return album_data
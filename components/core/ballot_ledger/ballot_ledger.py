@@ -0,0 +1,625 @@
+from kivy.logger import Logger
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from components.core.pairwise_ranking.pairwise_ranking import PairwiseRanking
+
+
+# Ballots of a project live in <project>/votes/: an append-only ledger with one JSON
+# ballot per line, and a snapshot of the tallies up to a byte offset of the ledger
+VOTES_DIRNAME = "votes"
+LEDGER_FILENAME = "ballots.jsonl"
+SNAPSHOT_FILENAME = "tallies_snapshot.json"
+SNAPSHOT_VERSION = 3
+
+# Every installation has its own device ID, stored in the app's data directory, so
+# ballots from several voting kiosks can be told apart after merging their ledgers.
+# data/device_id must never be copied to another installation (e.g. when cloning a
+# kiosk): two kiosks with one ID produce clashing ballots that merge() refuses.
+DEVICE_ID_FILENAME = "device_id"
+
+# Ballot kinds: a vote for one image, or the winner of a head-to-head comparison
+KIND_VOTE = "vote"
+KIND_PAIR = "pair"
+
+# The writer thread collects ballots for up to FSYNC_INTERVAL seconds and makes them
+# durable with a single write + fsync (group commit)
+FSYNC_INTERVAL = 0.05
+
+# A new snapshot is written after this many ballots, or a tenth of the ledger once it
+# is large, bounding the replay on startup without rewriting big snapshots too often
+SNAPSHOT_INTERVAL = 5000
+
+# The ranking is refitted in the background after this many new comparisons, or a
+# twentieth of all comparisons once there are many
+REFIT_INTERVAL = 500
+
+# Merged ledgers are applied this many ballots at a time, so voting continues meanwhile
+MERGE_CHUNK_SIZE = 10000
+
+
+class LedgerConflictError(Exception):
+    """Ledgers to merge contradict each other, usually because two installations share a device ID"""
+
+
+def votes_dir(project_path):
+    """Return the directory holding a project's ballots"""
+    return os.path.join(project_path, VOTES_DIRNAME)
+
+
+def load_device_id(directory):
+    """Return the device ID stored in a directory, creating it on first use"""
+    path = os.path.join(directory, DEVICE_ID_FILENAME)
+    try:
+        with open(path, 'r') as f:
+            device_id = f.read().strip()
+        if device_id:
+            return device_id
+    except OSError:
+        pass
+
+    device_id = uuid.uuid4().hex[:12]
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(device_id)
+    Logger.info(f"BallotLedger: Created device ID {device_id}")
+    return device_id
+
+
+def find_ledgers(path):
+    """Return the ledger files at a path: the file itself, or every .jsonl file below a folder"""
+    if not os.path.isdir(path):
+        return [path]
+    ledgers = []
+    for directory, _, filenames in os.walk(path):
+        ledgers.extend(os.path.join(directory, name) for name in sorted(filenames) if name.endswith(".jsonl"))
+    return ledgers
+
+
+def validate_ballot(ballot):
+    """
+    Check the fields a ballot needs for its kind, raises ValueError if one is wrong
+
+    Ballots written before device IDs existed have no device and clock, and ones
+    written before pairwise voting have no kind; both are still valid votes.
+    """
+    device, clock = ballot.get("device"), ballot.get("clock")
+    if device is not None or clock is not None:
+        if not isinstance(device, str) or not device:
+            raise ValueError(f"Invalid ballot device: {device!r}")
+        if not isinstance(clock, int) or isinstance(clock, bool) or clock <= 0:
+            raise ValueError(f"Invalid ballot clock: {clock!r}")
+
+    album = ballot.get("album")
+    if album is not None and not isinstance(album, str):
+        raise ValueError(f"Invalid ballot album: {album!r}")
+
+    kind = ballot.get("kind", KIND_VOTE)
+    if kind == KIND_PAIR:
+        winner, loser = ballot.get("winner"), ballot.get("loser")
+        if not isinstance(winner, str) or not winner or not isinstance(loser, str) or not loser:
+            raise ValueError(f"Invalid pair ballot: {winner!r} over {loser!r}")
+        if winner == loser:
+            raise ValueError("An image cannot be compared with itself")
+    elif kind == KIND_VOTE:
+        image, value = ballot.get("image"), ballot.get("value", 1)
+        if not isinstance(image, str) or not image:
+            raise ValueError(f"Invalid ballot image: {image!r}")
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f"Invalid ballot value: {value!r}")
+    else:
+        raise ValueError(f"Unknown ballot kind: {kind!r}")
+
+
+def _fingerprint(ballot):
+    """Hash of a ballot's contents, equal for identical copies of a ballot"""
+    return hash(json.dumps(ballot, sort_keys=True, separators=(',', ':')))
+
+
+def read_ballots(path):
+    """Yield the ballots of a ledger file, skipping unreadable lines and a torn last line"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                ballot = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(ballot, dict):
+                yield ballot
+
+
+class BallotLedger:
+    """
+    Durable ballot log of a project with in-memory running tallies.
+
+    cast() and cast_pair() update the tallies in O(1) and queue the encoded ballot; a writer
+    thread appends queued ballots to the ledger and fsyncs them in batches, so the
+    UI thread never waits for the disk. On open the tallies are restored from the
+    latest snapshot plus the ledger lines written after it; a line cut short by a
+    crash is dropped.
+
+    Pairwise ballots feed a PairwiseRanking: every comparison updates Elo ratings
+    immediately and a Bradley-Terry fit over all comparisons is rerun on a
+    background thread as they accumulate.
+
+    Each ballot carries the ID of the device that cast it and a Lamport clock: one
+    more than the highest clock the ledger has seen, and never below the current
+    time in milliseconds. (clock, device) orders ballots of several kiosks, and a
+    device's clocks strictly increase, which is what merge() relies on to skip
+    ballots it already has.
+    """
+
+    def __init__(self, project_path, device_id=None):
+        self.directory = votes_dir(project_path)
+        self.ledger_path = os.path.join(self.directory, LEDGER_FILENAME)
+        self.snapshot_path = os.path.join(self.directory, SNAPSHOT_FILENAME)
+        os.makedirs(self.directory, exist_ok=True)
+        self.device_id = device_id or load_device_id(self.directory)
+
+        # Running tallies, guarded by self._lock together with the write queue
+        self.image_tallies = {}
+        self.album_tallies = {}
+        self.total = 0
+        self.ranking = PairwiseRanking()
+        # Number of ballots in the ledger
+        self.seq = 0
+        self._lock = threading.Lock()
+
+        # Lamport clock and the highest clock recorded from each device
+        self.clock = 0
+        self.device_clocks = {}
+
+        # Number of comparisons covered by the last ranking fit, and whether one is running
+        self._fitted_comparisons = 0
+        self._fitting = False
+        # Number of fits applied, lets views notice re-ranked ratings
+        self.fit_count = 0
+
+        # Encoded ballots waiting for the writer thread
+        self._pending = []
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+
+        # Ledger position and ballot number covered by the durable file and by the snapshot
+        self._durable_offset = 0
+        self._snapshot_seq = 0
+
+        self._recover()
+        self._file = open(self.ledger_path, 'ab')
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    # ----- Voting -----
+
+    def cast(self, image, album=None, value=1):
+        """
+        Record a vote for an image
+
+        Args:
+            image (str): Filename of the image
+            album (str): Album the image was shown in, tallied separately
+            value (int): Weight of the vote
+
+        Returns:
+            dict: The recorded ballot
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Ballot ledger is closed")
+            ballot = {"device": self.device_id, "clock": self._next_clock(), "kind": KIND_VOTE,
+                      "image": image, "album": album, "value": value, "time": round(time.time(), 3)}
+            self._record(ballot)
+            self.seq += 1
+        return ballot
+
+    def cast_pair(self, winner, loser, album=None):
+        """
+        Record the outcome of a head-to-head comparison
+
+        Args:
+            winner (str): Filename of the preferred image
+            loser (str): Filename of the other image
+            album (str): Album the pair was drawn from
+
+        Returns:
+            dict: The recorded ballot
+
+        Raises:
+            ValueError: If winner and loser are the same image
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Ballot ledger is closed")
+            ballot = {"device": self.device_id, "clock": self._next_clock(), "kind": KIND_PAIR,
+                      "winner": winner, "loser": loser, "album": album, "time": round(time.time(), 3)}
+            self._record(ballot)
+            self.seq += 1
+            refit = self._refit_due()
+        if refit:
+            threading.Thread(target=self._refit, daemon=True).start()
+        return ballot
+
+    def tally(self, image):
+        """Return the votes of an image"""
+        return self.image_tallies.get(image, 0)
+
+    def album_tally(self, album):
+        """Return the votes of all images shown in an album"""
+        return self.album_tallies.get(album, 0)
+
+    def top_images(self, count=10):
+        """Return (image, votes) tuples of the most voted images"""
+        with self._lock:
+            items = list(self.image_tallies.items())
+        items.sort(key=lambda item: item[1], reverse=True)
+        return items[:count]
+
+    def rating(self, image):
+        """Return the pairwise rating of an image"""
+        with self._lock:
+            return self.ranking.rating(image)
+
+    def standings(self, images):
+        """Return a (rating, comparisons) tuple for each image"""
+        with self._lock:
+            return [self.ranking.standing(image) for image in images]
+
+    def leaderboard(self, count=None):
+        """Return (image, rating, wins, comparisons) tuples, best rated first"""
+        with self._lock:
+            return self.ranking.leaderboard(count)
+
+    def comparison_count(self):
+        """Return the number of pairwise ballots"""
+        return len(self.ranking)
+
+    # ----- Merging -----
+
+    def merge(self, paths):
+        """
+        Add the ballots of other ledgers, e.g. copied from offline voting kiosks
+
+        Every copy of a device's ballots is a prefix of that device's own ledger, so a
+        ballot is already known exactly when its clock is not above the highest clock
+        recorded for its device. New ballots are appended to this ledger and applied
+        on top of the running tallies, so only the images they touch change; nothing
+        is replayed. Ballots written before device IDs existed cannot be told apart
+        from copies and are skipped.
+
+        That only holds while every installation has its own device ID, so the
+        ledgers are checked first (see _check_merge) and nothing is merged if they
+        contradict it. Never copy data/device_id between installations.
+
+        Args:
+            paths (list): Ledger files to merge
+
+        Returns:
+            dict: Numbers of "added", "duplicate" and "skipped" ballots and of "images" whose tallies changed
+
+        Raises:
+            LedgerConflictError: If a ledger does not fit the ballots already known
+        """
+        paths = [path for path in paths if os.path.abspath(path) != os.path.abspath(self.ledger_path)]
+        self._check_merge(paths)
+
+        result = {"added": 0, "duplicate": 0, "skipped": 0, "images": 0}
+        affected = set()
+        for path in paths:
+            Logger.info(f"BallotLedger: Merging ballots from {path}")
+            chunk = []
+            for ballot in read_ballots(path):
+                chunk.append(ballot)
+                if len(chunk) >= MERGE_CHUNK_SIZE:
+                    self._merge_chunk(chunk, result, affected)
+                    chunk = []
+            self._merge_chunk(chunk, result, affected)
+
+        result["images"] = len(affected)
+        with self._lock:
+            refit = result["added"] and self._refit_due(force=True)
+        if refit:
+            threading.Thread(target=self._refit, daemon=True).start()
+        Logger.info(f"BallotLedger: Merged {result['added']} ballots, {result['duplicate']} duplicates, "
+                    f"{result['skipped']} skipped, {result['images']} images changed")
+        return result
+
+    def _check_merge(self, paths):
+        """
+        Make sure ballots can be merged by their clocks alone, before any is recorded
+
+        Within a ledger the clocks of each device must strictly increase, and a ballot
+        whose clock is not above the highest one known for its device must be the very
+        ballot this ledger, or an earlier path, already has under that (device, clock).
+        Holds one fingerprint per known ballot in memory while checking.
+        """
+        self.flush()
+        with self._lock:
+            known = dict(self.device_clocks)
+        fingerprints = {}
+        for ballot in read_ballots(self.ledger_path):
+            if ballot.get("device") and ballot.get("clock") is not None:
+                fingerprints[(ballot["device"], ballot["clock"])] = _fingerprint(ballot)
+
+        for path in paths:
+            last = {}
+            for ballot in read_ballots(path):
+                try:
+                    validate_ballot(ballot)
+                except ValueError:
+                    continue
+                device, clock = ballot.get("device"), ballot.get("clock")
+                if not device:
+                    continue
+
+                if clock <= last.get(device, 0):
+                    raise LedgerConflictError(
+                        f"{path}: clocks of device {device} do not increase, {last[device]} is followed by {clock}. "
+                        f"The ledger was edited or combines two installations with the same device ID.")
+                last[device] = clock
+
+                fingerprint = _fingerprint(ballot)
+                if clock > known.get(device, 0):
+                    known[device] = clock
+                    fingerprints[(device, clock)] = fingerprint
+                elif fingerprints.get((device, clock)) != fingerprint:
+                    raise LedgerConflictError(
+                        f"{path}: ballot {clock} of device {device} differs from the ballots already "
+                        f"recorded for that device. Was data/device_id copied between installations?")
+
+    def _merge_chunk(self, ballots, result, affected):
+        """Record the ballots of a chunk that this ledger does not have yet"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Ballot ledger is closed")
+            for ballot in ballots:
+                device, clock = ballot.get("device"), ballot.get("clock")
+                if not device or not isinstance(clock, int) or ballot.get("kind") not in (KIND_VOTE, KIND_PAIR):
+                    result["skipped"] += 1
+                    continue
+                if clock <= self.device_clocks.get(device, 0):
+                    result["duplicate"] += 1
+                    continue
+                try:
+                    self._record(ballot)
+                except ValueError:
+                    result["skipped"] += 1
+                    continue
+                self.seq += 1
+                result["added"] += 1
+                if ballot["kind"] == KIND_PAIR:
+                    affected.update((ballot["winner"], ballot["loser"]))
+                else:
+                    affected.add(ballot["image"])
+
+    # ----- Ranking fits -----
+
+    def _refit_due(self, force=False):
+        """Whether enough comparisons arrived since the last fit (caller holds the lock)"""
+        if self._fitting:
+            return False
+        new = len(self.ranking) - self._fitted_comparisons
+        if new < (1 if force else max(REFIT_INTERVAL, len(self.ranking) // 20)):
+            return False
+        self._fitting = True
+        return True
+
+    def _refit(self):
+        """Fitting thread: rerun the Bradley-Terry fit and merge it into the live ratings"""
+        try:
+            with self._lock:
+                fit_input = self.ranking.fit_input()
+            start = time.monotonic()
+            fitted = PairwiseRanking.fit(fit_input)
+            with self._lock:
+                self.ranking.apply_fit(fit_input, fitted)
+                self._fitted_comparisons = len(fit_input[0])
+                self.fit_count += 1
+            Logger.info(f"BallotLedger: Fitted {len(fit_input[0])} comparisons in {time.monotonic() - start:.2f}s")
+        except Exception as e:
+            Logger.error(f"BallotLedger: Error fitting the ranking: {str(e)}")
+        finally:
+            with self._lock:
+                self._fitting = False
+
+    # ----- Durability -----
+
+    def flush(self):
+        """Block until every ballot cast so far is on disk"""
+        with self._lock:
+            target = self.seq
+            self._wakeup.notify()
+            while self._durable_seq < target and self._writer.is_alive():
+                self._wakeup.wait(0.5)
+
+    def close(self):
+        """Write the remaining ballots, store a snapshot and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        self._file.close()
+        self._write_snapshot(self._snapshot_state())
+        Logger.info(f"BallotLedger: Closed after {self.total} votes")
+
+    def _write_loop(self):
+        """Writer thread: append queued ballots and fsync them once per batch"""
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if not self._pending and self._closed:
+                    return
+            # Let more ballots arrive so one fsync covers them all
+            if not self._closed:
+                time.sleep(FSYNC_INTERVAL)
+
+            with self._lock:
+                lines, self._pending = self._pending, []
+                seq = self.seq
+                due = seq - self._snapshot_seq >= max(SNAPSHOT_INTERVAL, seq // 10)
+                snapshot = self._snapshot_state() if due else None
+
+            try:
+                self._file.write("".join(lines).encode('utf-8'))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                # Keep the ballots queued and retry with the next batch
+                Logger.error(f"BallotLedger: Error writing ballots: {str(e)}")
+                with self._lock:
+                    self._pending[:0] = lines
+                time.sleep(1)
+                continue
+
+            with self._lock:
+                self._durable_offset = self._file.tell()
+                self._durable_seq = seq
+                self._wakeup.notify_all()
+            if snapshot is not None:
+                snapshot["offset"] = self._durable_offset
+                self._write_snapshot(snapshot)
+
+    # ----- Snapshots and recovery -----
+
+    def _snapshot_state(self):
+        """Copy the tallies for a snapshot (caller holds the lock)"""
+        return {
+            "version": SNAPSHOT_VERSION,
+            "seq": self.seq,
+            "offset": self._durable_offset,
+            "total": self.total,
+            "clock": self.clock,
+            "device_clocks": dict(self.device_clocks),
+            "image_tallies": dict(self.image_tallies),
+            "album_tallies": dict(self.album_tallies),
+            "ranking": self.ranking.state(),
+        }
+
+    def _write_snapshot(self, state):
+        """Atomically replace the snapshot file"""
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._snapshot_seq = state["seq"]
+        except OSError as e:
+            Logger.error(f"BallotLedger: Error writing snapshot: {str(e)}")
+
+    def _recover(self):
+        """Restore the tallies from the snapshot and replay the ledger written after it"""
+        offset = 0
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                state = json.load(f)
+            if state.get("version") == SNAPSHOT_VERSION and state["offset"] <= os.path.getsize(self.ledger_path):
+                ranking = PairwiseRanking.from_state(state["ranking"])
+                self.image_tallies = state["image_tallies"]
+                self.album_tallies = state["album_tallies"]
+                self.total = state["total"]
+                self.clock = state["clock"]
+                self.device_clocks = state["device_clocks"]
+                self.ranking = ranking
+                self.seq = self._snapshot_seq = state["seq"]
+                offset = state["offset"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # No usable snapshot, replay the whole ledger
+            pass
+
+        replayed = 0
+        if os.path.exists(self.ledger_path):
+            with open(self.ledger_path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Cut short by a crash, never acknowledged as durable
+                        Logger.warning(f"BallotLedger: Dropping incomplete ballot at offset {offset}")
+                        break
+                    try:
+                        ballot = json.loads(line)
+                    except ValueError:
+                        Logger.warning(f"BallotLedger: Skipping unreadable ballot at offset {offset}")
+                        offset += len(line)
+                        continue
+                    try:
+                        self._apply(ballot)
+                    except (ValueError, AttributeError):
+                        Logger.warning(f"BallotLedger: Skipping invalid ballot at offset {offset}")
+                        offset += len(line)
+                        continue
+                    self.seq += 1
+                    offset += len(line)
+                    replayed += 1
+
+            # Cut off a torn tail so new ballots start on a fresh line
+            if offset < os.path.getsize(self.ledger_path):
+                with open(self.ledger_path, 'r+b') as f:
+                    f.truncate(offset)
+
+        self._durable_offset = offset
+        self._durable_seq = self.seq
+        Logger.info(f"BallotLedger: Loaded {self.total} votes, replayed {replayed} ballots after the snapshot")
+
+    def _next_clock(self):
+        """Lamport clock of a new ballot, _apply advances the clock to it (caller holds the lock)"""
+        return max(self.clock + 1, int(time.time() * 1000))
+
+    def _record(self, ballot):
+        """
+        Apply a new ballot and queue it for the writer thread (caller holds the lock)
+
+        An invalid ballot raises ValueError and changes nothing.
+        """
+        self._apply(ballot)
+        self._pending.append(json.dumps(ballot, separators=(',', ':')) + "\n")
+        self._wakeup.notify()
+
+    def _apply(self, ballot):
+        """Add one ballot to the running tallies, raises ValueError before any change if it is invalid"""
+        validate_ballot(ballot)
+        kind = ballot.get("kind", KIND_VOTE)
+        device, clock = ballot.get("device"), ballot.get("clock")
+        if device and isinstance(clock, int):
+            self.clock = max(self.clock, clock)
+            if clock > self.device_clocks.get(device, 0):
+                self.device_clocks[device] = clock
+
+        if kind == KIND_PAIR:
+            self.ranking.add(ballot["winner"], ballot["loser"])
+        elif kind == KIND_VOTE:
+            value = ballot.get("value", 1)
+            image = ballot["image"]
+            self.image_tallies[image] = self.image_tallies.get(image, 0) + value
+            album = ballot.get("album")
+            if album:
+                self.album_tallies[album] = self.album_tallies.get(album, 0) + value
+            self.total += value
+
+
+# Merge kiosk ledgers into a project while the app is closed:
+# python -m components.core.ballot_ledger.ballot_ledger <project_path> <ledger file or folder> [...]
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print("Usage: python -m components.core.ballot_ledger.ballot_ledger <project_path> <ledger file or folder> [...]")
+        sys.exit(1)
+
+    ledger = BallotLedger(sys.argv[1])
+    try:
+        sources = [path for arg in sys.argv[2:] for path in find_ledgers(arg)]
+        merged = ledger.merge(sources)
+    except LedgerConflictError as e:
+        print(f"Nothing was merged: {e}")
+        sys.exit(1)
+    finally:
+        ledger.close()
+    print(f"Merged {len(sources)} ledgers: {merged['added']} new ballots, {merged['duplicate']} duplicates, "
+          f"{merged['skipped']} skipped, {merged['images']} images changed")
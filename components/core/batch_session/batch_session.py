@@ -0,0 +1,216 @@
+from kivy.logger import Logger
+from datetime import datetime
+import json
+import os
+
+
+# Session log kept in the project directory while a batch upload is unfinished
+SESSION_FILENAME = "batch_session.jsonl"
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+
+# Fields entered by the operator that are remembered per item
+ITEM_FIELDS = ("name", "description", "tags")
+
+
+def session_path(project_path):
+    """Return the batch session file of a project"""
+    return os.path.join(project_path, SESSION_FILENAME)
+
+
+class BatchSession:
+    """
+    Persistent queue of a batch upload.
+
+    Queued paths and every status change are appended to a JSONL log in the project
+    directory, so an interrupted batch (crash, closed app, cancelled batch) can be
+    resumed where it stopped, including names and descriptions that were already
+    entered. The cursor only moves forward, taking the next item is O(1) amortized.
+    The log is deleted once the batch is finished or discarded.
+    """
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+        self.path = session_path(project_path)
+        self.created = None
+        self.items = []       # dicts with path, status and the ITEM_FIELDS
+        self.cursor = 0       # index of the next item to hand out
+        self.current = None   # index of the item being annotated
+
+        # Finished items after the cursor, only found in resumed sessions
+        self._finished_ahead = 0
+        # Indexes of the items handed out by take_remaining
+        self._taken = []
+
+    @classmethod
+    def start(cls, project_path):
+        """Start a new session, replacing any unfinished one"""
+        session = cls(project_path)
+        session.created = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        os.makedirs(project_path, exist_ok=True)
+        with open(session.path, 'w') as f:
+            f.write(json.dumps({"event": "start", "created": session.created}) + "\n")
+        return session
+
+    @classmethod
+    def load(cls, project_path):
+        """Load the unfinished session of a project, or None if there is none"""
+        session = cls(project_path)
+        if not os.path.exists(session.path):
+            return None
+
+        with open(session.path, 'r') as f:
+            for line in f:
+                try:
+                    session._replay(json.loads(line))
+                except (ValueError, KeyError, IndexError, TypeError):
+                    # Torn last line from an interrupted write
+                    Logger.warning(f"BatchSession: Skipping unreadable line in {session.path}")
+
+        # Resume at the first item that was not finished
+        session._finished_ahead = sum(1 for item in session.items if item["status"] != STATUS_PENDING)
+        session._advance()
+        return session
+
+    def __len__(self):
+        return len(self.items)
+
+    def remaining(self):
+        """Number of items that were not handed out yet"""
+        return len(self.items) - self.cursor - self._finished_ahead
+
+    def has_next(self):
+        """Return True if there is another item to hand out"""
+        self._advance()
+        return self.cursor < len(self.items)
+
+    def completed_count(self):
+        """Number of items that were ingested"""
+        return sum(1 for item in self.items if item["status"] == STATUS_DONE)
+
+    def add(self, paths):
+        """Append paths to the queue"""
+        if not paths:
+            return
+        self.items.extend(self._new_item(path) for path in paths)
+        self._append({"event": "add", "paths": list(paths)})
+
+    def next(self):
+        """Hand out the next pending item, returns its path or None when the queue is empty"""
+        self._advance()
+        if self.cursor >= len(self.items):
+            self.current = None
+            return None
+        self.current = self.cursor
+        self.cursor += 1
+        return self.items[self.current]["path"]
+
+    def unfinished_paths(self):
+        """Return the paths of every item that is neither done nor skipped"""
+        return [item["path"] for item in self.items if item["status"] == STATUS_PENDING]
+
+    def upcoming(self, count):
+        """Return the paths of up to count pending items after the current one"""
+        paths = []
+        for index in self._pending_from(self.cursor):
+            if len(paths) >= count:
+                break
+            paths.append(self.items[index]["path"])
+        return paths
+
+    def take_remaining(self):
+        """Hand out every pending item at once, e.g. for a bulk ingest, see finish_taken"""
+        self._taken = list(self._pending_from(self.cursor))
+        self.cursor = len(self.items)
+        self._finished_ahead = 0
+        self.current = None
+        return [self.items[index]["path"] for index in self._taken]
+
+    def finish_taken(self, count, failed=()):
+        """
+        Mark the first count items handed out by take_remaining as finished
+
+        Items whose path is in failed are marked skipped, the others done. Taken items
+        after the first count become pending again, so a cancelled bulk ingest can be
+        resumed where it stopped.
+        """
+        failed = set(failed)
+        finished = {STATUS_DONE: [], STATUS_SKIPPED: []}
+        for index in self._taken[:count]:
+            status = STATUS_SKIPPED if self.items[index]["path"] in failed else STATUS_DONE
+            self.items[index]["status"] = status
+            finished[status].append(index)
+        for status, indexes in finished.items():
+            if indexes:
+                self._append({"event": "status", "indexes": indexes, "status": status})
+
+        self._taken = []
+        self.cursor = 0
+        self._finished_ahead = sum(1 for item in self.items if item["status"] != STATUS_PENDING)
+        self._advance()
+
+    def current_item(self):
+        """Return the item being annotated, or None"""
+        return self.items[self.current] if self.current is not None else None
+
+    def update_current(self, **fields):
+        """Remember name, description or tags entered for the current item"""
+        if self.current is None:
+            return
+        fields = {key: value for key, value in fields.items() if key in ITEM_FIELDS}
+        self.items[self.current].update(fields)
+        self._append({"event": "update", "index": self.current, "fields": fields})
+
+    def finish_current(self, status=STATUS_DONE):
+        """Mark the current item as done or skipped"""
+        if self.current is None:
+            return
+        self.items[self.current]["status"] = status
+        self._append({"event": "status", "index": self.current, "status": status})
+        self.current = None
+
+    def discard(self):
+        """Delete the session log"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _new_item(self, path):
+        """Queue entry of a path"""
+        return {"path": path, "status": STATUS_PENDING}
+
+    def _advance(self):
+        """Move the cursor past items that are already finished"""
+        while self.cursor < len(self.items) and self.items[self.cursor]["status"] != STATUS_PENDING:
+            self.cursor += 1
+            self._finished_ahead -= 1
+
+    def _pending_from(self, start):
+        """Yield the indexes of pending items from start on"""
+        for index in range(start, len(self.items)):
+            if self.items[index]["status"] == STATUS_PENDING:
+                yield index
+
+    def _replay(self, event):
+        """Apply one logged event"""
+        kind = event["event"]
+        if kind == "start":
+            self.created = event.get("created")
+        elif kind == "add":
+            self.items.extend(self._new_item(path) for path in event["paths"])
+        elif kind == "update":
+            self.items[event["index"]].update(event["fields"])
+        elif kind == "status":
+            for index in event["indexes"] if "indexes" in event else (event["index"],):
+                self.items[index]["status"] = event["status"]
+
+    def _append(self, event):
+        """Append one event to the session log"""
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(event) + "\n")
+        except OSError as e:
+            Logger.error(f"BatchSession: Could not write {self.path}: {str(e)}")
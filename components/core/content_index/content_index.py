@@ -0,0 +1,127 @@
+from kivy.logger import Logger
+import hashlib
+import os
+import threading
+
+
+# Bytes hashed from the start and from the end of a file for the partial hash
+PARTIAL_BYTES = 64 * 1024
+
+# Read size while computing a full hash
+HASH_READ_SIZE = 1024 * 1024
+
+
+def partial_hash(path, size):
+    """BLAKE2 hash of the first and last PARTIAL_BYTES of a file (the whole file if it is small)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= 2 * PARTIAL_BYTES:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(PARTIAL_BYTES))
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            digest.update(f.read(PARTIAL_BYTES))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """BLAKE2 hash of a whole file"""
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentIndex:
+    """
+    Exact-content lookup of a project's image files.
+
+    Files are compared in three stages, each computed only when the previous one
+    matches: file size, a hash of the first and last 64KB, and a full BLAKE2 hash.
+    Sizes of all project images are held in memory, so a candidate with a size no
+    project image has - the common case - is rejected without reading it. Hashes of
+    project images are computed on first need and stored in the project index.
+    Lookups are thread-safe and meant to run off the main thread.
+    """
+
+    def __init__(self, index, images_dir):
+        self.index = index
+        self.images_dir = images_dir
+        self._lock = threading.Lock()
+
+        # size -> [filenames]
+        self._sizes = {}
+        for size, filename in index.get_sizes():
+            self._sizes.setdefault(size, []).append(filename)
+
+    def add(self, filename, size):
+        """Register a newly ingested image"""
+        with self._lock:
+            filenames = self._sizes.setdefault(size, [])
+            if filename not in filenames:
+                filenames.append(filename)
+
+    def find(self, path, size=None):
+        """
+        Return the filename of the project image with the same content as path, or None
+
+        Args:
+            path (str): File outside the project
+            size (int): Size of the file if already known, e.g. from a directory scan
+        """
+        if size is None:
+            size = os.path.getsize(path)
+        with self._lock:
+            candidates = list(self._sizes.get(size, ()))
+        if not candidates:
+            return None
+
+        try:
+            partial = partial_hash(path, size)
+        except OSError as e:
+            Logger.warning(f"ContentIndex: Could not compare {path}: {str(e)}")
+            return None
+        matches = [filename for filename in candidates if self._candidate_hashes(filename, size)[0] == partial]
+        if not matches:
+            return None
+
+        # Files up to 128KB were hashed completely by the partial hash
+        if size <= 2 * PARTIAL_BYTES:
+            return matches[0]
+
+        try:
+            full = full_hash(path)
+        except OSError as e:
+            Logger.warning(f"ContentIndex: Could not compare {path}: {str(e)}")
+            return None
+        for filename in matches:
+            if self._candidate_hashes(filename, size, full=True)[1] == full:
+                return filename
+        return None
+
+    def _candidate_hashes(self, filename, size, full=False):
+        """_project_hashes of a candidate, (None, None) if it cannot be read so it never matches"""
+        try:
+            return self._project_hashes(filename, size, full)
+        except OSError as e:
+            # Skip this candidate, e.g. an image file missing from images/
+            Logger.warning(f"ContentIndex: Could not hash project image {filename}: {str(e)}")
+            return None, None
+
+    def _project_hashes(self, filename, size, full=False):
+        """Return (partial, full) hashes of a project image, computing missing ones on demand"""
+        partial_value, full_value = self.index.get_content_hashes(filename)
+        path = os.path.join(self.images_dir, filename)
+
+        updated = False
+        if partial_value is None:
+            partial_value = partial_hash(path, size)
+            updated = True
+        if full and full_value is None:
+            full_value = full_hash(path)
+            updated = True
+
+        if updated:
+            self.index.set_content_hashes(filename, partial_value, full_value)
+        return partial_value, full_value
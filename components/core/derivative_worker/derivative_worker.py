@@ -0,0 +1,221 @@
+from kivy.clock import Clock
+from kivy.logger import Logger
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import heapq
+import itertools
+import os
+import threading
+
+
+# Job priorities, lower runs first
+PRIORITY_VISIBLE = 0    # Needed by a widget that is on screen right now
+PRIORITY_INGEST = 1     # Images being uploaded or about to be annotated
+PRIORITY_BACKFILL = 2   # Bulk maintenance work
+
+# When a worker process dies (crash, out of memory) the pool is replaced and the jobs
+# it was running are queued again to run one at a time, so the one that kills its
+# worker can be told apart. A job that breaks the pool while running alone is retried
+# at most this many times
+MAX_RETRIES = 2
+
+
+def default_worker_count():
+    """Leave one core to the UI thread"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+class DerivativeWorker:
+    """
+    Background job queue for image derivatives (thumbnails, previews, hashes).
+
+    Jobs run in a ProcessPoolExecutor so Pillow work never blocks Kivy's main loop.
+    Jobs are identified by a key: submitting a key that is already queued or running
+    only adds another callback (and may raise its priority). At most max_workers jobs
+    are handed to the pool at a time, the rest wait in a priority heap, so on-screen
+    requests overtake queued backfill work. A pool broken by a dying worker process
+    is replaced on the next dispatch; the jobs it lost run alone afterwards, see
+    _restart.
+
+    Callbacks run on the main thread as callback(key, result, error).
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or default_worker_count()
+        self._executor = None
+        self._lock = threading.Lock()
+
+        # Heap of (priority, sequence, key); superseded entries are skipped when popped
+        self._queue = []
+        self._sequence = itertools.count()
+
+        # key -> {"func", "args", "priority", "callbacks", "running", "retries", "isolate"}
+        self._jobs = {}
+        self._running = 0
+        # Key of the job running alone in the pool, nothing else starts meanwhile
+        self._isolated = None
+
+    def submit(self, key, func, args=(), priority=PRIORITY_BACKFILL, callback=None):
+        """
+        Queue a derivative job unless the same key is already queued or running
+
+        Args:
+            key (hashable): Identity of the job, used for deduplication
+            func (callable): Module-level (picklable) function run in a worker process
+            args (tuple): Arguments for func
+            priority (int): One of the PRIORITY_* constants
+            callback (callable): Optional callback(key, result, error) run on the main thread
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = {"func": func, "args": args, "priority": priority, "callbacks": [], "running": False,
+                       "retries": 0, "isolate": False}
+                self._jobs[key] = job
+                heapq.heappush(self._queue, (priority, next(self._sequence), key))
+            elif not job["running"] and priority < job["priority"]:
+                # Re-queue with the higher priority, the old heap entry becomes stale
+                job["priority"] = priority
+                heapq.heappush(self._queue, (priority, next(self._sequence), key))
+
+            if callback:
+                job["callbacks"].append(callback)
+
+        self._dispatch()
+
+    def is_pending(self, key):
+        """Return True if a job with this key is queued or running"""
+        with self._lock:
+            return key in self._jobs
+
+    def pending_count(self):
+        """Return the number of queued and running jobs"""
+        with self._lock:
+            return len(self._jobs)
+
+    def set_max_workers(self, max_workers):
+        """Change the number of worker processes, running jobs are allowed to finish"""
+        max_workers = max_workers or default_worker_count()
+        with self._lock:
+            if max_workers == self.max_workers:
+                return
+            self.max_workers = max_workers
+            old_executor, self._executor = self._executor, None
+
+        if old_executor:
+            old_executor.shutdown(wait=False)
+        Logger.info(f"DerivativeWorker: Using {max_workers} worker processes")
+        self._dispatch()
+
+    def shutdown(self):
+        """Drop queued jobs and stop the worker processes"""
+        with self._lock:
+            self._queue = []
+            self._jobs = {key: job for key, job in self._jobs.items() if job["running"]}
+            executor, self._executor = self._executor, None
+
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self):
+        """Hand queued jobs to the pool until max_workers are running"""
+        while True:
+            to_start = []
+            with self._lock:
+                while self._running < self.max_workers and self._queue and self._isolated is None:
+                    priority, _, key = heapq.heappop(self._queue)
+                    job = self._jobs.get(key)
+                    if job is None or job["running"] or job["priority"] != priority:
+                        # Stale heap entry
+                        continue
+                    if job["isolate"]:
+                        if self._running or to_start:
+                            # Wait for the running jobs to finish, then run this one alone
+                            heapq.heappush(self._queue, (priority, next(self._sequence), key))
+                            break
+                        self._isolated = key
+                    job["running"] = True
+                    self._running += 1
+                    to_start.append((key, job))
+
+                if to_start and self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                executor = self._executor
+
+            if not to_start:
+                return
+
+            # Jobs that could not be started are released without recursing into
+            # _dispatch, the next round of this loop picks up the queue again
+            for key, job in to_start:
+                try:
+                    future = executor.submit(job["func"], *job["args"])
+                except BrokenProcessPool as e:
+                    self._restart(key, executor, e, ran=False)
+                    continue
+                except Exception as e:
+                    Logger.error(f"DerivativeWorker: Could not start job {key}: {str(e)}")
+                    self._finish(key, None, e, dispatch=False)
+                    continue
+                future.add_done_callback(lambda f, key=key, executor=executor: self._on_done(key, executor, f))
+
+    def _on_done(self, key, executor, future):
+        """Called from the pool's thread when a job finishes"""
+        try:
+            result, error = future.result(), None
+        except BrokenProcessPool as e:
+            self._restart(key, executor, e)
+            self._dispatch()
+            return
+        except Exception as e:
+            result, error = None, e
+            Logger.error(f"DerivativeWorker: Job {key} failed: {str(e)}")
+        self._finish(key, result, error)
+
+    def _restart(self, key, executor, error, ran=True):
+        """
+        Handle a job lost to a broken pool
+
+        The broken pool is dropped so the next dispatch starts a new one, and the job
+        is queued again. Any of the jobs sharing the pool may have killed it, so a lost
+        job is not charged a retry but marked to run alone next time. Only a job that
+        breaks the pool while running alone is charged; once it used up its retries it
+        fails. ran is False when the job never reached the pool.
+        """
+        with self._lock:
+            broken = executor if self._executor is executor else None
+            if broken:
+                self._executor = None
+            job = self._jobs.get(key)
+            if self._isolated == key:
+                self._isolated = None
+            retry = job is not None and (not ran or not job["isolate"] or job["retries"] < MAX_RETRIES)
+            if retry:
+                if ran and job["isolate"]:
+                    job["retries"] += 1
+                job["isolate"] = job["isolate"] or ran
+                job["running"] = False
+                self._running -= 1
+                heapq.heappush(self._queue, (job["priority"], next(self._sequence), key))
+
+        if broken:
+            Logger.warning("DerivativeWorker: A worker process died, starting a new pool")
+            broken.shutdown(wait=False)
+        if not retry:
+            Logger.error(f"DerivativeWorker: Job {key} failed: {str(error)}")
+            self._finish(key, None, error, dispatch=False)
+
+    def _finish(self, key, result, error, dispatch=True):
+        """Release a running job, report it on the main thread and start the next one"""
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            self._running -= 1
+            if self._isolated == key:
+                self._isolated = None
+
+        if job:
+            for callback in job["callbacks"]:
+                Clock.schedule_once(lambda dt, callback=callback: callback(key, result, error), 0)
+
+        if dispatch:
+            self._dispatch()
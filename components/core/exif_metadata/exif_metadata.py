@@ -0,0 +1,114 @@
+from PIL import Image
+from datetime import datetime
+import sys
+
+
+# Camera metadata read once at ingest and stored under "exif" in the image metadata.
+# Nothing in this module imports Kivy, so it can run inside worker processes.
+
+# EXIF tag ids
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_ORIENTATION = 0x0112
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_DATETIME_DIGITIZED = 0x9004
+
+# GPS IFD tag ids
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+
+# Format of capture_date, sortable as text; the first 7 and 10 characters are the month and day
+CAPTURE_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+EXIF_DATE_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+
+def parse_exif_date(value):
+    """Convert an EXIF date ("2024:05:17 14:03:22") to CAPTURE_DATE_FORMAT, None if it is unusable"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip().rstrip('\x00')[:19], EXIF_DATE_FORMAT).strftime(CAPTURE_DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def _gps_coordinate(values, reference):
+    """Convert degrees/minutes/seconds rationals to signed decimal degrees"""
+    degrees, minutes, seconds = (float(value) for value in values)
+    coordinate = degrees + minutes / 60 + seconds / 3600
+    return round(-coordinate if reference in ('S', 'W') else coordinate, 6)
+
+
+def read_exif(path):
+    """
+    Read the camera metadata of an image
+
+    Returns:
+        dict: capture_date, camera, orientation, width, height and gps ([latitude, longitude]);
+            fields the file does not provide are None
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        exif = img.getexif()
+
+    exif_ifd = exif.get_ifd(TAG_EXIF_IFD)
+    capture_date = None
+    for value in (exif_ifd.get(TAG_DATETIME_ORIGINAL), exif_ifd.get(TAG_DATETIME_DIGITIZED), exif.get(TAG_DATETIME)):
+        capture_date = parse_exif_date(value)
+        if capture_date:
+            break
+
+    make = str(exif.get(TAG_MAKE, "")).strip().strip('\x00')
+    model = str(exif.get(TAG_MODEL, "")).strip().strip('\x00')
+    # Many models already start with the make, e.g. "Canon" + "Canon EOS R5"
+    camera = model if model.lower().startswith(make.lower()) else f"{make} {model}".strip()
+
+    gps = None
+    gps_ifd = exif.get_ifd(TAG_GPS_IFD)
+    try:
+        if GPS_LATITUDE in gps_ifd and GPS_LONGITUDE in gps_ifd:
+            gps = [_gps_coordinate(gps_ifd[GPS_LATITUDE], gps_ifd.get(GPS_LATITUDE_REF)),
+                   _gps_coordinate(gps_ifd[GPS_LONGITUDE], gps_ifd.get(GPS_LONGITUDE_REF))]
+    except (TypeError, ValueError, ZeroDivisionError):
+        gps = None
+
+    orientation = exif.get(TAG_ORIENTATION)
+    return {
+        "capture_date": capture_date,
+        "camera": camera or None,
+        "orientation": int(orientation) if orientation else None,
+        "width": width,
+        "height": height,
+        "gps": gps,
+    }
+
+
+def read_exif_batch(paths):
+    """
+    Read the camera metadata of a chunk of images, meant to run in a worker process
+
+    Returns:
+        list: (path, exif dict) tuples, an empty dict for unreadable files
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append((path, read_exif(path)))
+        except Exception:
+            results.append((path, {}))
+    return results
+
+
+# Print the metadata of one image: python -m components.core.exif_metadata.exif_metadata <image>
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python -m components.core.exif_metadata.exif_metadata <image>")
+        sys.exit(1)
+
+    for key, value in read_exif(sys.argv[1]).items():
+        print(f"{key}: {value}")
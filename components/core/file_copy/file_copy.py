@@ -0,0 +1,294 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, reflinks are never tried there
+    fcntl = None
+
+
+# Nothing in this module imports Kivy, so copies can also run in worker threads and processes.
+
+# Copy modes, configurable per project
+COPY_MODE_COPY = "copy"          # Kernel side copy (copy_file_range / sendfile), new data blocks
+COPY_MODE_REFLINK = "reflink"    # Copy-on-write clone on Btrfs/XFS, falls back to a copy
+COPY_MODE_HARDLINK = "hardlink"  # Second name for the same file, falls back to a copy
+COPY_MODES = (COPY_MODE_COPY, COPY_MODE_REFLINK, COPY_MODE_HARDLINK)
+DEFAULT_COPY_MODE = COPY_MODE_COPY
+
+# ioctl number of FICLONE from linux/fs.h
+FICLONE = 0x40049409
+
+# Bytes requested per copy_file_range / sendfile call
+KERNEL_COPY_CHUNK = 64 * 1024 * 1024
+
+# Parallel copies of a tree copy; file copies mostly wait on the disk, not the GIL
+TREE_COPY_WORKERS = 8
+
+# Errors meaning "this mechanism does not work here", not "the copy failed".
+# ENOTSOCK: sendfile on macOS and the BSDs only writes to sockets
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY,
+    errno.EPERM, errno.EBADF, errno.ETXTBSY, errno.ENOTSOCK,
+}
+
+
+def copy_file(source_path, dest_path, mode=DEFAULT_COPY_MODE):
+    """
+    Copy one file into the project using the cheapest mechanism that works
+
+    Tries, depending on mode, a hardlink or a reflink first and falls back to a
+    kernel side copy (os.copy_file_range, then os.sendfile) and finally to a
+    buffered copy. File times and permissions are preserved like shutil.copy2.
+
+    Hardlinked files share their data with the source: editing the source in place
+    also changes the project's copy.
+
+    Returns:
+        str: The mechanism used: "hardlink", "reflink", "copy_file_range", "sendfile" or "buffered"
+    """
+    if mode == COPY_MODE_HARDLINK:
+        try:
+            os.link(source_path, dest_path)
+            return "hardlink"
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+
+    # Write to a temporary name so a failed copy never leaves a partial file behind
+    tmp_path = dest_path + ".part"
+    try:
+        with open(source_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            method = None
+            if mode == COPY_MODE_REFLINK and _reflink(src, dst):
+                method = "reflink"
+            if method is None:
+                method = _kernel_copy(src, dst)
+            if method is None:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+                method = "buffered"
+        shutil.copystat(source_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return method
+
+
+def copy_function(mode=DEFAULT_COPY_MODE):
+    """Return a copy_function(src, dst) for shutil.copytree that uses copy_file"""
+    def copy(source_path, dest_path):
+        copy_file(source_path, dest_path, mode)
+        return dest_path
+    return copy
+
+
+class CopyCancelled(Exception):
+    """Raised by copy_tree when its cancelled event is set"""
+
+
+def copy_tree(source_dir, dest_dir, copy=None, max_workers=TREE_COPY_WORKERS, progress=None, cancelled=None,
+              skipped=None):
+    """
+    Copy a directory tree with a pool of threads
+
+    The tree is listed first so progress can be reported against known totals.
+    dest_dir must not exist yet; callers copy into a staging directory and rename it
+    into place once the copy is complete. Symlinks are followed like shutil.copytree
+    does, except for dangling links and links back into one of their own parent
+    directories, which are left out.
+
+    Args:
+        source_dir (str): Directory to copy
+        dest_dir (str): New directory to create
+        copy (callable): copy(src, dst) for single files, defaults to copy_function()
+        max_workers (int): Number of copy threads
+        progress (callable): Optional progress(files_done, files_total, bytes_done, bytes_total),
+            called from the calling thread
+        cancelled (threading.Event): Optional event, copy_tree raises CopyCancelled once it is set
+        skipped (list): Optional list that receives the paths that were left out
+
+    Returns:
+        tuple: (number of files copied, bytes copied)
+    """
+    copy = copy or copy_function()
+
+    if skipped is None:
+        skipped = []
+
+    # List the tree and create the directories up front. ancestors maps each directory
+    # to the (device, inode) of itself and its parents, to recognize symlink cycles
+    files = []
+    root_stat = os.stat(source_dir)
+    ancestors = {source_dir: {(root_stat.st_dev, root_stat.st_ino)}}
+    for root, dirs, names in os.walk(source_dir, followlinks=True):
+        relative_root = os.path.relpath(root, source_dir)
+        os.makedirs(os.path.normpath(os.path.join(dest_dir, relative_root)), exist_ok=False)
+        chain = ancestors.pop(root)
+        for name in list(dirs):
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                dirs.remove(name)
+                skipped.append(path)
+                continue
+            key = (stat.st_dev, stat.st_ino)
+            if key in chain:
+                dirs.remove(name)
+                skipped.append(path)
+                continue
+            ancestors[path] = chain | {key}
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                # Dangling symlink
+                skipped.append(path)
+                continue
+            files.append((path, os.path.normpath(os.path.join(dest_dir, relative_root, name)), size))
+
+    files_total = len(files)
+    bytes_total = sum(size for _, _, size in files)
+    files_done = bytes_done = 0
+    if progress:
+        progress(0, files_total, 0, bytes_total)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = set()
+        next_file = 0
+        try:
+            while next_file < files_total or pending:
+                if cancelled and cancelled.is_set():
+                    raise CopyCancelled()
+
+                # Keep a bounded number of copies queued
+                while next_file < files_total and len(pending) < max_workers * 2:
+                    source, dest, size = files[next_file]
+                    future = pool.submit(copy, source, dest)
+                    future.size = size
+                    pending.add(future)
+                    next_file += 1
+
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    files_done += 1
+                    bytes_done += future.size
+                if done and progress:
+                    progress(files_done, files_total, bytes_done, bytes_total)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    return files_done, bytes_done
+
+
+def _reflink(src, dst):
+    """Clone src into dst with FICLONE, returns False if the filesystem cannot"""
+    if fcntl is None or not sys.platform.startswith('linux'):
+        return False
+    try:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError as e:
+        if e.errno in UNSUPPORTED_ERRNOS:
+            return False
+        raise
+
+
+def _kernel_copy(src, dst):
+    """Copy file data without passing it through Python buffers, None if unsupported"""
+    size = os.fstat(src.fileno()).st_size
+    for name in ("copy_file_range", "sendfile"):
+        func = getattr(os, name, None)
+        # Only Linux can sendfile into a regular file
+        if func is None or (name == "sendfile" and not sys.platform.startswith('linux')):
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                count = min(KERNEL_COPY_CHUNK, size - offset)
+                if name == "copy_file_range":
+                    sent = func(src.fileno(), dst.fileno(), count, offset, offset)
+                else:
+                    os.lseek(dst.fileno(), offset, os.SEEK_SET)
+                    sent = func(dst.fileno(), src.fileno(), offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+            if offset == 0 and size > 0:
+                # Nothing copied at all: some filesystems (procfs, FUSE, cross-device on
+                # older kernels) report success without copying, try the next method
+                continue
+            if offset < size:
+                # Source shrank while copying, let the buffered copy report the real state
+                raise OSError(errno.EIO, "Short copy")
+            return name
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS or offset > 0:
+                raise
+    return None
+
+
+def _shutil_copy(source_path, dest_path):
+    """Baseline for the benchmark"""
+    shutil.copy2(source_path, dest_path)
+    return "shutil.copy2"
+
+
+def benchmark(source_dir, scratch_dir, modes=COPY_MODES):
+    """
+    Copy every file of source_dir once per mode and once with shutil.copy2
+
+    Args:
+        source_dir (str): Folder with test data, e.g. a multi-GB photo folder
+        scratch_dir (str): Folder for the copies, on the filesystem to measure
+
+    Returns:
+        list: (label, seconds, bytes, mechanisms used) per run
+    """
+    files = []
+    for root, _, names in os.walk(source_dir):
+        files.extend(os.path.join(root, name) for name in names)
+    total_bytes = sum(os.path.getsize(path) for path in files)
+
+    runs = [("shutil.copy2", _shutil_copy)]
+    runs += [(mode, lambda src, dst, mode=mode: copy_file(src, dst, mode)) for mode in modes]
+
+    results = []
+    for label, copy in runs:
+        target = tempfile.mkdtemp(prefix=f"bench_{label}_", dir=scratch_dir)
+        used = {}
+        try:
+            start = time.perf_counter()
+            for number, path in enumerate(files):
+                method = copy(path, os.path.join(target, f"{number}_{os.path.basename(path)}"))
+                used[method] = used.get(method, 0) + 1
+            results.append((label, time.perf_counter() - start, total_bytes, used))
+        finally:
+            shutil.rmtree(target, ignore_errors=True)
+    return results
+
+
+# Compare the copy modes: python -m components.core.file_copy.file_copy <source_dir> <scratch_dir>
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python -m components.core.file_copy.file_copy <source_dir> <scratch_dir>")
+        sys.exit(1)
+
+    for label, seconds, size, used in benchmark(sys.argv[1], sys.argv[2]):
+        rate = size / seconds / (1024 * 1024) if seconds else 0
+        methods = ", ".join(f"{name}: {count}" for name, count in sorted(used.items()))
+        print(f"{label:>14}: {seconds:8.2f} s  {rate:9.1f} MB/s  ({methods})")
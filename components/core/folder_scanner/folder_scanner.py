@@ -0,0 +1,154 @@
+from kivy.clock import Clock
+from kivy.logger import Logger
+import fnmatch
+import os
+import threading
+import time
+
+
+# Extensions accepted by the scanner
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+# Results are handed to the UI in chunks of this many paths, or at least every FLUSH_INTERVAL seconds
+CHUNK_SIZE = 250
+FLUSH_INTERVAL = 0.25
+
+
+def parse_patterns(text):
+    """Split a comma separated list of glob patterns, e.g. "*.jpg, IMG_*" """
+    return [pattern.strip() for pattern in text.split(',') if pattern.strip()]
+
+
+def _matches(patterns, name, relative_path):
+    """Case-insensitive glob match against a file name or its path relative to the scan root"""
+    name = name.lower()
+    relative_path = relative_path.lower()
+    for pattern in patterns:
+        pattern = pattern.lower()
+        if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern):
+            return True
+    return False
+
+
+def iter_image_entries(folder, recursive=False, include=(), exclude=(), extensions=IMAGE_EXTENSIONS):
+    """
+    Yield os.DirEntry objects of the image files below a folder
+
+    Uses os.scandir, so file type checks come from the directory listing itself and
+    entry.stat() is cached on the entry for later use.
+
+    Args:
+        folder (str): Folder to scan
+        recursive (bool): Also scan subfolders
+        include (list): Glob patterns a file must match (all files when empty)
+        exclude (list): Glob patterns for files and folders to skip
+        extensions (tuple): Accepted lower-case file extensions
+    """
+    pending = [folder]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative_path = os.path.relpath(entry.path, folder).replace(os.sep, '/')
+                    if exclude and _matches(exclude, entry.name, relative_path):
+                        continue
+
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append(entry.path)
+                        continue
+
+                    if not entry.is_file():
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in extensions:
+                        continue
+                    if include and not _matches(include, entry.name, relative_path):
+                        continue
+                    yield entry
+        except OSError as e:
+            # Unreadable subfolders are skipped, an unreadable root is an error
+            if directory == folder:
+                raise
+            Logger.warning(f"FolderScanner: Skipping {directory}: {str(e)}")
+
+
+class FolderScanner:
+    """
+    Scan a folder for images on a background thread.
+
+    Found paths are delivered in chunks through on_chunk(paths) on the main thread,
+    so the batch can start on the first images while the scan is still running.
+    on_done(total, error) is called once at the end, error is None on success.
+
+    An optional file_filter(entry) runs on the scanner thread for every found file;
+    files it returns False for are not delivered and only counted in skipped.
+    """
+
+    def __init__(self, folder, on_chunk, on_done=None, recursive=False, include=(), exclude=(), file_filter=None):
+        self.folder = folder
+        self.on_chunk = on_chunk
+        self.on_done = on_done
+        self.recursive = recursive
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.file_filter = file_filter
+        self.total = 0
+        self.skipped = 0
+        self.running = False
+        self._cancelled = threading.Event()
+
+    def start(self):
+        """Start scanning in the background"""
+        self.running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def cancel(self):
+        """Stop scanning, no more callbacks are made"""
+        self._cancelled.set()
+        self.running = False
+
+    def _run(self):
+        """Scanner thread"""
+        chunk = []
+        last_flush = time.monotonic()
+        error = None
+
+        try:
+            for entry in iter_image_entries(self.folder, self.recursive, self.include, self.exclude):
+                if self._cancelled.is_set():
+                    return
+                if self.file_filter and not self.file_filter(entry):
+                    self.skipped += 1
+                    continue
+                chunk.append(entry.path)
+                if len(chunk) >= CHUNK_SIZE or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                    self._flush(chunk)
+                    chunk = []
+                    last_flush = time.monotonic()
+        except Exception as e:
+            Logger.error(f"FolderScanner: Error scanning {self.folder}: {str(e)}")
+            error = e
+
+        if chunk:
+            self._flush(chunk)
+        Logger.info(f"FolderScanner: Found {self.total} images in {self.folder}, skipped {self.skipped}")
+        Clock.schedule_once(lambda dt: self._finish(error), 0)
+
+    def _flush(self, chunk):
+        """Hand a chunk of paths to the main thread"""
+        self.total += len(chunk)
+        Clock.schedule_once(lambda dt: self._deliver(chunk), 0)
+
+    def _deliver(self, chunk):
+        """Main thread: pass a chunk on unless the scan was cancelled"""
+        if not self._cancelled.is_set():
+            self.on_chunk(chunk)
+
+    def _finish(self, error):
+        """Main thread: report the end of the scan"""
+        if self._cancelled.is_set():
+            return
+        self.running = False
+        if self.on_done:
+            self.on_done(self.total, error)
@@ -0,0 +1,98 @@
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.properties import StringProperty, NumericProperty, ObjectProperty, ListProperty
+from kivy.metrics import dp
+from kivy.app import App
+from components.core.thumbnails.thumbnails import select_tier
+
+
+# Size of one image cell in the grid, the width is also used to pick the thumbnail tier
+GRID_CELL_WIDTH_DP = 150
+GRID_CELL_HEIGHT_DP = 180
+
+
+class ImageGridCell(RecycleDataViewBehavior, BoxLayout):
+    """One thumbnail and its name, recycled by ImageGrid as the user scrolls"""
+    filename = StringProperty("")
+    display_name = StringProperty("")
+    source = StringProperty("")
+    texture = ObjectProperty(None, allownone=True)
+    grid = ObjectProperty(None, allownone=True)
+
+    def on_source(self, instance, value):
+        """Fetch the texture of the new source from the app-wide texture cache"""
+        self.texture = None
+        if value:
+            App.get_running_app().texture_cache.request(
+                value, lambda texture, source=value: self._on_texture(source, texture), tier=self.grid.tier)
+
+    def _on_texture(self, source, texture):
+        """Apply a decoded texture unless the cell moved on to another image meanwhile"""
+        if self.source == source:
+            self.texture = texture
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Bind a data row to this (possibly recycled) cell"""
+        self.grid = rv.parent
+        super(ImageGridCell, self).refresh_view_attrs(rv, index, data)
+
+        # The image source is resolved only now, when the row becomes visible
+        filename = data.get('filename', "")
+        self.source = self.grid.resolve_source(filename, self._on_source_ready) if filename else ""
+
+    def _on_source_ready(self, filename, path):
+        """A better thumbnail became available - only apply it if the cell still shows that image"""
+        if self.filename == filename:
+            self.source = path
+
+    def on_touch_down(self, touch):
+        """Forward taps to the grid's on_image_selected event"""
+        if self.collide_point(*touch.pos) and self.grid:
+            self.grid.dispatch('on_image_selected', self, touch, self.filename)
+        return super(ImageGridCell, self).on_touch_down(touch)
+
+
+class ImageGrid(BoxLayout):
+    """
+    Virtualized image grid based on RecycleView.
+
+    Only the cells of visible rows are instantiated and they are rebound as the
+    user scrolls, so an album of any size costs the same number of widgets.
+    Screens provide a source_resolver(filename, on_ready) returning the path to
+    display; on_ready(path) may be called later with a better one.
+    """
+    cols = NumericProperty(3)
+    cell_width = NumericProperty(dp(GRID_CELL_WIDTH_DP))
+    cell_height = NumericProperty(dp(GRID_CELL_HEIGHT_DP))
+    source_resolver = ObjectProperty(None, allownone=True)
+
+    # Texture cache tier of the cells (the thumbnail size they display)
+    tier = NumericProperty(select_tier(dp(GRID_CELL_WIDTH_DP)))
+    message = StringProperty("")
+    message_color = ListProperty([1, 1, 1, 1])
+
+    __events__ = ('on_image_selected',)
+
+    def set_images(self, images):
+        """Show a list of (filename, display_name) tuples"""
+        self.message = ""
+        self.ids.recycle_view.data = [
+            {'filename': filename, 'display_name': display_name} for filename, display_name in images
+        ]
+        self.ids.recycle_view.scroll_y = 1
+
+    def show_message(self, message, error=False):
+        """Replace the images with a message"""
+        self.ids.recycle_view.data = []
+        self.message_color = [1, 0.3, 0.3, 1] if error else [1, 1, 1, 1]
+        self.message = message
+
+    def resolve_source(self, filename, on_ready):
+        """Return the path to display for a filename"""
+        if self.source_resolver is None:
+            return ""
+        return self.source_resolver(filename, lambda path: on_ready(filename, path))
+
+    def on_image_selected(self, cell, touch, filename):
+        """Default handler, screens bind to this event"""
+        pass
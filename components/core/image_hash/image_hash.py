@@ -0,0 +1,190 @@
+from PIL import Image, ImageOps
+import numpy as np
+import itertools
+import sys
+
+
+# Perceptual hashes for duplicate detection. Nothing in this module imports Kivy,
+# so hashing can run inside worker processes.
+
+# dHash compares HASH_SIZE + 1 columns of HASH_SIZE rows, giving HASH_SIZE ** 2 bits
+HASH_SIZE = 8
+
+# Maximum Hamming distance between two hashes that are reported as near-duplicates
+DUPLICATE_THRESHOLD = 6
+
+
+def dhash(path, hash_size=HASH_SIZE):
+    """
+    Difference hash of an image
+
+    The image is reduced to a tiny grayscale version and every bit records whether
+    a pixel is brighter than its right neighbour. Re-encoded, resized or slightly
+    edited copies of a photo end up within a few bits of each other.
+
+    Returns:
+        str: The hash as a hex string
+    """
+    with Image.open(path) as img:
+        # Let the JPEG decoder downscale while decoding, only a few pixels are needed
+        img.draft('L', (hash_size * 8, hash_size * 8))
+        img = ImageOps.exif_transpose(img).convert('L')
+        img = img.resize((hash_size + 1, hash_size), Image.BOX)
+        pixels = np.asarray(img, dtype=np.int16)
+
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return np.packbits(bits).tobytes().hex()
+
+
+def hash_images(paths):
+    """
+    Hash a chunk of images, meant to run in a worker process
+
+    Returns:
+        list: (path, hex hash) tuples, the hash is None for unreadable files
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append((path, dhash(path)))
+        except Exception:
+            results.append((path, None))
+    return results
+
+
+def hamming(a, b):
+    """Number of differing bits between two integer hashes"""
+    return (a ^ b).bit_count()
+
+
+class HashIndex:
+    """
+    Multi-index hash table for near-duplicate lookups by Hamming distance.
+
+    Every 64-bit hash is split into SEGMENTS slices that are indexed separately.
+    Two hashes within max_distance bits differ by at most max_distance // SEGMENTS
+    bits in at least one slice (pigeonhole), so a query only enumerates the few
+    slice values that close to its own and verifies the hashes filed under them,
+    instead of comparing against every hash in the project.
+    """
+    SEGMENTS = 4
+
+    def __init__(self, bits=HASH_SIZE * HASH_SIZE):
+        self.bits = bits
+        self._segment_bits = bits // self.SEGMENTS
+        self._mask = (1 << self._segment_bits) - 1
+        self._items = {}                                        # hash -> [items]
+        self._tables = [{} for _ in range(self.SEGMENTS)]       # slice value -> set of hashes
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value, item):
+        """Add an item with an integer (or hex string) hash"""
+        if isinstance(value, str):
+            value = int(value, 16)
+        self._size += 1
+        items = self._items.get(value)
+        if items is not None:
+            if item not in items:
+                items.append(item)
+            return
+
+        self._items[value] = [item]
+        for table, segment in zip(self._tables, self._segments(value)):
+            table.setdefault(segment, set()).add(value)
+
+    def find(self, value, max_distance=DUPLICATE_THRESHOLD):
+        """
+        Find items whose hash is within max_distance of value
+
+        Returns:
+            list: (distance, item) tuples, closest first
+        """
+        if isinstance(value, str):
+            value = int(value, 16)
+        radius = max_distance // self.SEGMENTS
+
+        candidates = set()
+        for table, segment in zip(self._tables, self._segments(value)):
+            for variant in self._variants(segment, radius):
+                candidates.update(table.get(variant, ()))
+
+        results = []
+        for candidate in candidates:
+            distance = hamming(value, candidate)
+            if distance <= max_distance:
+                results.extend((distance, item) for item in self._items[candidate])
+        results.sort(key=lambda result: result[0])
+        return results
+
+    def _segments(self, value):
+        """Split a hash into its slices"""
+        return [(value >> (i * self._segment_bits)) & self._mask for i in range(self.SEGMENTS)]
+
+    def _variants(self, segment, radius):
+        """Yield every slice value within radius bits of segment"""
+        yield segment
+        for flips in range(1, radius + 1):
+            for positions in itertools.combinations(range(self._segment_bits), flips):
+                variant = segment
+                for position in positions:
+                    variant ^= 1 << position
+                yield variant
+
+
+def duplicate_groups(hashes, max_distance=DUPLICATE_THRESHOLD):
+    """
+    Group items whose hashes are within max_distance of each other
+
+    Args:
+        hashes (iterable): (item, hex hash) tuples
+
+    Returns:
+        list: Lists of items with at least two members, largest group first
+    """
+    index = HashIndex()
+    hashes = list(hashes)
+    for item, value in hashes:
+        index.add(value, item)
+
+    # Union-find over the matches of every item
+    parent = {item: item for item, _ in hashes}
+
+    def root(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for item, value in hashes:
+        for _, match in index.find(value, max_distance):
+            a, b = root(item), root(match)
+            if a != b:
+                parent[b] = a
+
+    groups = {}
+    for item, _ in hashes:
+        groups.setdefault(root(item), []).append(item)
+    return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+
+# Report near-duplicates in a folder: python -m components.core.image_hash.image_hash <folder> [max_distance]
+if __name__ == '__main__':
+    import os
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m components.core.image_hash.image_hash <folder> [max_distance]")
+        sys.exit(1)
+
+    folder = sys.argv[1]
+    threshold = int(sys.argv[2]) if len(sys.argv) == 3 else DUPLICATE_THRESHOLD
+    files = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+             if os.path.isfile(os.path.join(folder, name))]
+    found = duplicate_groups([(path, value) for path, value in hash_images(files) if value], threshold)
+    for group in found:
+        print("Duplicates:")
+        for path in group:
+            print(f"  {path}")
+    print(f"{len(found)} groups of near-duplicates in {len(files)} files")
@@ -0,0 +1,208 @@
+from PIL import Image
+import os
+
+
+# Nothing in this module imports Kivy, so validation can run inside worker processes.
+
+# Validation outcomes
+STATUS_ACCEPTED = "accepted"
+STATUS_REJECTED = "rejected"   # Not an image type the app supports
+STATUS_CORRUPT = "corrupt"     # Looks like a supported image but cannot be read
+
+# Magic bytes of the supported formats, matched against the start of the file
+MAGIC_NUMBERS = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+# Pillow format names of the supported types
+PILLOW_FORMATS = {'jpeg': 'JPEG', 'png': 'PNG', 'gif': 'GIF'}
+
+EXTENSION_TYPES = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.gif': 'gif'}
+
+# Files are validated in chunks of this size, one worker job per chunk
+VALIDATION_CHUNK_SIZE = 64
+
+# The end marker of a JPEG is searched backwards from the end of the file in reads
+# of SCAN_CHUNK_SIZE. Usually it is in the first read; trailers after it (camera
+# data, the video of a motion photo) are searched up to TRAILER_SCAN_LIMIT bytes
+# deep, a deep validation searches all of the compressed data
+SCAN_CHUNK_SIZE = 64 * 1024
+TRAILER_SCAN_LIMIT = 16 * 1024 * 1024
+
+
+def sniff_type(header):
+    """Return the image type ('jpeg', 'png', 'gif') of a file's first bytes, or None"""
+    for magic, image_type in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return image_type
+    return None
+
+
+def jpeg_complete(f, size, deep=False):
+    """
+    Whether a JPEG file contains its end-of-image marker
+
+    The marker segments are skipped by their lengths up to the first scan, then the
+    compressed data is searched backwards from the end of the file for EOI - it
+    cannot occur there by accident, because encoders stuff every 0xFF data byte.
+    Anything after EOI (camera trailers, the video of a motion photo, padding) is
+    ignored.
+
+    Returns:
+        bool: Whether EOI was found, or None if it is not within the last
+            TRAILER_SCAN_LIMIT bytes and deep is False
+    """
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return False
+        code = marker[1]
+        if code == 0xFF:
+            # Fill byte before a marker
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if code == 0xD9:
+            return True
+        if code == 0x01 or 0xD0 <= code <= 0xD7:
+            # Markers without a segment
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return False
+        f.seek(int.from_bytes(length, 'big') - 2, os.SEEK_CUR)
+        if code == 0xDA:
+            break
+
+    start = f.tell()
+    limit = size - start if deep else TRAILER_SCAN_LIMIT
+    end = size
+    following = b''
+    while end > start:
+        if size - end >= limit:
+            return None
+        offset = max(start, end - SCAN_CHUNK_SIZE)
+        f.seek(offset)
+        chunk = f.read(end - offset)
+        if b'\xff\xd9' in chunk + following:
+            return True
+        following = chunk[:1]
+        end = offset
+    return False
+
+
+def png_complete(f, size):
+    """Whether the chunks of a PNG file reach its IEND chunk, data after IEND is ignored"""
+    offset = 8
+    while offset + 12 <= size:
+        f.seek(offset)
+        header = f.read(8)
+        if header[4:8] == b'IEND':
+            return True
+        offset += 12 + int.from_bytes(header[:4], 'big')
+    return False
+
+
+def validate_image(path, deep=False):
+    """
+    Check that a file really is a supported, complete image without decoding its pixels
+
+    The type is taken from the file's magic bytes rather than its extension. JPEG and
+    PNG files are checked for their end marker to catch truncated uploads, and Pillow
+    parses the header only. GIFs have no reliable end marker to check, a truncated GIF
+    is left to fail when it is decoded. Unless deep is set, only the end of a JPEG is
+    read (see jpeg_complete); one whose end marker is buried under a larger trailer
+    is accepted with a note.
+
+    Returns:
+        tuple: (path, status, reason) with status one of the STATUS_* constants and
+            reason an empty string for accepted files that match their extension
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(16)
+            image_type = sniff_type(header)
+            if image_type is None:
+                return path, STATUS_REJECTED, "Not a JPEG, PNG or GIF image"
+
+            # Truncated files are missing the end marker
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            complete = jpeg_complete(f, size, deep) if image_type == 'jpeg' else True
+            if complete is False:
+                return path, STATUS_CORRUPT, "File is truncated"
+            if image_type == 'png' and not png_complete(f, size):
+                return path, STATUS_CORRUPT, "File is truncated"
+
+        with Image.open(path) as img:
+            if img.format != PILLOW_FORMATS[image_type]:
+                return path, STATUS_CORRUPT, f"Unreadable {image_type.upper()} header"
+            width, height = img.size
+            if width <= 0 or height <= 0:
+                return path, STATUS_CORRUPT, "Image has no pixels"
+    except OSError as e:
+        return path, STATUS_CORRUPT, str(e)
+    except Exception as e:
+        return path, STATUS_CORRUPT, f"Unreadable image: {str(e)}"
+
+    if complete is None:
+        return path, STATUS_ACCEPTED, "End of the JPEG data was not checked, large trailer"
+
+    # Mislabeled files are accepted, but noted in the report
+    expected = EXTENSION_TYPES.get(os.path.splitext(path)[1].lower())
+    if expected != image_type:
+        return path, STATUS_ACCEPTED, f"Content is {image_type.upper()}"
+    return path, STATUS_ACCEPTED, ""
+
+
+def validate_images(paths, deep=False):
+    """Validate a chunk of files, returns a list of validate_image results"""
+    return [validate_image(path, deep) for path in paths]
+
+
+class ValidationReport:
+    """Accepted, rejected and corrupt files of a batch"""
+
+    def __init__(self):
+        self.accepted = []
+        self.rejected = []  # (path, reason)
+        self.corrupt = []   # (path, reason)
+        self.notes = []     # (path, reason) for accepted files with a remark
+
+    def add(self, results):
+        """Record validate_image results, returns the accepted paths in their original order"""
+        accepted = []
+        for path, status, reason in results:
+            if status == STATUS_ACCEPTED:
+                accepted.append(path)
+                if reason:
+                    self.notes.append((path, reason))
+            elif status == STATUS_REJECTED:
+                self.rejected.append((path, reason))
+            else:
+                self.corrupt.append((path, reason))
+        self.accepted.extend(accepted)
+        return accepted
+
+    @property
+    def total(self):
+        """Number of files validated so far"""
+        return len(self.accepted) + len(self.rejected) + len(self.corrupt)
+
+    def summary(self):
+        """One line summary of the report"""
+        return (f"{len(self.accepted)} accepted, {len(self.rejected)} rejected, "
+                f"{len(self.corrupt)} corrupt")
+
+    def details(self):
+        """Multi-line listing of the files that were not accepted as they are"""
+        lines = []
+        for title, entries in (("Rejected", self.rejected), ("Corrupt", self.corrupt),
+                               ("Accepted with notes", self.notes)):
+            if entries:
+                lines.append(f"{title}:")
+                lines.extend(f"  {os.path.basename(path)}: {reason}" for path, reason in entries)
+        return "\n".join(lines) or "All files were accepted."
@@ -0,0 +1,190 @@
+from collections import deque
+import heapq
+import random
+
+
+# Picks informative head-to-head matchups. Nothing in this module imports Kivy.
+
+# Ratings are grouped into brackets this many Elo points wide. Within a round
+# (equal number of comparisons) images are drawn bracket by bracket, Swiss style
+BRACKET_WIDTH = 32
+
+# Number of next-in-line images considered as opponents for each pair
+OPPONENT_CANDIDATES = 8
+
+# Pairs are planned this far ahead, so their images can be decoded early
+PAIR_LOOKAHEAD = 3
+
+# A pair is not shown again within this many pairs
+REPEAT_WINDOW = 64
+
+
+class PairScheduler:
+    """
+    Chooses which two images to compare next.
+
+    Available images sit in a heap ordered by (comparisons, rating bracket), so the
+    images with the fewest comparisons come up first and consecutive pops have
+    similar ratings - the same ordering a Swiss tournament uses to pair players
+    with equal scores. Each pair takes the first image off the heap and, out of
+    the next OPPONENT_CANDIDATES images, the opponent from the same round with the
+    closest rating, whose outcome is the least predictable. Each pair costs
+    O(OPPONENT_CANDIDATES * log n).
+
+    Pairs are planned `lookahead` pairs ahead; upcoming_images() lists the images
+    they need so a view can decode them before they are shown. Images of planned
+    and shown pairs are held out of the heap and return with fresh standings once
+    the shown pair is replaced.
+
+    standings(names) must return a (rating, comparisons) tuple per name.
+    """
+
+    def __init__(self, images, standings, lookahead=PAIR_LOOKAHEAD):
+        self.images = list(dict.fromkeys(images))
+        self.standings = standings
+        # Every image of a planned or shown pair is out of the heap. While the next pair
+        # is planned, the held pairs must leave at least four images in the heap, or the
+        # two images just released are paired again and small albums cycle through the
+        # same few pairs forever
+        self.lookahead = max(0, min(lookahead, (len(self.images) - 4) // 2))
+
+        self._heap = []
+        self._entries = {}  # name -> its current heap entry, older entries are stale
+        self._planned = deque()
+        self._current = None
+        self._recent = deque()
+        self._recent_pairs = set()
+        self.rebuild()
+
+    def __len__(self):
+        """Number of images being scheduled"""
+        return len(self.images)
+
+    def rebuild(self):
+        """Re-rank every available image, e.g. after the ratings were refitted"""
+        held = {name for pair in self._held_pairs() for name in pair}
+        names = [name for name in self.images if name not in held]
+        entries = [self._entry(name, standing) for name, standing in zip(names, self.standings(names))]
+        heapq.heapify(entries)
+        self._heap = entries
+        self._entries = {entry[-1]: entry for entry in entries}
+
+    def next_pair(self):
+        """
+        Return the next (left, right) pair to show, None with fewer than two images
+
+        The previously shown pair goes back into the heap with its updated standings.
+        """
+        if self._current is not None:
+            self._release(self._current)
+            self._current = None
+
+        while len(self._planned) <= self.lookahead:
+            pair = self._plan_pair()
+            if pair is None:
+                break
+            self._planned.append(pair)
+
+        if not self._planned:
+            return None
+        self._current = self._planned.popleft()
+        return self._current
+
+    def upcoming_images(self):
+        """Return the images of the planned pairs, in the order they will be shown"""
+        return [name for pair in self._planned for name in pair]
+
+    def _plan_pair(self):
+        """Take an image and its best opponent off the heap"""
+        first = self._pop()
+        if first is None:
+            return None
+
+        candidates = []
+        while len(candidates) < OPPONENT_CANDIDATES:
+            name = self._pop()
+            if name is None:
+                break
+            candidates.append(name)
+        if not candidates:
+            self._push(first)
+            return None
+
+        standings = self.standings([first] + candidates)
+        rating, games = standings[0]
+        options = [(name, standing) for name, standing in zip(candidates, standings[1:])
+                   if frozenset((first, name)) not in self._recent_pairs]
+        # Only repeats left in a small album, allow them
+        options = options or list(zip(candidates, standings[1:]))
+        opponent = min(options, key=lambda option: (option[1][1] - games, abs(option[1][0] - rating)))[0]
+
+        for name, standing in zip(candidates, standings[1:]):
+            if name != opponent:
+                self._push(name, standing)
+
+        self._remember(first, opponent)
+        # Random sides, so screen position does not favour either image
+        return (first, opponent) if random.random() < 0.5 else (opponent, first)
+
+    def _held_pairs(self):
+        """Pairs whose images are out of the heap"""
+        return list(self._planned) + ([self._current] if self._current else [])
+
+    def _release(self, pair):
+        """Put the images of a shown pair back into the heap"""
+        for name, standing in zip(pair, self.standings(list(pair))):
+            self._push(name, standing)
+
+    def _remember(self, first, second):
+        """Keep a pair out of the next REPEAT_WINDOW pairs"""
+        pair = frozenset((first, second))
+        self._recent.append(pair)
+        self._recent_pairs.add(pair)
+        if len(self._recent) > REPEAT_WINDOW:
+            self._recent_pairs.discard(self._recent.popleft())
+
+    def _entry(self, name, standing):
+        """Heap entry of an image: fewest comparisons first, then lowest rating bracket"""
+        rating, games = standing
+        return (games, int(rating // BRACKET_WIDTH), random.random(), name)
+
+    def _push(self, name, standing=None):
+        """Add an image to the heap, replacing any older entry"""
+        entry = self._entry(name, standing or self.standings([name])[0])
+        self._entries[name] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _pop(self):
+        """Take the next image off the heap, None when it is empty"""
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if self._entries.get(entry[-1]) is entry:
+                del self._entries[entry[-1]]
+                return entry[-1]
+        return None
+
+
+def pair_coverage(count, picks):
+    """Return how many of the possible pairs of count images are shown within picks pairs"""
+    images = [f"image_{number}" for number in range(count)]
+    scheduler = PairScheduler(images, lambda names: [(1500.0, 0) for _ in names])
+    shown = set()
+    for _ in range(picks):
+        pair = scheduler.next_pair()
+        if pair is None:
+            break
+        shown.add(frozenset(pair))
+    return len(shown)
+
+
+# Check that small albums reach every pair: python -m components.core.pair_scheduler.pair_scheduler
+if __name__ == '__main__':
+    import sys
+
+    failed = False
+    for count in range(2, 13):
+        possible = count * (count - 1) // 2
+        reached = pair_coverage(count, 300)
+        print(f"{count:3d} images: {reached} of {possible} pairs")
+        failed = failed or reached < possible
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,212 @@
+from array import array
+import base64
+import heapq
+import json
+import sys
+import numpy as np
+
+
+# Rankings from head-to-head ballots ("which of these two is better"). Nothing in
+# this module imports Kivy.
+
+# Elo scale: new images start at ELO_BASE, a difference of ELO_SCALE points means
+# 10:1 odds, and one comparison moves both ratings by at most ELO_K points
+ELO_BASE = 1500.0
+ELO_SCALE = 400.0
+ELO_K = 24.0
+
+# Bradley-Terry fit: every image gets PRIOR_GAMES virtual wins and losses against an
+# average image, which keeps unbeaten and winless images at finite strengths
+PRIOR_GAMES = 1.0
+FIT_ITERATIONS = 200
+FIT_TOLERANCE = 1e-4
+
+
+def expected_score(rating, opponent):
+    """Probability that an image rated rating beats one rated opponent"""
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / ELO_SCALE))
+
+
+def bradley_terry(winners, losers, count, iterations=FIT_ITERATIONS, tolerance=FIT_TOLERANCE):
+    """
+    Fit Bradley-Terry strengths to a list of comparisons
+
+    Uses the minorization-maximization update p_i = W_i / sum_j n_ij / (p_i + p_j)
+    with every sum computed for all images at once by np.bincount over the
+    comparison arrays, so an iteration is a handful of passes over the comparisons.
+
+    Args:
+        winners (sequence): Image index of the winner of each comparison
+        losers (sequence): Image index of the loser of each comparison
+        count (int): Number of images
+        iterations (int): Maximum number of iterations
+        tolerance (float): Stop when no log-strength changes by more than this
+
+    Returns:
+        numpy.ndarray: Strength of each image, geometric mean 1
+    """
+    winners = np.asarray(winners, dtype=np.intp)
+    losers = np.asarray(losers, dtype=np.intp)
+    wins = np.bincount(winners, minlength=count) + PRIOR_GAMES
+    strengths = np.ones(count)
+
+    for _ in range(iterations):
+        inverse = 1.0 / (strengths[winners] + strengths[losers])
+        games = (np.bincount(winners, inverse, count) + np.bincount(losers, inverse, count)
+                 + 2.0 * PRIOR_GAMES / (strengths + 1.0))
+        updated = wins / games
+        updated /= np.exp(np.log(updated).mean())
+
+        change = np.abs(np.log(updated / strengths)).max() if count else 0.0
+        strengths = updated
+        if change < tolerance:
+            break
+
+    return strengths
+
+
+def strengths_to_ratings(strengths):
+    """Convert Bradley-Terry strengths to the Elo scale"""
+    return ELO_BASE + ELO_SCALE * np.log10(strengths)
+
+
+class PairwiseRanking:
+    """
+    Ratings of images from head-to-head comparisons.
+
+    add() applies an online Elo update in O(1) and appends the comparison to compact
+    index arrays. fit() re-estimates every rating with a batch Bradley-Terry fit over
+    all comparisons; online updates made while the fit was running are carried over
+    by apply_fit(). Not thread-safe, the owner serializes access.
+    """
+
+    def __init__(self):
+        self.names = []      # index -> image filename
+        self.positions = {}  # image filename -> index
+        self.ratings = []
+        self.wins = []
+        self.games = []
+        self.winners = array('i')
+        self.losers = array('i')
+
+    def __len__(self):
+        """Number of comparisons"""
+        return len(self.winners)
+
+    def add(self, winner, loser):
+        """Record that winner was preferred over loser"""
+        w, l = self._position(winner), self._position(loser)
+        delta = ELO_K * (1.0 - expected_score(self.ratings[w], self.ratings[l]))
+        self.ratings[w] += delta
+        self.ratings[l] -= delta
+        self.wins[w] += 1
+        self.games[w] += 1
+        self.games[l] += 1
+        self.winners.append(w)
+        self.losers.append(l)
+
+    def rating(self, name):
+        """Return the rating of an image, ELO_BASE if it was never compared"""
+        position = self.positions.get(name)
+        return ELO_BASE if position is None else self.ratings[position]
+
+    def games_played(self, name):
+        """Return the number of comparisons an image took part in"""
+        position = self.positions.get(name)
+        return 0 if position is None else self.games[position]
+
+    def standing(self, name):
+        """Return (rating, comparisons) of an image"""
+        position = self.positions.get(name)
+        return (ELO_BASE, 0) if position is None else (self.ratings[position], self.games[position])
+
+    def leaderboard(self, count=None):
+        """Return (image, rating, wins, games) tuples, best rated first"""
+        order = range(len(self.names))
+        if count is None:
+            order = sorted(order, key=self.ratings.__getitem__, reverse=True)
+        else:
+            order = heapq.nlargest(count, order, key=self.ratings.__getitem__)
+        return [(self.names[i], self.ratings[i], self.wins[i], self.games[i]) for i in order]
+
+    def fit_input(self):
+        """Copy what a batch fit needs, so it can run while new comparisons arrive"""
+        return array('i', self.winners), array('i', self.losers), list(self.ratings)
+
+    @staticmethod
+    def fit(fit_input):
+        """Run a Bradley-Terry fit on the result of fit_input(), returns Elo-scale ratings"""
+        winners, losers, ratings = fit_input
+        return strengths_to_ratings(bradley_terry(winners, losers, len(ratings)))
+
+    def apply_fit(self, fit_input, fitted):
+        """Replace the ratings by a fit, keeping the online updates made since fit_input()"""
+        before = fit_input[2]
+        current = np.asarray(self.ratings)
+        current[:len(before)] += fitted - np.asarray(before)
+        self.ratings = current.tolist()
+
+    def refit(self):
+        """Fit and apply in one go"""
+        fit_input = self.fit_input()
+        self.apply_fit(fit_input, self.fit(fit_input))
+
+    def state(self):
+        """Serializable copy of the ranking, see from_state"""
+        return {
+            "names": list(self.names),
+            "ratings": list(self.ratings),
+            "wins": list(self.wins),
+            "games": list(self.games),
+            "winners": base64.b64encode(self.winners.tobytes()).decode('ascii'),
+            "losers": base64.b64encode(self.losers.tobytes()).decode('ascii'),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Restore a ranking saved with state()"""
+        ranking = cls()
+        ranking.names = state["names"]
+        ranking.positions = {name: position for position, name in enumerate(ranking.names)}
+        ranking.ratings = state["ratings"]
+        ranking.wins = state["wins"]
+        ranking.games = state["games"]
+        ranking.winners.frombytes(base64.b64decode(state["winners"]))
+        ranking.losers.frombytes(base64.b64decode(state["losers"]))
+        return ranking
+
+    def _position(self, name):
+        """Index of an image, adding it on first sight"""
+        position = self.positions.get(name)
+        if position is None:
+            position = self.positions[name] = len(self.names)
+            self.names.append(name)
+            self.ratings.append(ELO_BASE)
+            self.wins.append(0)
+            self.games.append(0)
+        return position
+
+
+# Rank the pairwise ballots of a ledger: python -m components.core.pairwise_ranking.pairwise_ranking <ballots.jsonl> [count]
+if __name__ == '__main__':
+    import time
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m components.core.pairwise_ranking.pairwise_ranking <ballots.jsonl> [count]")
+        sys.exit(1)
+
+    ranking = PairwiseRanking()
+    with open(sys.argv[1], 'rb') as f:
+        for line in f:
+            try:
+                ballot = json.loads(line)
+            except ValueError:
+                continue
+            if ballot.get("kind") == "pair":
+                ranking.add(ballot["winner"], ballot["loser"])
+
+    start = time.monotonic()
+    ranking.refit()
+    print(f"Fitted {len(ranking)} comparisons of {len(ranking.names)} images in {time.monotonic() - start:.2f}s")
+    for place, (name, rating, wins, games) in enumerate(ranking.leaderboard(int(sys.argv[2]) if len(sys.argv) == 3 else 20), 1):
+        print(f"{place:4d}. {rating:7.1f}  {wins}/{games}  {name}")
@@ -0,0 +1,58 @@
+from kivy.logger import Logger
+from kivy.metrics import dp
+from components.core.thumbnails.thumbnails import select_tier
+from components.core.texture_cache.texture_cache import TIER_ORIGINAL
+
+
+# Height of the image preview on the description and tags screens
+PREVIEW_HEIGHT_DP = 150
+
+
+class PreviewPrefetcher:
+    """
+    Decodes previews of upcoming batch images before the operator gets to them.
+
+    With a project open, a downscaled preview is staged by the derivative worker and,
+    once written, decoded into the app's TextureCache. Without one the original file
+    is decoded instead. The description and tags screens then find the texture in the
+    cache, so moving to the next batch image shows it without waiting for a decode.
+    """
+
+    def __init__(self, texture_cache):
+        self.texture_cache = texture_cache
+        self.tier = select_tier(dp(PREVIEW_HEIGHT_DP))
+
+    def prefetch(self, paths, repository=None):
+        """Start preparing the previews of the given files, nearest first"""
+        for path in paths:
+            if not path:
+                continue
+            if repository and repository.worker:
+                repository.stage_thumbnails(
+                    path, callback=lambda key, result, error, path=path: self._decode(path, repository, error))
+            else:
+                self.texture_cache.request(path, self._ignore)
+
+    def request(self, path, callback, repository=None):
+        """
+        Get the preview texture of a queued file
+
+        Uses the staged preview when it exists and falls back to the original file.
+        callback(texture) is called immediately when the texture is already decoded.
+        """
+        preview = repository.staged_thumbnail(path, self.tier) if repository else None
+        if preview:
+            return self.texture_cache.request(preview, callback, tier=self.tier)
+        return self.texture_cache.request(path, callback, tier=TIER_ORIGINAL)
+
+    def _decode(self, path, repository, error):
+        """Decode a freshly staged preview into the texture cache"""
+        if error is not None:
+            Logger.warning(f"PreviewPrefetcher: Could not stage a preview of {path}: {str(error)}")
+            return
+        preview = repository.staged_thumbnail(path, self.tier)
+        if preview:
+            self.texture_cache.request(preview, self._ignore, tier=self.tier)
+
+    def _ignore(self, texture):
+        """Callback for textures that are only decoded ahead of time"""
@@ -0,0 +1,74 @@
+from kivy.clock import Clock
+from kivy.uix.popup import Popup
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.progressbar import ProgressBar
+import threading
+
+
+class ProgressPopup(Popup):
+    """
+    Popup with a progress bar for long running background jobs.
+
+    update() and finish() may be called from any thread, the widgets are only
+    touched on the main thread. A cancellable popup shows a Cancel button that sets
+    the popup's cancelled event (polled by the job) and calls on_cancel() if given.
+    """
+
+    def __init__(self, title, cancellable=False, on_cancel=None, **kwargs):
+        self.cancelled = threading.Event()
+        self.on_cancel_callback = on_cancel
+
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+
+        self.status_label = Label(
+            text="Starting...",
+            halign='center',
+            valign='middle',
+            text_size=(400, None)
+        )
+        content.add_widget(self.status_label)
+
+        self.progress_bar = ProgressBar(max=1, value=0, size_hint_y=None, height=30)
+        content.add_widget(self.progress_bar)
+
+        self.cancel_button = None
+        if cancellable or on_cancel is not None:
+            self.cancel_button = Button(text="Cancel", size_hint_y=None, height=50)
+            self.cancel_button.bind(on_press=lambda x: self.cancel())
+            content.add_widget(self.cancel_button)
+
+        super(ProgressPopup, self).__init__(
+            title=title,
+            content=content,
+            size_hint=(0.8, 0.4),
+            auto_dismiss=False,
+            **kwargs
+        )
+
+    def update(self, done, total, text=""):
+        """Show done out of total, with an optional status text"""
+        Clock.schedule_once(lambda dt: self._update(done, total, text), 0)
+
+    def finish(self):
+        """Close the popup"""
+        Clock.schedule_once(lambda dt: self.dismiss(), 0)
+
+    def cancel(self):
+        """Ask the job to stop"""
+        if self.cancelled.is_set():
+            return
+        self.cancelled.set()
+        self.status_label.text = "Cancelling..."
+        if self.cancel_button:
+            self.cancel_button.disabled = True
+        if self.on_cancel_callback:
+            self.on_cancel_callback()
+
+    def _update(self, done, total, text):
+        """Main thread: refresh the widgets"""
+        self.progress_bar.max = max(total, 1)
+        self.progress_bar.value = done
+        if not self.cancelled.is_set():
+            self.status_label.text = text or f"{done} of {total}"
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import sys
+import zipfile
+
+
+# Nothing in this module imports Kivy, so it also works from the command line.
+
+ARCHIVE_EXTENSION = ".vpic"
+ARCHIVE_FORMAT = "vpic"
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Project contents that go into an archive; thumbnails and the index are rebuilt on import
+ARCHIVE_DIRS = ("images", "images_metadata", "albums_metadata", "votes")
+ARCHIVE_FILES = ("project_settings.json",)
+
+# Files left out of an archive: half-written temporary files, and the device ID a
+# ballot ledger falls back to - ballots cast from an imported copy must not claim
+# to come from the device that exported it
+EXCLUDED_NAMES = ("device_id",)
+EXCLUDED_SUFFIXES = (".tmp",)
+
+# Already compressed formats are stored as they are
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+# Names of entries extracted so far, kept in the staging directory of an import
+IMPORT_STATE_NAME = ".vpic_import_state"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ArchiveError(Exception):
+    """The archive is not a valid .vpic file or its contents do not match the manifest"""
+
+
+class ArchiveCancelled(Exception):
+    """Raised when the cancelled event of an export or import is set"""
+
+
+def _hasher():
+    """Hash used for manifest entries"""
+    return hashlib.blake2b(digest_size=32)
+
+
+def _project_files(project_path):
+    """Yield (archive name, path) of every file that belongs in an archive"""
+    for directory in ARCHIVE_DIRS:
+        root = os.path.join(project_path, directory)
+        if not os.path.isdir(root):
+            continue
+        for current, dirs, files in os.walk(root):
+            dirs.sort()
+            for name in sorted(files):
+                if name in EXCLUDED_NAMES or name.endswith(EXCLUDED_SUFFIXES):
+                    continue
+                path = os.path.join(current, name)
+                yield os.path.relpath(path, project_path).replace(os.sep, '/'), path
+    for name in ARCHIVE_FILES:
+        path = os.path.join(project_path, name)
+        if os.path.isfile(path):
+            yield name, path
+
+
+def export_project(project_path, archive_path, progress=None, cancelled=None):
+    """
+    Write a project into a single .vpic archive
+
+    The archive is a zip file. Files are streamed from the project into the archive
+    and hashed on the way, images are stored without recompression and JSON files
+    are deflated. The manifest with sizes and BLAKE2b hashes is written last.
+
+    Args:
+        project_path (str): Project directory
+        archive_path (str): Archive to create, written to archive_path + ".part" first
+        progress (callable): Optional progress(files_done, files_total, bytes_done, bytes_total)
+        cancelled (threading.Event): Optional event that aborts the export
+
+    Returns:
+        int: Number of files in the archive
+    """
+    files = list(_project_files(project_path))
+    bytes_total = sum(os.path.getsize(path) for _, path in files)
+    bytes_done = 0
+    manifest = {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "project": os.path.basename(os.path.normpath(project_path)),
+        "files": {}
+    }
+
+    part_path = archive_path + ".part"
+    try:
+        with zipfile.ZipFile(part_path, 'w', allowZip64=True) as archive:
+            for number, (name, path) in enumerate(files, 1):
+                if cancelled and cancelled.is_set():
+                    raise ArchiveCancelled()
+
+                stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+                info = zipfile.ZipInfo.from_file(path, name)
+                info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+
+                digest = _hasher()
+                size = 0
+                with open(path, 'rb') as src, archive.open(info, 'w', force_zip64=True) as dst:
+                    for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        dst.write(chunk)
+                        size += len(chunk)
+                manifest["files"][name] = {"size": size, "blake2b": digest.hexdigest()}
+
+                bytes_done += size
+                if progress:
+                    progress(number, len(files), bytes_done, bytes_total)
+
+            archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=4), zipfile.ZIP_DEFLATED)
+        os.replace(part_path, archive_path)
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+
+    return len(files)
+
+
+def read_manifest(archive_path):
+    """Return the manifest of a .vpic archive"""
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            manifest = json.loads(archive.read(MANIFEST_NAME))
+    except (KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise ArchiveError(f"Not a valid {ARCHIVE_EXTENSION} archive: {str(e)}")
+
+    if manifest.get("format") != ARCHIVE_FORMAT or manifest.get("version", 0) > ARCHIVE_VERSION:
+        raise ArchiveError("Unsupported archive format or version")
+    return manifest
+
+
+def import_archive(archive_path, staging_path, progress=None, cancelled=None):
+    """
+    Extract a .vpic archive into a staging directory, resuming a previous attempt
+
+    Entries are streamed straight from the archive to disk and checked against the
+    manifest hashes while they are written. The names of verified entries are recorded
+    in the staging directory, so an interrupted import continues where it stopped when
+    it is started again with the same staging directory. The caller renames the staging
+    directory into place once this returns.
+
+    Returns:
+        dict: The archive's manifest
+    """
+    manifest = read_manifest(archive_path)
+    entries = manifest["files"]
+    bytes_total = sum(entry["size"] for entry in entries.values())
+
+    os.makedirs(staging_path, exist_ok=True)
+    state_path = os.path.join(staging_path, IMPORT_STATE_NAME)
+    done = set()
+    if os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            done = {line.rstrip('\n') for line in f if line.endswith('\n')}
+
+    staging_root = os.path.realpath(staging_path)
+    files_done = len(done & entries.keys())
+    bytes_done = sum(entries[name]["size"] for name in done if name in entries)
+    if progress:
+        progress(files_done, len(entries), bytes_done, bytes_total)
+
+    with zipfile.ZipFile(archive_path) as archive, open(state_path, 'a') as state:
+        for name, entry in entries.items():
+            if name in done:
+                continue
+            if cancelled and cancelled.is_set():
+                raise ArchiveCancelled()
+
+            # Never write outside the staging directory
+            dest = os.path.realpath(os.path.join(staging_path, *name.split('/')))
+            if not dest.startswith(staging_root + os.sep):
+                raise ArchiveError(f"Unsafe path in archive: {name}")
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+            digest = _hasher()
+            try:
+                with archive.open(name) as src, open(dest, 'wb') as dst:
+                    for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        dst.write(chunk)
+            except KeyError:
+                raise ArchiveError(f"Archive is missing {name}")
+            if digest.hexdigest() != entry["blake2b"]:
+                os.remove(dest)
+                raise ArchiveError(f"Checksum mismatch for {name}")
+
+            state.write(name + "\n")
+            state.flush()
+            files_done += 1
+            bytes_done += entry["size"]
+            if progress:
+                progress(files_done, len(entries), bytes_done, bytes_total)
+
+    os.remove(state_path)
+    return manifest
+
+
+# Export from the command line: python -m components.core.project_archive.project_archive <project> <archive>
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python -m components.core.project_archive.project_archive <project_path> <archive.vpic>")
+        sys.exit(1)
+
+    count = export_project(sys.argv[1], sys.argv[2])
+    print(f"Exported {count} files to {sys.argv[2]}")
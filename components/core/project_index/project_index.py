@@ -0,0 +1,566 @@
+from kivy.logger import Logger
+import os
+import json
+import re
+import sqlite3
+import threading
+from components.core.album_journal.album_journal import load_album
+
+
+# Name of the index database inside a project directory
+INDEX_FILENAME = "index.db"
+
+# Bump this whenever the schema changes - the index is then rebuilt from the JSON files
+SCHEMA_VERSION = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    display_name TEXT,
+    original_filename TEXT,
+    description TEXT,
+    upload_date TEXT,
+    album TEXT,
+    dhash TEXT,
+    size INTEGER,
+    partial_hash TEXT,
+    content_hash TEXT,
+    capture_date TEXT,
+    exif_read INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS images_size ON images (size);
+CREATE INDEX IF NOT EXISTS images_capture_date ON images (capture_date);
+CREATE TABLE IF NOT EXISTS albums (
+    name TEXT PRIMARY KEY,
+    description TEXT,
+    created_date TEXT
+);
+CREATE TABLE IF NOT EXISTS album_images (
+    album TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    PRIMARY KEY (album, filename)
+);
+CREATE INDEX IF NOT EXISTS album_images_position ON album_images (album, position);
+CREATE TABLE IF NOT EXISTS image_tags (
+    tag TEXT NOT NULL,
+    image_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, image_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS image_tags_image ON image_tags (image_id);
+"""
+
+# Full-text index over the searchable image fields, rowid = images.id. Prefix indexes
+# keep short "type ahead" queries fast. Python builds without FTS5 fall back to LIKE.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS images_fts USING fts5(
+    display_name, original_filename, description,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+TABLES = ("images", "albums", "album_images", "image_tags")
+FTS_TABLE = "images_fts"
+
+# Relative weight of display_name, original_filename and description in search ranking
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+# Maximum number of search results
+SEARCH_LIMIT = 500
+
+
+def normalize_tag(tag):
+    """Normalize a tag for indexing and queries: trimmed, lower case, single spaces"""
+    return " ".join(tag.lower().split())
+
+
+def parse_tag_query(text):
+    """
+    Parse a tag filter such as "beach, sea | lake, -people"
+
+    Comma separated terms must all match (AND), alternatives inside a term are
+    separated by | (OR) and a leading - excludes a tag (NOT).
+
+    Returns:
+        tuple: (list of sets of tags, at least one of each set must match;
+                set of excluded tags)
+    """
+    groups = []
+    excluded = set()
+    for term in text.split(','):
+        term = term.strip()
+        if term.startswith('-'):
+            tag = normalize_tag(term[1:])
+            if tag:
+                excluded.add(tag)
+            continue
+        group = {normalize_tag(option) for option in term.split('|')} - {""}
+        if group:
+            groups.append(group)
+    return groups, excluded
+
+
+def search_terms(text):
+    """Split a search box text into lower case words"""
+    return re.findall(r"\w+", text.lower())
+
+
+def album_name_from_filename(filename):
+    """Convert an album metadata filename (Unsigned_Images.json) to its display name"""
+    return os.path.splitext(filename)[0].replace('_', ' ')
+
+
+class ProjectIndex:
+    """
+    SQLite index over a project's image and album metadata.
+
+    The JSON files in images_metadata/ and albums_metadata/ remain the source of truth.
+    This index only mirrors them so screens can fetch a whole album page with one query
+    instead of opening one metadata file per image. It can always be rebuilt from the JSON.
+    """
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+        self.db_path = os.path.join(project_path, INDEX_FILENAME)
+        self._lock = threading.RLock()
+
+        needs_rebuild = not os.path.exists(self.db_path)
+
+        # Connection is shared with background jobs, access is serialized by self._lock
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version:
+                Logger.info(f"ProjectIndex: Schema version {version} != {SCHEMA_VERSION}, recreating index")
+            with self.conn:
+                for table in TABLES + (FTS_TABLE,):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            needs_rebuild = True
+
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        try:
+            with self.conn:
+                self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            Logger.warning(f"ProjectIndex: Full-text search unavailable, using LIKE queries: {str(e)}")
+            self.has_fts = False
+        self._tables = TABLES + ((FTS_TABLE,) if self.has_fts else ())
+
+        if needs_rebuild:
+            self.rebuild()
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self.conn.close()
+
+    def rebuild(self):
+        """Rebuild the whole index from the project's JSON metadata files"""
+        Logger.info(f"ProjectIndex: Rebuilding index for {self.project_path}")
+        images_meta_dir = os.path.join(self.project_path, "images_metadata")
+        albums_meta_dir = os.path.join(self.project_path, "albums_metadata")
+
+        with self._lock, self.conn:
+            for table in self._tables:
+                self.conn.execute(f"DELETE FROM {table}")
+
+            # Images
+            image_count = 0
+            if os.path.isdir(images_meta_dir):
+                with os.scandir(images_meta_dir) as entries:
+                    for entry in entries:
+                        if not entry.is_file() or not entry.name.lower().endswith('.json'):
+                            continue
+                        try:
+                            with open(entry.path, 'r') as f:
+                                metadata = json.load(f)
+                        except Exception as e:
+                            Logger.error(f"ProjectIndex: Error reading {entry.path}: {str(e)}")
+                            continue
+                        self._insert_image(metadata)
+                        image_count += 1
+
+            # Albums and their membership
+            album_count = 0
+            if os.path.isdir(albums_meta_dir):
+                with os.scandir(albums_meta_dir) as entries:
+                    for entry in entries:
+                        if not entry.is_file() or not entry.name.lower().endswith('.json'):
+                            continue
+                        try:
+                            album_data = load_album(entry.path)
+                        except Exception as e:
+                            Logger.error(f"ProjectIndex: Error reading {entry.path}: {str(e)}")
+                            continue
+                        self._insert_album(album_name_from_filename(entry.name), album_data)
+                        album_count += 1
+
+        Logger.info(f"ProjectIndex: Indexed {image_count} images and {album_count} albums")
+
+    def clear(self):
+        """Remove every entry from the index"""
+        with self._lock, self.conn:
+            for table in self._tables:
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def add_image(self, metadata, album_name=None):
+        """Add (or replace) one image and optionally append it to an album"""
+        with self._lock, self.conn:
+            self._insert_image(metadata)
+            if album_name:
+                self._append_to_album(album_name, metadata["filename"])
+
+    def add_images(self, metadata_list, album_name=None):
+        """Add many images in one transaction, appending them to an album in order"""
+        with self._lock, self.conn:
+            for metadata in metadata_list:
+                self._insert_image(metadata)
+                if album_name:
+                    self._append_to_album(album_name, metadata["filename"])
+
+    def add_album(self, album_name, album_data):
+        """Add (or replace) an album and its image list"""
+        with self._lock, self.conn:
+            self._insert_album(album_name, album_data)
+
+    def get_album_page(self, album_name, offset=0, limit=None):
+        """
+        Return one page of an album as a list of (filename, display_name) tuples
+
+        Args:
+            album_name (str): Album display name, e.g. "Unsigned Images"
+            offset (int): Index of the first image of the page
+            limit (int): Maximum number of images, None for the rest of the album
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT a.filename, i.display_name
+                FROM album_images a LEFT JOIN images i ON i.filename = a.filename
+                WHERE a.album = ?
+                ORDER BY a.position
+                LIMIT ? OFFSET ?
+                """,
+                (album_name, -1 if limit is None else limit, offset)
+            ).fetchall()
+
+        return [(row[0], row[1] or os.path.basename(row[0])) for row in rows]
+
+    def query_tags(self, groups, excluded=(), album_name=None):
+        """
+        Find images by tag, see parse_tag_query
+
+        image_tags is keyed by (tag, image_id), so every term is a range scan over
+        the sorted image ids of one tag.
+
+        Args:
+            groups (list): Sets of normalized tags, an image needs one tag of every set
+            excluded (iterable): Normalized tags an image must not have
+            album_name (str): Only search this album, results then keep album order
+
+        Returns:
+            list: (filename, display_name) tuples
+        """
+        # Inside an album the album's own order drives the scan; the unary + keeps SQLite
+        # from probing images once per (row, tag match) pair instead
+        image_id = "+i.id" if album_name else "i.id"
+        conditions = []
+        params = []
+        for group in groups:
+            conditions.append(
+                f"{image_id} IN (SELECT image_id FROM image_tags WHERE tag IN ({','.join('?' * len(group))}))")
+            params.extend(sorted(group))
+        excluded = sorted(excluded)
+        if excluded:
+            conditions.append(
+                f"{image_id} NOT IN (SELECT image_id FROM image_tags WHERE tag IN ({','.join('?' * len(excluded))}))")
+            params.extend(excluded)
+        where = " AND ".join(conditions) or "1"
+
+        if album_name:
+            sql = (f"SELECT i.filename, i.display_name FROM album_images a JOIN images i ON i.filename = a.filename "
+                   f"WHERE a.album = ? AND {where} ORDER BY a.position")
+            params.insert(0, album_name)
+        else:
+            sql = f"SELECT i.filename, i.display_name FROM images i WHERE {where} ORDER BY i.id"
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [(row[0], row[1] or os.path.basename(row[0])) for row in rows]
+
+    def tag_facets(self, album_name=None, limit=None):
+        """Return (tag, image count) tuples, most used tags first"""
+        if album_name:
+            sql = ("SELECT t.tag, COUNT(*) AS n FROM album_images a "
+                   "JOIN images i ON i.filename = a.filename JOIN image_tags t ON t.image_id = i.id "
+                   "WHERE a.album = ? GROUP BY t.tag ORDER BY n DESC, t.tag LIMIT ?")
+            params = (album_name, -1 if limit is None else limit)
+        else:
+            sql = "SELECT tag, COUNT(*) AS n FROM image_tags GROUP BY tag ORDER BY n DESC, tag LIMIT ?"
+            params = (-1 if limit is None else limit,)
+
+        with self._lock:
+            return [(row[0], row[1]) for row in self.conn.execute(sql, params).fetchall()]
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """
+        Full-text search over display names, original filenames and descriptions
+
+        Every word of text must match the start of a word in one of the fields, so
+        results narrow down as the user types. Results are ranked by BM25 with the
+        display name weighted highest.
+
+        Returns:
+            list: (filename, display_name) tuples, best match first
+        """
+        terms = search_terms(text)
+        if not terms:
+            return []
+
+        if self.has_fts:
+            query = " ".join(f'"{term}"*' for term in terms)
+            sql = (f"SELECT i.filename, i.display_name FROM {FTS_TABLE} f JOIN images i ON i.id = f.rowid "
+                   f"WHERE {FTS_TABLE} MATCH ? ORDER BY bm25({FTS_TABLE}, {', '.join(map(str, FTS_WEIGHTS))}) "
+                   f"LIMIT ?")
+            params = [query, limit]
+        else:
+            condition = "(display_name LIKE ? OR original_filename LIKE ? OR description LIKE ?)"
+            sql = (f"SELECT filename, display_name FROM images WHERE {' AND '.join([condition] * len(terms))} "
+                   f"ORDER BY id LIMIT ?")
+            params = [f"%{term}%" for term in terms for _ in range(3)] + [limit]
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [(row[0], row[1] or os.path.basename(row[0])) for row in rows]
+
+    def get_hashes(self):
+        """Return (filename, dhash) tuples of every image with a perceptual hash"""
+        with self._lock:
+            return [(row[0], row[1]) for row in
+                    self.conn.execute("SELECT filename, dhash FROM images WHERE dhash IS NOT NULL").fetchall()]
+
+    def missing_hashes(self):
+        """Return the filenames of images that have no perceptual hash yet"""
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT filename FROM images WHERE dhash IS NULL").fetchall()]
+
+    def set_hashes(self, hashes):
+        """Store (filename, dhash) tuples in one transaction"""
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE images SET dhash = ? WHERE filename = ?",
+                                  [(value, filename) for filename, value in hashes])
+
+    def get_sizes(self):
+        """Return (file size, filename) tuples of every image file"""
+        with self._lock:
+            return [(row[0], row[1]) for row in
+                    self.conn.execute("SELECT size, filename FROM images WHERE size IS NOT NULL").fetchall()]
+
+    def get_content_hashes(self, filename):
+        """Return the (partial, full) content hashes of an image, None where not computed yet"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT partial_hash, content_hash FROM images WHERE filename = ?", (filename,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def set_content_hashes(self, filename, partial_hash, content_hash=None):
+        """Store the content hashes of an image, keeping a known full hash if content_hash is None"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE images SET partial_hash = ?, content_hash = COALESCE(?, content_hash) WHERE filename = ?",
+                (partial_hash, content_hash, filename)
+            )
+
+    def set_capture_dates(self, dates):
+        """Store (filename, capture_date) tuples of images whose EXIF data was read, the date may be None"""
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE images SET capture_date = ?, exif_read = 1 WHERE filename = ?",
+                                  [(capture_date, filename) for filename, capture_date in dates])
+
+    def missing_exif(self):
+        """Return the filenames of images whose EXIF data was not read yet"""
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT filename FROM images WHERE exif_read = 0").fetchall()]
+
+    def capture_months(self):
+        """Return (YYYY-MM, image count) tuples, oldest month first"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT substr(capture_date, 1, 7) AS month, COUNT(*) FROM images "
+                "WHERE capture_date IS NOT NULL GROUP BY month ORDER BY month"
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def capture_days(self, month):
+        """Return (YYYY-MM-DD, image count) tuples of one month"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT substr(capture_date, 1, 10) AS day, COUNT(*) FROM images "
+                "WHERE capture_date >= ? AND capture_date < ? GROUP BY day ORDER BY day",
+                (month, month + "~")
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def get_captured(self, period, offset=0, limit=None):
+        """
+        Return (filename, display_name) tuples of the images captured in a period, in capture order
+
+        Args:
+            period (str): Capture date prefix, a month ("2024-05") or a day ("2024-05-17")
+        """
+        # Capture dates sort as text, so a prefix is a range scan over the capture_date index
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT filename, display_name FROM images WHERE capture_date >= ? AND capture_date < ? "
+                "ORDER BY capture_date, id LIMIT ? OFFSET ?",
+                (period, period + "~", -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [(row[0], row[1] or os.path.basename(row[0])) for row in rows]
+
+    def count_undated(self):
+        """Return the number of images without a capture date"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM images WHERE capture_date IS NULL").fetchone()[0]
+
+    def get_display_names(self, filenames):
+        """Return a {filename: display_name} dictionary for the given images"""
+        filenames = list(filenames)
+        names = {}
+        with self._lock:
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(filenames), 500):
+                chunk = filenames[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT filename, display_name FROM images WHERE filename IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                names.update((row[0], row[1]) for row in rows if row[1])
+        return {filename: names.get(filename) or os.path.basename(filename) for filename in filenames}
+
+    def count_album_images(self, album_name):
+        """Return the number of images in an album"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM album_images WHERE album = ?", (album_name,)
+            ).fetchone()[0]
+
+    def _insert_image(self, metadata):
+        """Insert one image row and its tags (caller holds the lock and transaction)"""
+        filename = metadata.get("filename")
+        if not filename:
+            return
+
+        self.conn.execute(
+            """
+            INSERT INTO images (filename, display_name, original_filename, description, upload_date, album, dhash,
+                                size, capture_date, exif_read)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(filename) DO UPDATE SET
+                display_name = excluded.display_name,
+                original_filename = excluded.original_filename,
+                description = excluded.description,
+                upload_date = excluded.upload_date,
+                album = excluded.album,
+                dhash = excluded.dhash,
+                partial_hash = CASE WHEN size IS excluded.size THEN partial_hash END,
+                content_hash = CASE WHEN size IS excluded.size THEN content_hash END,
+                size = excluded.size,
+                capture_date = excluded.capture_date,
+                exif_read = excluded.exif_read
+            """,
+            (filename, metadata.get("display_name"), metadata.get("original_filename"),
+             metadata.get("description"), metadata.get("upload_date"), metadata.get("album"),
+             metadata.get("dhash"), self._file_size(filename),
+             (metadata.get("exif") or {}).get("capture_date"), int("exif" in metadata))
+        )
+        image_id = self.conn.execute("SELECT id FROM images WHERE filename = ?", (filename,)).fetchone()[0]
+
+        if self.has_fts:
+            self.conn.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", (image_id,))
+            self.conn.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, display_name, original_filename, description) VALUES (?, ?, ?, ?)",
+                (image_id, metadata.get("display_name") or "", metadata.get("original_filename") or "",
+                 metadata.get("description") or "")
+            )
+
+        self.conn.execute("DELETE FROM image_tags WHERE image_id = ?", (image_id,))
+        tags = {normalize_tag(tag) for tag in metadata.get("tags", []) if tag and tag.strip()}
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO image_tags (tag, image_id) VALUES (?, ?)",
+            [(tag, image_id) for tag in tags]
+        )
+
+    def _file_size(self, filename):
+        """Size of an image file in the project, None if it is missing"""
+        try:
+            return os.path.getsize(os.path.join(self.project_path, "images", filename))
+        except OSError:
+            return None
+
+    def _insert_album(self, album_name, album_data):
+        """Insert one album row and its membership (caller holds the lock and transaction)"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO albums (name, description, created_date) VALUES (?, ?, ?)",
+            (album_name, album_data.get("description", ""), album_data.get("created_date"))
+        )
+        self.conn.execute("DELETE FROM album_images WHERE album = ?", (album_name,))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO album_images (album, position, filename) VALUES (?, ?, ?)",
+            [(album_name, position, filename) for position, filename in enumerate(album_data.get("images", []))]
+        )
+
+    def _append_to_album(self, album_name, filename):
+        """Append one image at the end of an album (caller holds the lock and transaction)"""
+        next_position = self.conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM album_images WHERE album = ?", (album_name,)
+        ).fetchone()[0]
+        self.conn.execute(
+            "INSERT OR IGNORE INTO album_images (album, position, filename) VALUES (?, ?, ?)",
+            (album_name, next_position, filename)
+        )
+
+
+# One open index per project path, shared by all screens
+_open_indexes = {}
+_open_indexes_lock = threading.Lock()
+
+
+def get_project_index(project_path):
+    """Return the shared ProjectIndex for a project, opening (and building) it if needed"""
+    project_path = os.path.abspath(project_path)
+    with _open_indexes_lock:
+        index = _open_indexes.get(project_path)
+        if index is None:
+            index = ProjectIndex(project_path)
+            _open_indexes[project_path] = index
+        return index
+
+
+def close_project_index(project_path):
+    """Close the shared index of a project, e.g. before its directory is deleted"""
+    project_path = os.path.abspath(project_path)
+    with _open_indexes_lock:
+        index = _open_indexes.pop(project_path, None)
+    if index is not None:
+        index.close()
+
+
+def rebuild_project_index(project_path):
+    """Discard any existing index of a project and rebuild it from the JSON files"""
+    close_project_index(project_path)
+    for suffix in ("", "-wal", "-shm"):
+        db_file = os.path.join(project_path, INDEX_FILENAME + suffix)
+        if os.path.exists(db_file):
+            os.remove(db_file)
+    return get_project_index(project_path)
@@ -0,0 +1,799 @@
+from kivy.logger import Logger
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import os
+import json
+import threading
+import time
+from datetime import datetime
+from string import Formatter
+from components.core.project_index.project_index import (
+    get_project_index, close_project_index, album_name_from_filename, parse_tag_query
+)
+from components.core.album_journal.album_journal import (
+    load_album, append_event, append_events, journal_path, ACTION_ADD
+)
+from components.core.thumbnails.thumbnails import (
+    best_thumbnail, generate_thumbnails, generate_staged_thumbnails, adopt_staged_thumbnails,
+    discard_staged_thumbnails, sweep_staged_thumbnails, staged_thumbnail_path, select_tier,
+    thumbnail_path, THUMBNAIL_SIZES, THUMBNAILS_DIRNAME
+)
+from components.core.derivative_worker.derivative_worker import (
+    PRIORITY_VISIBLE, PRIORITY_INGEST, PRIORITY_BACKFILL
+)
+from components.core.file_copy.file_copy import copy_file, COPY_MODES, DEFAULT_COPY_MODE
+from components.core.image_hash.image_hash import (
+    hash_images, duplicate_groups, HashIndex, DUPLICATE_THRESHOLD
+)
+from components.core.content_index.content_index import ContentIndex
+from components.core.exif_metadata.exif_metadata import read_exif_batch
+from components.core.ballot_ledger.ballot_ledger import BallotLedger
+from components.core.pair_scheduler.pair_scheduler import PairScheduler
+from components.core.batch_session.batch_session import BatchSession
+
+
+DEFAULT_ALBUM_NAME = "Unsigned Images"
+DEFAULT_ALBUM_DESCRIPTION = "Default album for newly uploaded images"
+
+# Per-project options, stored in the project directory
+PROJECT_SETTINGS_FILENAME = "project_settings.json"
+DEFAULT_PROJECT_SETTINGS = {
+    "copy_mode": DEFAULT_COPY_MODE
+}
+
+# Default display name pattern of bulk ingested images, see format_image_name
+DEFAULT_NAME_PATTERN = "{name}"
+
+# Files copied ahead of the metadata writer during a bulk ingest
+BULK_COPY_WORKERS = 4
+BULK_COPY_WINDOW = 16
+
+# Images per perceptual hash or EXIF job of the derivative worker
+HASH_CHUNK_SIZE = 64
+EXIF_CHUNK_SIZE = 64
+
+
+def new_album_data(name, description=""):
+    """Return the metadata dictionary for a new, empty album"""
+    return {
+        "name": name,
+        "description": description,
+        "created_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "images": []
+    }
+
+
+def album_filename(album_name):
+    """Return the metadata filename of an album (spaces become underscores)"""
+    return album_name.replace(' ', '_') + '.json'
+
+
+def format_image_name(pattern, source_path, number):
+    """
+    Build a display name for a bulk ingested image
+
+    The pattern may use {name} (original file name without extension), {n} (1-based
+    position in the batch) and {date} (today, YYYY-MM-DD), e.g. "Trip {date} {n}".
+    """
+    fields = {
+        "name": os.path.splitext(os.path.basename(source_path))[0],
+        "n": number,
+        "date": datetime.now().strftime('%Y-%m-%d'),
+    }
+    try:
+        # Only the plain placeholders, no attribute or index lookups like {name.upper}
+        for _, field, _, _ in Formatter().parse(pattern):
+            if field is not None and field not in fields:
+                raise KeyError(field)
+        name = pattern.format(**fields)
+    except (KeyError, IndexError, ValueError, AttributeError, TypeError):
+        # Unknown placeholder, use the pattern as a literal prefix
+        name = f"{pattern} {number}"
+    return name.strip() or f"Image {number}"
+
+
+def load_project_settings(project_path):
+    """Return the settings of a project directory, with defaults for missing values"""
+    settings = dict(DEFAULT_PROJECT_SETTINGS)
+    path = os.path.join(project_path, PROJECT_SETTINGS_FILENAME)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                settings.update(json.load(f))
+        except Exception as e:
+            Logger.error(f"ProjectRepository: Error reading {path}: {str(e)}")
+    if settings["copy_mode"] not in COPY_MODES:
+        settings["copy_mode"] = DEFAULT_COPY_MODE
+    return settings
+
+
+class ProjectRepository:
+    """
+    Shared access point for a project's albums and image metadata.
+
+    One instance is owned by PictureVotingApp for the current project. Parsed JSON is
+    cached in memory and validated against the file's (mtime, size), so moving between
+    screens does not re-read anything that did not change. Writes made through the
+    repository update the cache directly.
+
+    Thumbnails are generated by the app's DerivativeWorker when one is given,
+    otherwise synchronously.
+    """
+
+    def __init__(self, project_path, worker=None, device_id=None):
+        self.project_path = project_path
+        self.worker = worker
+        # Identifies this installation in the ballots it records
+        self.device_id = device_id
+        self.images_dir = os.path.join(project_path, "images")
+        self.images_meta_dir = os.path.join(project_path, "images_metadata")
+        self.albums_meta_dir = os.path.join(project_path, "albums_metadata")
+
+        # path -> (stamp, parsed data)
+        self._cache = {}
+        self._lock = threading.RLock()
+
+        # Perceptual hashes and exact-content lookup of the project's images, built on first use
+        self._hash_index = None
+        self._content_index = None
+        # (path, size, mtime) -> dhash of files hashed while they were queued for ingest
+        self._source_hashes = {}
+        # Ballot ledger, opened on first use
+        self._ballots = None
+
+    @property
+    def index(self):
+        """The SQLite index of this project"""
+        return get_project_index(self.project_path)
+
+    def close(self):
+        """Drop cached data, close the ballot ledger and the project index"""
+        self.invalidate()
+        self._hash_index = None
+        self._content_index = None
+        with self._lock:
+            ballots, self._ballots = self._ballots, None
+        if ballots:
+            ballots.close()
+        close_project_index(self.project_path)
+
+    def ensure_structure(self):
+        """Create the project directories and the default album if they are missing"""
+        for directory in (self.images_dir, self.images_meta_dir, self.albums_meta_dir):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+                Logger.info(f"ProjectRepository: Created directory: {directory}")
+
+        if not os.path.exists(self.album_path(DEFAULT_ALBUM_NAME)):
+            self.create_album(DEFAULT_ALBUM_NAME, DEFAULT_ALBUM_DESCRIPTION)
+
+    def invalidate(self, path=None):
+        """Forget one cached file, or the whole cache when no path is given"""
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(path, None)
+
+    # ----- Paths -----
+
+    def album_path(self, album_name):
+        """Return the path of an album's metadata snapshot"""
+        return os.path.join(self.albums_meta_dir, album_filename(album_name))
+
+    def image_path(self, filename):
+        """Return the path of an image file in the project"""
+        return os.path.join(self.images_dir, filename)
+
+    def thumbnails_dir(self):
+        """Return the directory holding all thumbnail tiers"""
+        return os.path.join(self.project_path, THUMBNAILS_DIRNAME)
+
+    def thumbnail_source(self, filename, pixel_size, on_ready=None):
+        """
+        Return the thumbnail (or original) to display an image at pixel_size
+
+        If the matching tier is missing it is generated with visible priority and
+        on_ready(path) is called on the main thread once it exists.
+        """
+        source = best_thumbnail(self.project_path, filename, pixel_size)
+        wanted = thumbnail_path(self.project_path, filename, select_tier(pixel_size))
+        if source != wanted and on_ready is not None:
+            self.request_thumbnails(
+                filename,
+                priority=PRIORITY_VISIBLE,
+                callback=lambda key, result, error: None if error else on_ready(
+                    best_thumbnail(self.project_path, filename, pixel_size))
+            )
+        return source
+
+    def request_thumbnails(self, filename, sizes=THUMBNAIL_SIZES, priority=PRIORITY_BACKFILL, callback=None):
+        """Generate thumbnail tiers of a project image in the background"""
+        key = ("thumbnails", self.project_path, filename)
+        args = (self.image_path(filename), self.project_path, filename, tuple(sizes))
+        if self.worker:
+            self.worker.submit(key, generate_thumbnails, args, priority, callback)
+            return
+
+        try:
+            result, error = generate_thumbnails(*args), None
+        except Exception as e:
+            result, error = None, e
+            Logger.error(f"ProjectRepository: Error generating thumbnails for {filename}: {str(e)}")
+        if callback:
+            callback(key, result, error)
+
+    def stage_thumbnails(self, source_path, priority=PRIORITY_INGEST, callback=None):
+        """Generate thumbnails of a file queued for ingest before it reaches the project"""
+        if self.worker:
+            self.worker.submit(self._staging_key(source_path), generate_staged_thumbnails,
+                               (source_path, self.project_path), priority, callback)
+
+    def staged_thumbnail(self, source_path, size):
+        """Return the staged thumbnail of a queued file, or None if it does not exist yet"""
+        try:
+            path = staged_thumbnail_path(self.project_path, source_path, size)
+        except OSError:
+            return None
+        return path if os.path.exists(path) else None
+
+    def discard_staged_thumbnails(self, source_paths):
+        """Delete staged thumbnails of queued files that were skipped or dropped from the queue"""
+        for source_path in source_paths:
+            staging_key = self._staging_key(source_path)
+            if self.worker and self.worker.is_pending(staging_key):
+                # Staging is still running, delete its output once it is done
+                self.worker.submit(staging_key, generate_staged_thumbnails, (source_path, self.project_path),
+                                   PRIORITY_INGEST,
+                                   callback=lambda key, result, error, path=source_path:
+                                   discard_staged_thumbnails(self.project_path, path))
+            else:
+                discard_staged_thumbnails(self.project_path, source_path)
+
+    def sweep_staged_thumbnails(self):
+        """Delete staged thumbnails that the project's unfinished batch session does not need"""
+        try:
+            session = BatchSession.load(self.project_path)
+        except Exception as e:
+            # Without the session it is unknown which staged thumbnails a resume needs
+            Logger.error(f"ProjectRepository: Not sweeping staged thumbnails, error loading batch session: {str(e)}")
+            return
+        removed = sweep_staged_thumbnails(self.project_path, session.unfinished_paths() if session else ())
+        if removed:
+            Logger.info(f"ProjectRepository: Removed {removed} stale staged thumbnail directories")
+
+    def settings_path(self):
+        """Return the path of the project's settings file"""
+        return os.path.join(self.project_path, PROJECT_SETTINGS_FILENAME)
+
+    def image_meta_path(self, filename):
+        """Return the path of an image's metadata file"""
+        return os.path.join(self.images_meta_dir, f"{os.path.splitext(filename)[0]}.json")
+
+    # ----- Settings -----
+
+    def get_settings(self):
+        """Return the project's settings, with defaults for missing values"""
+        path = self.settings_path()
+        settings = self._cached(path, (path,), lambda: load_project_settings(self.project_path))
+        return settings if settings is not None else dict(DEFAULT_PROJECT_SETTINGS)
+
+    def update_settings(self, **values):
+        """Change project settings and save them"""
+        settings = dict(self.get_settings())
+        settings.update(values)
+        with self._lock:
+            self._write_json(self.settings_path(), settings)
+        return settings
+
+    @property
+    def copy_mode(self):
+        """How files are copied into the project, one of the file_copy COPY_MODES"""
+        return self.get_settings()["copy_mode"]
+
+    # ----- Albums -----
+
+    def list_albums(self):
+        """Return the display names of all albums in the project"""
+        return self._cached(self.albums_meta_dir, (self.albums_meta_dir,), self._scan_albums) or []
+
+    def get_album(self, album_name):
+        """Return an album's metadata (snapshot plus journal) or None if it does not exist"""
+        path = self.album_path(album_name)
+        return self._cached(path, (path, journal_path(path)), lambda: load_album(path))
+
+    def get_album_page(self, album_name, offset=0, limit=None):
+        """Return (filename, display_name) tuples for one page of an album"""
+        return self.index.get_album_page(album_name, offset, limit)
+
+    def create_album(self, album_name, description=""):
+        """Create a new, empty album and return its metadata"""
+        path = self.album_path(album_name)
+        album_data = new_album_data(album_name, description)
+        with self._lock:
+            self._write_json(path, album_data)
+            self.invalidate(self.albums_meta_dir)
+        try:
+            self.index.add_album(album_name_from_filename(os.path.basename(path)), album_data)
+        except Exception as e:
+            Logger.error(f"ProjectRepository: Error updating project index: {str(e)}")
+        Logger.info(f"ProjectRepository: Created album {album_name}")
+        return album_data
+
+    # ----- Images -----
+
+    def get_image(self, filename):
+        """Return an image's metadata or None if it has no metadata file"""
+        path = self.image_meta_path(filename)
+        return self._cached(path, (path,), lambda: self._read_json(path))
+
+    def get_images(self, filenames):
+        """Return a {filename: metadata} dictionary for every filename that has metadata"""
+        images = {}
+        for filename in filenames:
+            metadata = self.get_image(filename)
+            if metadata is not None:
+                images[filename] = metadata
+        return images
+
+    def find_by_tags(self, query, album_name=None):
+        """Return (filename, display_name) tuples of the images matching a tag filter, see parse_tag_query"""
+        groups, excluded = parse_tag_query(query)
+        return self.index.query_tags(groups, excluded, album_name)
+
+    def search_images(self, text):
+        """Return (filename, display_name) tuples of the images matching a search text, best match first"""
+        return self.index.search(text)
+
+    def tag_facets(self, album_name=None, limit=None):
+        """Return (tag, image count) tuples, most used tags first"""
+        return self.index.tag_facets(album_name, limit)
+
+    # ----- Duplicates -----
+
+    def hash_index(self):
+        """Return the perceptual hash index of the project's images"""
+        with self._lock:
+            if self._hash_index is not None:
+                return self._hash_index
+
+        # Built without holding the lock, loading a large project takes a moment
+        hash_index = HashIndex()
+        for filename, value in self.index.get_hashes():
+            hash_index.add(value, filename)
+        with self._lock:
+            if self._hash_index is None:
+                self._hash_index = hash_index
+            return self._hash_index
+
+    def content_index(self):
+        """Return the exact-content index of the project's image files"""
+        with self._lock:
+            if self._content_index is not None:
+                return self._content_index
+
+        content_index = ContentIndex(self.index, self.images_dir)
+        with self._lock:
+            if self._content_index is None:
+                self._content_index = content_index
+            return self._content_index
+
+    def find_near_duplicates(self, dhash, max_distance=DUPLICATE_THRESHOLD):
+        """Return (distance, filename) tuples of project images that look like dhash, closest first"""
+        hash_index = self.hash_index()
+        with self._lock:
+            return hash_index.find(dhash, max_distance)
+
+    def remember_source_hashes(self, results):
+        """Keep (path, dhash) results of queued files, so ingesting them does not hash them again"""
+        with self._lock:
+            for path, value in results:
+                key = self._source_key(path) if value else None
+                if key:
+                    self._source_hashes[key] = value
+
+    def request_hashes(self, filenames, priority=PRIORITY_BACKFILL, callback=None):
+        """Compute and store the perceptual hashes of project images in the background"""
+        key = ("dhash", self.project_path, filenames[0], len(filenames))
+        args = ([self.image_path(filename) for filename in filenames],)
+
+        def on_hashed(key, result, error):
+            if result:
+                self.store_hashes([(os.path.basename(path), value) for path, value in result])
+            if callback:
+                callback(key, result, error)
+
+        self._run_job(key, hash_images, args, priority, on_hashed)
+
+    def store_hashes(self, hashes):
+        """Record (filename, dhash) tuples in the metadata files, the project index and the hash index"""
+        hashes = [(filename, value) for filename, value in hashes if value]
+        if not hashes:
+            return
+
+        with self._lock:
+            for filename, value in hashes:
+                if self._merge_metadata(filename, dhash=value) and self._hash_index is not None:
+                    self._hash_index.add(value, filename)
+
+        try:
+            self.index.set_hashes(hashes)
+        except Exception as e:
+            Logger.error(f"ProjectRepository: Error updating project index: {str(e)}")
+
+    def missing_hashes(self):
+        """Return the filenames of project images without a perceptual hash"""
+        return self.index.missing_hashes()
+
+    def duplicate_report(self, max_distance=DUPLICATE_THRESHOLD):
+        """Group the project's images into lists of near-duplicates, largest group first"""
+        return duplicate_groups(self.index.get_hashes(), max_distance)
+
+    # ----- Camera metadata -----
+
+    def request_exif(self, filenames, priority=PRIORITY_BACKFILL, callback=None):
+        """Read and store the EXIF metadata of project images in the background"""
+        key = ("exif", self.project_path, filenames[0], len(filenames))
+        args = ([self.image_path(filename) for filename in filenames],)
+
+        def on_read(key, result, error):
+            if result:
+                self.store_exif([(os.path.basename(path), exif) for path, exif in result])
+            if callback:
+                callback(key, result, error)
+
+        self._run_job(key, read_exif_batch, args, priority, on_read)
+
+    def store_exif(self, results):
+        """Record (filename, exif dict) tuples in the metadata files and the capture-date index"""
+        stored = []
+        with self._lock:
+            for filename, exif in results:
+                if self._merge_metadata(filename, exif=exif):
+                    stored.append((filename, exif.get("capture_date")))
+
+        try:
+            self.index.set_capture_dates(stored)
+        except Exception as e:
+            Logger.error(f"ProjectRepository: Error updating project index: {str(e)}")
+
+    def missing_exif(self):
+        """Return the filenames of project images whose EXIF metadata was not read yet"""
+        return self.index.missing_exif()
+
+    def capture_months(self):
+        """Return (month, image count) tuples of the timeline, e.g. ("2024-05", 312), oldest first"""
+        return self.index.capture_months()
+
+    def capture_days(self, month):
+        """Return (day, image count) tuples of one month, e.g. ("2024-05-17", 40)"""
+        return self.index.capture_days(month)
+
+    def get_captured(self, period):
+        """Return (filename, display_name) tuples of the images captured in a month or on a day"""
+        return self.index.get_captured(period)
+
+    # ----- Voting -----
+
+    def ballots(self):
+        """Return the ballot ledger of the project"""
+        with self._lock:
+            if self._ballots is None:
+                self._ballots = BallotLedger(self.project_path, self.device_id)
+            return self._ballots
+
+    def cast_vote(self, filename, album_name=None, value=1):
+        """Record a vote for an image, returns the image's new tally"""
+        ballots = self.ballots()
+        ballots.cast(filename, album_name, value)
+        return ballots.tally(filename)
+
+    def cast_pair(self, winner, loser, album_name=None):
+        """Record that winner was preferred over loser in a head-to-head comparison"""
+        self.ballots().cast_pair(winner, loser, album_name)
+
+    def merge_ballots(self, paths):
+        """Merge the ballot ledgers of other voting devices into this project, see BallotLedger.merge"""
+        return self.ballots().merge(paths)
+
+    def pair_scheduler(self, filenames):
+        """Return a scheduler for head-to-head pairs of the given images"""
+        return PairScheduler(filenames, self.ballots().standings)
+
+    def leaderboard(self, count=None):
+        """Return (filename, display_name, rating, wins, comparisons) tuples, best rated first"""
+        ranked = self.ballots().leaderboard(count)
+        names = self.index.get_display_names(filename for filename, _, _, _ in ranked)
+        return [(filename, names[filename], rating, wins, games) for filename, rating, wins, games in ranked]
+
+    def add_image(self, source_path, image_name, description="", tags=(), album_name=DEFAULT_ALBUM_NAME):
+        """
+        Copy an image into the project, write its metadata and add it to an album
+
+        Args:
+            source_path (str): Image file to ingest
+            image_name (str): Display name chosen by the user
+            description (str): Image description
+            tags (iterable): Tag strings
+            album_name (str): Album the image is added to
+
+        Returns:
+            dict: The metadata written for the new image
+        """
+        self.ensure_structure()
+
+        new_filename = self._new_filename(source_path, image_name)
+
+        # Copy the file to the images directory
+        dest_path = self.image_path(new_filename)
+        method = copy_file(source_path, dest_path, self.copy_mode)
+        Logger.info(f"ProjectRepository: Copied file to {dest_path} ({method})")
+
+        metadata = self._finish_ingest(source_path, new_filename, image_name, description, tags, album_name)
+
+        with self._lock:
+            # Record the new album member in the append-only album journal
+            album_path = self.album_path(album_name)
+            append_event(album_path, ACTION_ADD, new_filename)
+            self.invalidate(album_path)
+
+        # Keep the project index in sync with the JSON files
+        try:
+            self.index.add_image(metadata, album_name)
+        except Exception as e:
+            Logger.error(f"ProjectRepository: Error updating project index: {str(e)}")
+        self._after_ingest([metadata])
+
+        Logger.info(f"ProjectRepository: Added {new_filename} to album {album_name}")
+        return metadata
+
+    def add_images(self, source_paths, name_pattern=DEFAULT_NAME_PATTERN, description="", tags=(),
+                   album_name=DEFAULT_ALBUM_NAME, progress=None, cancelled=None):
+        """
+        Ingest many files with shared metadata, without any per-image interaction
+
+        Copies run on a small thread pool ahead of the metadata writer, so reading and
+        writing file data overlaps with writing metadata. The album journal and the
+        project index are updated once, at the end, for all ingested images.
+
+        Args:
+            source_paths (list): Image files to ingest, in album order
+            name_pattern (str): Display name pattern, see format_image_name
+            description (str): Description shared by all images
+            tags (iterable): Tags shared by all images
+            album_name (str): Album the images are added to
+            progress (callable): Optional progress(done, total) callback, called from this thread
+            cancelled (threading.Event): Optional event that stops the ingest, copies already in
+                flight are still committed
+
+        Returns:
+            tuple: (list of metadata of the ingested images, list of (path, error) failures)
+        """
+        self.ensure_structure()
+        copy_mode = self.copy_mode
+        tags = list(tags)
+        total = len(source_paths)
+        ingested = []
+        failures = []
+
+        # Filenames are reserved up front so parallel copies never collide
+        reserved = set()
+        jobs = []
+        for number, source_path in enumerate(source_paths, 1):
+            image_name = format_image_name(name_pattern, source_path, number)
+            filename = self._new_filename(source_path, image_name, reserved)
+            reserved.add(filename)
+            jobs.append((source_path, image_name, filename))
+
+        with ThreadPoolExecutor(max_workers=BULK_COPY_WORKERS) as pool:
+            pending = deque()
+            next_job = 0
+            for done in range(1, total + 1):
+                # Keep a bounded window of copies in flight
+                while next_job < total and len(pending) < BULK_COPY_WINDOW and not (cancelled and cancelled.is_set()):
+                    source_path, image_name, filename = jobs[next_job]
+                    future = pool.submit(copy_file, source_path, self.image_path(filename), copy_mode)
+                    pending.append((future, jobs[next_job]))
+                    next_job += 1
+                if not pending:
+                    break
+
+                future, (source_path, image_name, filename) = pending.popleft()
+                try:
+                    future.result()
+                    ingested.append(self._finish_ingest(source_path, filename, image_name,
+                                                        description, tags, album_name))
+                except Exception as e:
+                    Logger.error(f"ProjectRepository: Error ingesting {source_path}: {str(e)}")
+                    failures.append((source_path, str(e)))
+
+                if progress:
+                    progress(done, total)
+
+        # Single album and index commit for the whole batch
+        if ingested:
+            with self._lock:
+                album_path = self.album_path(album_name)
+                append_events(album_path, [(ACTION_ADD, metadata["filename"]) for metadata in ingested])
+                self.invalidate(album_path)
+            try:
+                self.index.add_images(ingested, album_name)
+            except Exception as e:
+                Logger.error(f"ProjectRepository: Error updating project index: {str(e)}")
+            self._after_ingest(ingested)
+
+        Logger.info(f"ProjectRepository: Bulk ingested {len(ingested)} of {total} images into {album_name}")
+        return ingested, failures
+
+    def _new_filename(self, source_path, image_name, reserved=()):
+        """Return an unused project filename for an image being ingested"""
+        # Using timestamp for unique filename
+        timestamp = int(time.time())
+        file_ext = os.path.splitext(source_path)[1]
+        new_filename = f"{image_name}_{timestamp}{file_ext}"
+
+        # Several images with the same name in the same second get a counter
+        counter = 1
+        while new_filename in reserved or os.path.exists(self.image_path(new_filename)):
+            counter += 1
+            new_filename = f"{image_name}_{timestamp}_{counter}{file_ext}"
+        return new_filename
+
+    def _finish_ingest(self, source_path, new_filename, image_name, description, tags, album_name):
+        """Schedule thumbnails and write the metadata file of a copied image"""
+        # Use thumbnails staged while the image was queued, or generate them in the background
+        self._schedule_thumbnails(source_path, new_filename)
+
+        metadata = {
+            "filename": new_filename,
+            "display_name": image_name,
+            "original_filename": os.path.basename(source_path),
+            "upload_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "description": description,
+            "tags": list(tags),
+            "album": album_name
+        }
+        # Reuse the perceptual hash computed while the file was queued
+        with self._lock:
+            dhash = self._source_hashes.pop(self._source_key(source_path), None)
+        if dhash:
+            metadata["dhash"] = dhash
+
+        with self._lock:
+            self._write_json(self.image_meta_path(new_filename), metadata)
+        return metadata
+
+    def _source_key(self, path):
+        """Identity of a file outside the project, changes when the file is modified"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+    def _after_ingest(self, ingested):
+        """Background work for freshly ingested images, run once they are in the project index"""
+        self._update_duplicate_indexes(ingested)
+
+        # Camera metadata is read in the derivative worker, not on the ingest path
+        filenames = [metadata["filename"] for metadata in ingested]
+        for start in range(0, len(filenames), EXIF_CHUNK_SIZE):
+            self.request_exif(filenames[start:start + EXIF_CHUNK_SIZE], PRIORITY_INGEST)
+
+    def _update_duplicate_indexes(self, ingested):
+        """Add freshly ingested images to the duplicate indexes, hashing the ones without a dhash"""
+        missing = []
+        with self._lock:
+            content_index = self._content_index
+        if content_index is not None:
+            for metadata in ingested:
+                try:
+                    content_index.add(metadata["filename"], os.path.getsize(self.image_path(metadata["filename"])))
+                except OSError:
+                    pass
+
+        with self._lock:
+            for metadata in ingested:
+                if metadata.get("dhash"):
+                    if self._hash_index is not None:
+                        self._hash_index.add(metadata["dhash"], metadata["filename"])
+                else:
+                    missing.append(metadata["filename"])
+        for start in range(0, len(missing), HASH_CHUNK_SIZE):
+            self.request_hashes(missing[start:start + HASH_CHUNK_SIZE], PRIORITY_INGEST)
+
+    def _merge_metadata(self, filename, **fields):
+        """Add fields to an image's metadata file (caller holds the lock), False if it has none"""
+        metadata = self.get_image(filename)
+        if metadata is None:
+            return False
+        self._write_json(self.image_meta_path(filename), dict(metadata, **fields))
+        return True
+
+    def _run_job(self, key, func, args, priority, callback):
+        """Run a derivative job in the worker, or synchronously when there is none"""
+        if self.worker:
+            self.worker.submit(key, func, args, priority, callback)
+            return
+
+        try:
+            result, error = func(*args), None
+        except Exception as e:
+            result, error = None, e
+            Logger.error(f"ProjectRepository: Job {key[0]} failed: {str(e)}")
+        callback(key, result, error)
+
+    def _staging_key(self, source_path):
+        """Derivative worker key of a staging job"""
+        return ("staged_thumbnails", self.project_path, os.path.abspath(source_path))
+
+    def _schedule_thumbnails(self, source_path, filename):
+        """Adopt staged thumbnails of an ingested file and generate any missing tiers"""
+        staging_key = self._staging_key(source_path)
+        if self.worker and self.worker.is_pending(staging_key):
+            # Staging is still running, adopt its output once it is done
+            self.worker.submit(staging_key, generate_staged_thumbnails, (source_path, self.project_path),
+                               PRIORITY_INGEST,
+                               callback=lambda key, result, error: self._adopt_thumbnails(source_path, filename))
+            return
+        self._adopt_thumbnails(source_path, filename)
+
+    def _adopt_thumbnails(self, source_path, filename):
+        """Move staged tiers into place and request the ones that were not staged"""
+        try:
+            missing = adopt_staged_thumbnails(self.project_path, source_path, filename)
+        except Exception as e:
+            Logger.error(f"ProjectRepository: Error adopting staged thumbnails for {filename}: {str(e)}")
+            missing = list(THUMBNAIL_SIZES)
+        if missing:
+            self.request_thumbnails(filename, missing, PRIORITY_INGEST)
+
+    # ----- Cache helpers -----
+
+    def _cached(self, key, stamp_paths, loader):
+        """Return cached data for key while none of stamp_paths changed, otherwise reload it"""
+        stamp = tuple(self._stamp(path) for path in stamp_paths)
+        if stamp[0] is None:
+            return None
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+
+        try:
+            data = loader()
+        except Exception as e:
+            Logger.error(f"ProjectRepository: Error loading {key}: {str(e)}")
+            return None
+
+        with self._lock:
+            self._cache[key] = (stamp, data)
+        return data
+
+    def _stamp(self, path):
+        """Return (mtime_ns, size) of a path or None if it does not exist"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _scan_albums(self):
+        """List album names from the albums metadata directory"""
+        albums = []
+        for filename in sorted(os.listdir(self.albums_meta_dir)):
+            if filename.lower().endswith('.json'):
+                albums.append(album_name_from_filename(filename))
+        return albums
+
+    def _read_json(self, path):
+        """Parse a JSON file"""
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_json(self, path, data):
+        """Write a JSON file and cache what was written"""
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+        self._cache[path] = ((self._stamp(path),), data)
@@ -0,0 +1,136 @@
+from kivy.loader import Loader
+from kivy.logger import Logger
+from collections import OrderedDict
+import os
+
+
+# Tier used for full-size originals, e.g. in the image viewer
+TIER_ORIGINAL = "original"
+
+
+class TextureCache:
+    """
+    App-wide LRU cache of decoded image textures.
+
+    Entries are keyed by (path, mtime, size tier), so an edited file is never served
+    from a stale entry. Images are decoded off the main thread by Kivy's Loader and
+    the least recently used textures are dropped once the cache holds more than
+    budget_bytes (counted as width * height * 4 bytes per texture).
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()  # key -> texture, least recently used first
+        self._sizes = {}               # key -> bytes
+        self._total_bytes = 0
+        self._pending = {}             # key -> [callbacks] while the image is decoding
+
+    def request(self, path, callback, tier=TIER_ORIGINAL):
+        """
+        Get the texture of an image, decoding it in the background if needed
+
+        Args:
+            path (str): Image file
+            callback (callable): callback(texture) run once the texture is available;
+                called immediately on a cache hit
+            tier: Size tier of the file, part of the cache key
+
+        Returns:
+            Texture or None: The texture if it was already cached
+        """
+        key = self._key(path, tier)
+        if key is None:
+            return None
+
+        texture = self._entries.get(key)
+        if texture is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            callback(texture)
+            return texture
+
+        self.misses += 1
+        if key in self._pending:
+            self._pending[key].append(callback)
+            return None
+
+        self._pending[key] = [callback]
+        proxy = Loader.image(path)
+        if proxy.loaded:
+            self._on_loaded(key, proxy)
+        else:
+            proxy.bind(on_load=lambda instance: self._on_loaded(key, instance),
+                       on_error=lambda instance, *args: self._on_error(key, instance))
+        return None
+
+    def get(self, path, tier=TIER_ORIGINAL):
+        """Return a cached texture or None, without decoding anything"""
+        key = self._key(path, tier)
+        texture = self._entries.get(key) if key else None
+        if texture is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return texture
+
+    def set_budget(self, budget_bytes):
+        """Change the memory budget, evicting entries if the cache is now over it"""
+        self.budget_bytes = budget_bytes
+        self._evict()
+
+    def clear(self):
+        """Drop every cached texture"""
+        self._entries.clear()
+        self._sizes.clear()
+        self._total_bytes = 0
+
+    def stats(self):
+        """Return a dictionary with the cache counters"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _key(self, path, tier):
+        """Cache key of an image file, None if it does not exist"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        return path, mtime, tier
+
+    def _on_loaded(self, key, proxy):
+        """Store a freshly decoded texture and notify everyone waiting for it"""
+        texture = proxy.texture
+        callbacks = self._pending.pop(key, [])
+        if texture is None:
+            return
+
+        if key not in self._entries:
+            size = texture.width * texture.height * 4
+            self._entries[key] = texture
+            self._sizes[key] = size
+            self._total_bytes += size
+            self._evict()
+
+        for callback in callbacks:
+            callback(texture)
+
+    def _on_error(self, key, proxy):
+        """Forget a failed decode so it can be retried later"""
+        Logger.warning(f"TextureCache: Could not load {key[0]}")
+        self._pending.pop(key, None)
+
+    def _evict(self):
+        """Drop least recently used textures until the cache fits its budget"""
+        while self._total_bytes > self.budget_bytes and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(key)
+            self.evictions += 1
@@ -0,0 +1,250 @@
+from PIL import Image, ImageOps
+import hashlib
+import os
+import shutil
+import sys
+import time
+
+
+# Thumbnails live in <project>/thumbnails/<size>/<image stem>.jpg. Nothing in this
+# module imports Kivy, so it can also run inside worker processes.
+THUMBNAILS_DIRNAME = "thumbnails"
+
+# Longest edge, in pixels, of each thumbnail tier
+THUMBNAIL_SIZES = (128, 256, 1024)
+
+THUMBNAIL_QUALITY = 85
+
+# Thumbnails of files that are queued for ingest but not part of the project yet
+STAGING_DIRNAME = ".staging"
+
+# Staging directories touched more recently than this (seconds) are never swept,
+# a staging job may still be writing to them
+STAGING_SWEEP_AGE = 600
+
+
+def thumbnail_path(project_path, filename, size):
+    """Return the path of one thumbnail tier of a project image"""
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(project_path, THUMBNAILS_DIRNAME, str(size), f"{stem}.jpg")
+
+
+def select_tier(pixel_size):
+    """Return the smallest thumbnail tier that covers pixel_size without upscaling"""
+    for size in THUMBNAIL_SIZES:
+        if size >= pixel_size:
+            return size
+    return THUMBNAIL_SIZES[-1]
+
+
+def best_thumbnail(project_path, filename, pixel_size):
+    """
+    Return the best existing image file to display a project image at pixel_size
+
+    Falls back to a larger tier, and finally to the original in images/, when the
+    matching thumbnail has not been generated yet.
+    """
+    tier = select_tier(pixel_size)
+    for size in THUMBNAIL_SIZES:
+        if size < tier:
+            continue
+        path = thumbnail_path(project_path, filename, size)
+        if os.path.exists(path):
+            return path
+    return os.path.join(project_path, "images", filename)
+
+
+def missing_tiers(project_path, filename, sizes=THUMBNAIL_SIZES):
+    """Return the thumbnail tiers of an image that do not exist yet"""
+    return [size for size in sizes if not os.path.exists(thumbnail_path(project_path, filename, size))]
+
+
+def generate_thumbnails(source_path, project_path, filename, sizes=THUMBNAIL_SIZES):
+    """
+    Generate thumbnail tiers of one image
+
+    Args:
+        source_path (str): Image to read pixels from
+        project_path (str): Project the thumbnails belong to
+        filename (str): Name of the image inside the project's images/ directory
+        sizes (iterable): Tiers to generate
+
+    Returns:
+        list: Paths of the thumbnails that were written
+    """
+    return _write_tiers(source_path, sizes, lambda size: thumbnail_path(project_path, filename, size))
+
+
+def staging_dir(project_path, source_path):
+    """Return the staging directory for a file that is not in the project yet"""
+    stat = os.stat(source_path)
+    key = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(project_path, THUMBNAILS_DIRNAME, STAGING_DIRNAME, digest)
+
+
+def staged_thumbnail_path(project_path, source_path, size):
+    """Return the path of one staged thumbnail tier of a file queued for ingest"""
+    return os.path.join(staging_dir(project_path, source_path), f"{size}.jpg")
+
+
+def generate_staged_thumbnails(source_path, project_path, sizes=THUMBNAIL_SIZES):
+    """
+    Generate thumbnails of a queued file ahead of its ingest
+
+    The tiers are written to a staging directory and moved into place by
+    adopt_staged_thumbnails once the file has its final name in the project.
+    """
+    directory = staging_dir(project_path, source_path)
+    return _write_tiers(source_path, sizes, lambda size: os.path.join(directory, f"{size}.jpg"))
+
+
+def adopt_staged_thumbnails(project_path, source_path, filename):
+    """
+    Move staged thumbnails of source_path into place for a newly ingested image
+
+    Returns:
+        list: Tiers that were not staged and still have to be generated
+    """
+    try:
+        directory = staging_dir(project_path, source_path)
+    except OSError:
+        return list(THUMBNAIL_SIZES)
+
+    missing = []
+    for size in THUMBNAIL_SIZES:
+        staged = os.path.join(directory, f"{size}.jpg")
+        if os.path.exists(staged):
+            path = thumbnail_path(project_path, filename, size)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staged, path)
+        else:
+            missing.append(size)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    return missing
+
+
+def discard_staged_thumbnails(project_path, source_path):
+    """Delete the staged thumbnails of a queued file that will not be ingested"""
+    try:
+        directory = staging_dir(project_path, source_path)
+    except OSError:
+        # The file is gone or changed, sweep_staged_thumbnails removes what is left
+        return
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def sweep_staged_thumbnails(project_path, keep=(), min_age=STAGING_SWEEP_AGE):
+    """
+    Delete staging directories left behind by abandoned or interrupted batches
+
+    Args:
+        project_path (str): Project to sweep
+        keep (iterable): Source paths whose staged thumbnails are still wanted
+        min_age (float): Leave directories modified in the last min_age seconds alone
+
+    Returns:
+        int: Number of staging directories removed
+    """
+    kept = set()
+    for source_path in keep:
+        try:
+            kept.add(os.path.basename(staging_dir(project_path, source_path)))
+        except OSError:
+            continue
+
+    try:
+        entries = list(os.scandir(os.path.join(project_path, THUMBNAILS_DIRNAME, STAGING_DIRNAME)))
+    except FileNotFoundError:
+        return 0
+
+    cutoff = time.time() - min_age
+    removed = 0
+    for entry in entries:
+        try:
+            if entry.name in kept or entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                continue
+        except OSError:
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.remove(entry.path)
+        removed += 1
+    return removed
+
+
+def _write_tiers(source_path, sizes, destination):
+    """Decode an image once and write one JPEG per tier to destination(size)"""
+    sizes = sorted(sizes, reverse=True)
+    if not sizes:
+        return []
+
+    written = []
+    with Image.open(source_path) as img:
+        # Let the JPEG decoder downscale while decoding - much cheaper than a full decode
+        img.draft('RGB', (sizes[0], sizes[0]))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        # Largest tier first, each smaller tier is resized from the previous one
+        for size in sizes:
+            img.thumbnail((size, size), Image.LANCZOS)
+
+            path = destination(size)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            img.save(tmp_path, "JPEG", quality=THUMBNAIL_QUALITY)
+            os.replace(tmp_path, path)
+            written.append(path)
+
+    return written
+
+
+def backfill_thumbnails(project_path, progress=None):
+    """
+    Generate all missing thumbnails of a project
+
+    Args:
+        project_path (str): Project directory
+        progress (callable): Optional progress(done, total) callback
+
+    Returns:
+        tuple: (number of images processed, list of (filename, error) failures)
+    """
+    images_dir = os.path.join(project_path, "images")
+    if not os.path.isdir(images_dir):
+        return 0, []
+
+    with os.scandir(images_dir) as entries:
+        filenames = [entry.name for entry in entries if entry.is_file()]
+
+    processed = 0
+    failures = []
+    for done, filename in enumerate(filenames, 1):
+        missing = missing_tiers(project_path, filename)
+        if missing:
+            try:
+                generate_thumbnails(os.path.join(images_dir, filename), project_path, filename, missing)
+                processed += 1
+            except Exception as e:
+                failures.append((filename, str(e)))
+        if progress:
+            progress(done, len(filenames))
+
+    return processed, failures
+
+
+# Backfill an existing project: python -m components.core.thumbnails.thumbnails data/projects/<project>
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print("Usage: python -m components.core.thumbnails.thumbnails <project_path>")
+        sys.exit(1)
+
+    count, errors = backfill_thumbnails(sys.argv[1])
+    print(f"Generated thumbnails for {count} images")
+    for name, error in errors:
+        print(f"Failed: {name}: {error}")
+    sys.exit(1 if errors else 0)
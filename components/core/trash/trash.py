@@ -0,0 +1,160 @@
+from kivy.clock import Clock
+from kivy.logger import Logger
+import os
+import threading
+import time
+import uuid
+
+
+# Trash area inside the app's data directory, on the same filesystem as the projects
+TRASH_DIRNAME = ".trash"
+
+# Aggregate purge progress is reported at most this often
+PROGRESS_INTERVAL = 0.5
+
+# Niceness of the purge thread, where the platform supports per-thread priorities
+PURGE_NICENESS = 19
+
+
+def trash_root(data_dir):
+    """Return the trash directory of the app's data directory"""
+    return os.path.join(data_dir, TRASH_DIRNAME)
+
+
+def move_to_trash(paths, data_dir, label="trash"):
+    """
+    Move files or directories into the trash with a rename
+
+    A rename within one filesystem is O(1) no matter how many files a directory
+    holds, so the paths disappear immediately; TrashPurger deletes them later.
+
+    Args:
+        paths (iterable): Files or directories to remove, missing paths are ignored
+        data_dir (str): App data directory holding the trash
+        label (str): Readable part of the trash entry name, e.g. the project name
+
+    Returns:
+        str: The trash entry the paths were moved into, or None if nothing was moved
+    """
+    entry = os.path.join(trash_root(data_dir), f"{int(time.time())}_{uuid.uuid4().hex[:8]}_{label}")
+    moved = False
+    for path in paths:
+        if not os.path.lexists(path):
+            continue
+        if not moved:
+            os.makedirs(entry)
+            moved = True
+        os.rename(path, os.path.join(entry, os.path.basename(path)))
+    return entry if moved else None
+
+
+class TrashPurger:
+    """
+    Deletes the contents of the trash on a low priority background thread.
+
+    purge() may be called any number of times, a single thread drains the trash.
+    on_progress(files, bytes, running) is called on the main thread with aggregate
+    totals, never per file.
+    """
+
+    def __init__(self, data_dir, on_progress=None):
+        self.data_dir = data_dir
+        self.on_progress = on_progress
+        self.files_removed = 0
+        self.bytes_removed = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wake = False
+        self._stopped = threading.Event()
+
+    def purge(self):
+        """Delete everything in the trash in the background"""
+        with self._lock:
+            self._wake = True
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop purging, whatever is left is purged on the next start"""
+        self._stopped.set()
+
+    def _run(self):
+        """Purge thread"""
+        self._lower_priority()
+        root = trash_root(self.data_dir)
+        last_report = 0
+
+        while not self._stopped.is_set():
+            with self._lock:
+                if not self._wake:
+                    self._thread = None
+                    break
+                self._wake = False
+
+            try:
+                entries = os.listdir(root) if os.path.isdir(root) else []
+            except OSError as e:
+                Logger.error(f"TrashPurger: Cannot list {root}: {str(e)}")
+                entries = []
+
+            for name in entries:
+                if self._stopped.is_set():
+                    return
+                last_report = self._purge_entry(os.path.join(root, name), last_report)
+
+        self._report(False)
+        if self.files_removed:
+            Logger.info(f"TrashPurger: Removed {self.files_removed} files "
+                        f"({self.bytes_removed / (1024 * 1024):.1f} MB) from the trash")
+
+    def _purge_entry(self, path, last_report):
+        """Delete one trash entry bottom-up, reporting progress in aggregate"""
+        try:
+            if not os.path.isdir(path) or os.path.islink(path):
+                self._remove_file(path)
+                return last_report
+
+            for root, dirs, files in os.walk(path, topdown=False):
+                for name in files:
+                    if self._stopped.is_set():
+                        return last_report
+                    self._remove_file(os.path.join(root, name))
+                    if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                        last_report = time.monotonic()
+                        self._report(True)
+                for name in dirs:
+                    dir_path = os.path.join(root, name)
+                    if os.path.islink(dir_path):
+                        os.remove(dir_path)
+                    else:
+                        os.rmdir(dir_path)
+            os.rmdir(path)
+        except OSError as e:
+            Logger.error(f"TrashPurger: Error purging {path}: {str(e)}")
+        return last_report
+
+    def _remove_file(self, path):
+        """Delete one file and count it"""
+        try:
+            size = os.lstat(path).st_size
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self.files_removed += 1
+        self.bytes_removed += size
+
+    def _report(self, running):
+        """Hand aggregate progress to the main thread"""
+        if self.on_progress:
+            files, size = self.files_removed, self.bytes_removed
+            Clock.schedule_once(lambda dt: self.on_progress(files, size, running), 0)
+
+    def _lower_priority(self):
+        """Let the purge yield the CPU to the UI"""
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PURGE_NICENESS)
+        except (AttributeError, OSError):
+            # Not supported on this platform, the purge just runs at normal priority
+            pass
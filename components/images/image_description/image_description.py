@@ -4,6 +4,7 @@ from kivy.app import App
 from kivy.logger import Logger
 from kivy.lang import Builder
 import os
+from components.core.batch_session.batch_session import STATUS_SKIPPED
 
 
 class ImgDescriptionScreen(Screen):
@@ -26,8 +27,13 @@ class ImgDescriptionScreen(Screen):
                 self.manager.current = 'upload'
             return
 
-        # Set the image preview
-        self.ids.image_preview.source = app.selected_file
+        # Set the image preview, usually already decoded by the batch prefetcher
+        self.ids.image_preview.texture = None
+        app.preview_prefetcher.request(
+            app.selected_file,
+            lambda texture, path=app.selected_file: self._show_preview(path, texture),
+            app.repository
+        )
 
         # Set the initial image name to be the original filename (if not already set)
         if not hasattr(app, 'image_name') or not app.image_name:
@@ -39,8 +45,7 @@ class ImgDescriptionScreen(Screen):
             self.ids.image_name_input.text = app.image_name
 
         # If description was previously entered, show it
-        if hasattr(app, 'image_description') and app.image_description:
-            self.ids.description_input.text = app.image_description
+        self.ids.description_input.text = app.image_description or ""
 
         # Clear any previous error message
         self.ids.error_message.text = ""
@@ -53,12 +58,8 @@ class ImgDescriptionScreen(Screen):
             if not app.batch_current:
                 app.batch_current = "1"
 
-            # Get the upload screen to access the image queue
-            upload_screen = self.manager.get_screen('upload')
-            total_images = len(upload_screen.image_queue) + int(app.batch_current)
-
             # Log this for debugging
-            Logger.info(f"ImgDescriptionScreen: Batch processing image {app.batch_current} of {total_images}")
+            Logger.info(f"ImgDescriptionScreen: Batch processing image {app.batch_current} of {app.batch_total}")
 
     def save_and_continue(self):
         """Save description and move to tags screen"""
@@ -76,12 +77,23 @@ class ImgDescriptionScreen(Screen):
         app.image_name = image_name
         app.image_description = self.ids.description_input.text
 
+        # Remember them in the batch session in case the batch is interrupted
+        if app.batch_processing:
+            session = self.manager.get_screen('upload').batch_session
+            if session:
+                session.update_current(name=app.image_name, description=app.image_description)
+
         # Navigate to tags screen
         if self.manager:
             self.manager.current = 'img_tags'
         else:
             Logger.error("ImgDescriptionScreen: No screen manager found")
 
+    def _show_preview(self, path, texture):
+        """Display a decoded preview unless another image was selected meanwhile"""
+        if path == App.get_running_app().selected_file:
+            self.ids.image_preview.texture = texture
+
     def go_back(self):
         """Return to upload screen"""
         Logger.info("ImgDescriptionScreen: go_back called")
@@ -166,6 +178,15 @@ class ImgDescriptionScreen(Screen):
         # Close popup
         popup.dismiss()
 
+        # Record the skip so a resumed session does not offer this image again
+        session = self.manager.get_screen('upload').batch_session
+        if session:
+            item = session.current_item()
+            session.finish_current(STATUS_SKIPPED)
+            # The skipped image will not be ingested, its staged preview is not needed
+            if item and app.repository:
+                app.repository.discard_staged_thumbnails([item["path"]])
+
         # Process next image
         app.process_next_batch_image()
 
@@ -177,9 +198,9 @@ class ImgDescriptionScreen(Screen):
         app.batch_processing = False
         app.batch_current = "0"
 
-        # Clear the image queue in the upload screen
+        # Drop the batch session, its file stays in the project so the batch can be resumed
         upload_screen = self.manager.get_screen('upload')
-        upload_screen.image_queue = []
+        upload_screen.batch_session = None
 
         # Close popup
         popup.dismiss()
@@ -0,0 +1,113 @@
+from kivy.uix.screenmanager import Screen
+from kivy.properties import StringProperty
+from kivy.clock import Clock
+from kivy.app import App
+from kivy.logger import Logger
+import threading
+
+
+# Seconds to wait after the last keystroke before searching
+SEARCH_DELAY = 0.2
+
+
+class ImageSearchScreen(Screen):
+    """Screen for finding images by name, original filename or description"""
+    query = StringProperty("")
+    status_text = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super(ImageSearchScreen, self).__init__(**kwargs)
+        Logger.info("ImageSearchScreen: Initialized")
+        self._search_event = None
+        # Incremented per search, so results of an outdated query are dropped
+        self._generation = 0
+
+    def on_enter(self):
+        """Focus the search box and refresh results, the project may have changed"""
+        if hasattr(self, 'ids') and 'search_input' in self.ids:
+            self.ids.search_input.focus = True
+        if self.query:
+            self.run_search()
+
+    def on_search_text(self, text):
+        """Search as the user types, once typing pauses"""
+        self.query = text
+        if self._search_event:
+            self._search_event.cancel()
+        self._search_event = Clock.schedule_once(lambda dt: self.run_search(), SEARCH_DELAY)
+
+    def run_search(self):
+        """Query the project's full-text index on a background thread"""
+        app = App.get_running_app()
+        if not hasattr(app, 'current_project_path') or not app.current_project_path:
+            Logger.warning("ImageSearchScreen: No project selected")
+            self._show_error("Please select a project first")
+            return
+
+        query = self.query.strip()
+        self._generation += 1
+        if not query:
+            self.status_text = ""
+            self.ids.images_grid.show_message("Type to search image names and descriptions")
+            return
+
+        generation = self._generation
+        repository = app.repository
+        self.status_text = "Searching..."
+
+        def search():
+            try:
+                results = repository.search_images(query)
+            except Exception as e:
+                Logger.error(f"ImageSearchScreen: Error searching for '{query}': {str(e)}")
+                error = str(e)
+                Clock.schedule_once(lambda dt: self._on_error(generation, error), 0)
+                return
+            Clock.schedule_once(lambda dt: self._on_results(generation, query, results), 0)
+
+        threading.Thread(target=search, daemon=True).start()
+
+    def _on_results(self, generation, query, results):
+        """Main thread: show the results unless a newer search was started"""
+        if generation != self._generation:
+            return
+
+        Logger.info(f"ImageSearchScreen: {len(results)} results for '{query}'")
+        self.status_text = f"{len(results)} results"
+        images_grid = self.ids.images_grid
+        if not results:
+            images_grid.show_message(f"No images match '{query}'")
+            return
+
+        app = App.get_running_app()
+        images_grid.source_resolver = lambda filename, on_ready: app.repository.thumbnail_source(
+            filename, images_grid.cell_width, on_ready=on_ready)
+        images_grid.set_images(results)
+
+    def _on_error(self, generation, message):
+        """Main thread: report a failed search"""
+        if generation == self._generation:
+            self.status_text = ""
+            self._show_error(f"Search failed: {message}")
+
+    def on_image_selected(self, instance, touch, image_filename):
+        """Open a search result in the image view screen"""
+        if instance.collide_point(*touch.pos):
+            Logger.info(f"ImageSearchScreen: Image selected: {image_filename}")
+            app = App.get_running_app()
+            app.current_image = image_filename
+
+            if self.manager:
+                # Image view returns here instead of to an album
+                self.manager.get_screen('image_view').back_screen = self.name
+                self.manager.current = 'image_view'
+            else:
+                Logger.error("ImageSearchScreen: No screen manager found")
+
+    def _show_error(self, message):
+        """Display an error message in the images grid area"""
+        if not hasattr(self, 'ids') or not hasattr(self.ids, 'images_grid'):
+            Logger.error(f"ImageSearchScreen: Cannot show error, images_grid not found: {message}")
+            return
+
+        self.ids.images_grid.show_message(message, error=True)
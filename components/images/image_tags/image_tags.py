@@ -4,10 +4,7 @@ from kivy.app import App
 from kivy.logger import Logger
 from kivy.lang import Builder
 import os
-import shutil
-import time
-from datetime import datetime
-import json
+from components.core.project_repository.project_repository import ProjectRepository, DEFAULT_ALBUM_NAME
 
 
 class ImgTagsScreen(Screen):
@@ -39,8 +36,13 @@ class ImgTagsScreen(Screen):
             Logger.error("ImgTagsScreen: 'image_preview' widget not found in ids dictionary")
             return
 
-        # Set the image preview
-        self.ids.image_preview.source = app.selected_file
+        # Set the image preview, usually already decoded by the batch prefetcher
+        self.ids.image_preview.texture = None
+        app.preview_prefetcher.request(
+            app.selected_file,
+            lambda texture, path=app.selected_file: self._show_preview(path, texture),
+            app.repository
+        )
 
         # Show the custom image name
         if 'image_name' in self.ids and hasattr(app, 'image_name') and app.image_name:
@@ -82,119 +84,45 @@ class ImgTagsScreen(Screen):
         if hasattr(self, 'ids') and 'tags_input' in self.ids:
             tags = self.ids.tags_input.text
 
-        # Get the current project directory
-        if hasattr(app, 'current_project_path') and app.current_project_path:
-            base_dir = app.current_project_path
-            Logger.info(f"ImgTagsScreen: Using project path: {base_dir}")
+        # Get the repository of the current project
+        if hasattr(app, 'repository') and app.repository:
+            repository = app.repository
+            Logger.info(f"ImgTagsScreen: Using project path: {repository.project_path}")
         else:
             # Use default uploads directory if no project is selected
             base_dir = os.path.join(os.path.expanduser('~'), 'vpic_app', 'uploads')
             Logger.warning(f"ImgTagsScreen: No project selected, using default path: {base_dir}")
-
-            # Ensure directory exists
-            if not os.path.exists(base_dir):
-                try:
-                    os.makedirs(base_dir)
-                    Logger.info(f"ImgTagsScreen: Created directory: {base_dir}")
-                except Exception as e:
-                    Logger.error(f"ImgTagsScreen: Error creating directory {base_dir}: {str(e)}")
-                    return
+            repository = ProjectRepository(base_dir, worker=app.derivative_worker)
 
         # Create necessary folder structure
         try:
-            # Images directory - where all original images are stored
-            images_dir = os.path.join(base_dir, "images")
-            if not os.path.exists(images_dir):
-                os.makedirs(images_dir)
-                Logger.info(f"ImgTagsScreen: Created images directory: {images_dir}")
-
-            # Images metadata directory
-            images_meta_dir = os.path.join(base_dir, "images_metadata")
-            if not os.path.exists(images_meta_dir):
-                os.makedirs(images_meta_dir)
-                Logger.info(f"ImgTagsScreen: Created images metadata directory: {images_meta_dir}")
-
-            # Albums metadata directory
-            albums_meta_dir = os.path.join(base_dir, "albums_metadata")
-            if not os.path.exists(albums_meta_dir):
-                os.makedirs(albums_meta_dir)
-                Logger.info(f"ImgTagsScreen: Created albums metadata directory: {albums_meta_dir}")
-
-            # Ensure we have an Unsigned Images album metadata
-            unsigned_album_file = os.path.join(albums_meta_dir, "Unsigned_Images.json")
-            if not os.path.exists(unsigned_album_file):
-                # Create the initial album metadata
-                album_data = {
-                    "name": "Unsigned Images",
-                    "description": "Default album for newly uploaded images",
-                    "created_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    "images": []
-                }
-                with open(unsigned_album_file, 'w') as f:
-                    json.dump(album_data, f, indent=4)
-                Logger.info(f"ImgTagsScreen: Created Unsigned Images album metadata: {unsigned_album_file}")
-
+            repository.ensure_structure()
         except Exception as e:
             Logger.error(f"ImgTagsScreen: Error creating directory structure: {str(e)}")
             return
 
-        # Using timestamp for unique filename
-        timestamp = int(time.time())
-        orig_filename = os.path.basename(app.selected_file)
-        file_ext = os.path.splitext(orig_filename)[1]
-        new_filename = f"{image_name}_{timestamp}{file_ext}"
-
-        # Path to the destination image file
-        dest_path = os.path.join(images_dir, new_filename)
-
         try:
-            # Copy the file to the images directory
-            shutil.copy2(app.selected_file, dest_path)
-            Logger.info(f"ImgTagsScreen: Copied file to {dest_path}")
-
-            # Create image metadata
-            image_metadata = {
-                "filename": new_filename,
-                "display_name": image_name,
-                "original_filename": orig_filename,
-                "upload_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "description": description,
-                "tags": tags.split(',') if tags else [],
-                "album": "Unsigned Images"  # Initial album
-            }
-
-            # Save image metadata
-            image_meta_file = os.path.join(images_meta_dir, f"{os.path.splitext(new_filename)[0]}.json")
-            with open(image_meta_file, 'w') as f:
-                json.dump(image_metadata, f, indent=4)
-            Logger.info(f"ImgTagsScreen: Saved image metadata to {image_meta_file}")
-
-            # Update album metadata to include this image
-            try:
-                with open(unsigned_album_file, 'r') as f:
-                    album_data = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                # If file doesn't exist or is invalid, create new album data
-                album_data = {
-                    "name": "Unsigned Images",
-                    "description": "Default album for newly uploaded images",
-                    "created_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    "images": []
-                }
-
-            # Add the image to the album
-            album_data["images"].append(new_filename)
-
-            # Save the updated album data
-            with open(unsigned_album_file, 'w') as f:
-                json.dump(album_data, f, indent=4)
-            Logger.info(f"ImgTagsScreen: Updated album metadata in {unsigned_album_file}")
+            # Copy the file, save its metadata and add it to the Unsigned Images album
+            image_metadata = repository.add_image(
+                app.selected_file,
+                image_name,
+                description=description,
+                tags=tags.split(',') if tags else [],
+                album_name=DEFAULT_ALBUM_NAME
+            )
+            dest_path = repository.image_path(image_metadata["filename"])
 
             # Store the filename for showing on complete screen
             app.upload_filename = image_name
 
             # Check if we're in batch processing mode
             if hasattr(app, 'batch_processing') and app.batch_processing:
+                # Record the finished image in the batch session
+                session = self.manager.get_screen('upload').batch_session if self.manager else None
+                if session:
+                    session.update_current(tags=image_metadata["tags"])
+                    session.finish_current()
+
                 # Go to the next image or complete screen if done
                 if self.manager:
                     app.process_next_batch_image()
@@ -211,6 +139,11 @@ class ImgTagsScreen(Screen):
         except Exception as e:
             Logger.error(f"ImgTagsScreen: Error uploading image: {str(e)}")
 
+    def _show_preview(self, path, texture):
+        """Display a decoded preview unless another image was selected meanwhile"""
+        if path == App.get_running_app().selected_file:
+            self.ids.image_preview.texture = texture
+
     def go_back(self):
         """Return to description screen"""
         if self.manager:
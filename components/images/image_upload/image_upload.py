@@ -1,5 +1,5 @@
 from kivy.uix.screenmanager import Screen
-from kivy.properties import StringProperty, ListProperty
+from kivy.properties import StringProperty, ObjectProperty
 from kivy.lang import Builder
 from kivy.logger import Logger
 import os
@@ -13,17 +13,47 @@ from kivy.uix.filechooser import FileChooserListView
 import subprocess
 import threading
 import tempfile
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.textinput import TextInput
+from components.core.folder_scanner.folder_scanner import FolderScanner, parse_patterns
+from components.core.image_validation.image_validation import (
+    validate_image, validate_images, ValidationReport, STATUS_ACCEPTED, STATUS_CORRUPT,
+    VALIDATION_CHUNK_SIZE
+)
+from components.core.derivative_worker.derivative_worker import PRIORITY_VISIBLE, PRIORITY_BACKFILL
+from components.core.image_hash.image_hash import hash_images, HashIndex
+from components.core.progress_popup.progress_popup import ProgressPopup
+from components.core.project_repository.project_repository import (
+    ProjectRepository, DEFAULT_NAME_PATTERN, DEFAULT_ALBUM_NAME
+)
+from components.core.batch_session.batch_session import BatchSession
 
 
 class UploadScreen(Screen):
     """Initial screen for uploading an image or a folder of images"""
-    # Add property to store images queue for batch processing
-    image_queue = ListProperty([])
+    # Persistent queue of the current batch upload
+    batch_session = ObjectProperty(None, allownone=True)
 
     def __init__(self, **kwargs):
         super(UploadScreen, self).__init__(**kwargs)
         Logger.info("UploadScreen: Initialized")
 
+        # Background folder scan and the popup showing its progress
+        self.scanner = None
+        self.batch_popup = None
+        self.batch_status_label = None
+        self.batch_start_button = None
+        self.bulk_ingest_button = None
+
+        # Pre-validation of scanned files, results of older scans are ignored
+        self.validation_report = None
+        self.pending_validations = 0
+        self.scan_generation = 0
+
+        # Near-duplicate check of queued files: (path, description of the match, distance)
+        self.duplicate_matches = []
+        self.batch_hashes = None
+
         # Create app directories if they don't exist
         self.create_app_directories()
 
@@ -54,7 +84,26 @@ class UploadScreen(Screen):
         # Reset any previous selections and queues
         app = App.get_running_app()
         app.selected_file = ""
-        self.image_queue = []
+        if self.scanner:
+            self.scanner.cancel()
+            self.scanner = None
+        self.scan_generation += 1
+        self.pending_validations = 0
+
+        # An unfinished session stays on disk and can be resumed later
+        self.batch_session = None
+
+    def uploads_path(self):
+        """Project directory that batch sessions and uploads go to"""
+        app = App.get_running_app()
+        if app.repository:
+            return app.repository.project_path
+        # Use default uploads directory if no project is selected
+        return os.path.join(os.path.expanduser('~'), 'vpic_app', 'uploads')
+
+    def queued_count(self):
+        """Number of queued images that were not handed out yet"""
+        return self.batch_session.remaining() if self.batch_session else 0
 
     def show_file_chooser(self):
         """Open native OS file chooser dialog to select an image"""
@@ -382,69 +431,194 @@ class UploadScreen(Screen):
         self.scan_folder_for_images(folder_path)
 
     def scan_folder_for_images(self, folder_path):
-        """Scan the selected folder for images and queue them for processing"""
+        """Scan the selected folder for images in the background and queue them as they are found"""
         Logger.info(f"UploadScreen: Scanning folder: {folder_path}")
 
-        # List to store found image files
-        image_files = []
+        # Stop any previous scan
+        if self.scanner:
+            self.scanner.cancel()
+
+        # Scan options from the upload screen
+        recursive = self.ids.recursive_checkbox.active if 'recursive_checkbox' in self.ids else False
+        include = parse_patterns(self.ids.include_input.text) if 'include_input' in self.ids else []
+        exclude = parse_patterns(self.ids.exclude_input.text) if 'exclude_input' in self.ids else []
+
+        self.batch_session = BatchSession.start(self.uploads_path())
+        self.validation_report = ValidationReport()
+        self.pending_validations = 0
+        self.duplicate_matches = []
+        self.batch_hashes = HashIndex()
+        self.scan_generation += 1
+        # Files whose content is already in the project are dropped by the scanner thread
+        repository = App.get_running_app().repository
+        file_filter = None
+        if repository:
+            file_filter = lambda entry: self.is_new_file(repository, entry)
+
+        self.scanner = FolderScanner(
+            folder_path,
+            on_chunk=self.on_scan_chunk,
+            on_done=self.on_scan_done,
+            recursive=recursive,
+            include=include,
+            exclude=exclude,
+            file_filter=file_filter
+        )
 
-        # Valid image extensions
-        valid_extensions = ['.jpg', '.jpeg', '.png', '.gif']
+        # Show the confirmation popup right away, it fills in while the scan runs
+        self.scanner.start()
+        self.show_batch_confirmation(0)
 
-        # Scan folder for image files
+    def is_new_file(self, repository, entry):
+        """Scanner thread: return False if the project already holds a file with this content"""
         try:
-            for filename in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, filename)
-
-                # Check if it's a file (not a subdirectory)
-                if os.path.isfile(file_path):
-                    # Check if it has a valid image extension
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext in valid_extensions:
-                        image_files.append(file_path)
-
-            # Log found images
-            Logger.info(f"UploadScreen: Found {len(image_files)} images in folder")
-
-            # If images were found, start batch processing
-            if image_files:
-                # Set the image queue
-                self.image_queue = image_files
-
-                # Show confirmation popup
-                self.show_batch_confirmation(len(image_files))
+            existing = repository.content_index().find(entry.path, entry.stat().st_size)
+        except Exception as e:
+            Logger.warning(f"UploadScreen: Could not check {entry.path} for duplicates: {str(e)}")
+            return True
+        if existing:
+            Logger.info(f"UploadScreen: Skipping {entry.path}, already in the project as {existing}")
+        return existing is None
+
+    def on_scan_chunk(self, paths):
+        """Validate a chunk of scanned files in the background"""
+        app = App.get_running_app()
+        worker = getattr(app, 'derivative_worker', None)
+        generation = self.scan_generation
+
+        for start in range(0, len(paths), VALIDATION_CHUNK_SIZE):
+            chunk = paths[start:start + VALIDATION_CHUNK_SIZE]
+            self.pending_validations += 1
+            callback = lambda key, result, error, chunk=chunk: self.on_chunk_validated(
+                generation, chunk, result, error)
+
+            if worker:
+                key = ("validate", generation, paths[start])
+                worker.submit(key, validate_images, (chunk,), PRIORITY_VISIBLE, callback)
+            else:
+                callback(None, validate_images(chunk), None)
+
+        self.update_batch_confirmation()
+
+    def on_chunk_validated(self, generation, chunk, results, error):
+        """Queue the accepted files of a validated chunk"""
+        if generation != self.scan_generation or not self.batch_session:
+            return
+        self.pending_validations -= 1
+
+        if error is not None:
+            # The whole chunk failed, count its files as unreadable
+            results = [(path, STATUS_CORRUPT, str(error)) for path in chunk]
+        accepted = self.validation_report.add(results)
+        self.batch_session.add(accepted)
+        self.check_duplicates(generation, accepted)
+
+        # Keep the batch total up to date if processing already started
+        app = App.get_running_app()
+        if app.batch_processing:
+            app.batch_total = str(len(self.batch_session))
+
+        self.check_scan_finished()
+        self.update_batch_confirmation()
+
+    def check_duplicates(self, generation, paths):
+        """Hash accepted files in the background to flag near-duplicates before they are ingested"""
+        app = App.get_running_app()
+        worker = getattr(app, 'derivative_worker', None)
+        if not paths or not worker or not app.repository:
+            return
+        worker.submit(("dhash", generation, paths[0]), hash_images, (paths,), PRIORITY_BACKFILL,
+                      lambda key, result, error: self.on_chunk_hashed(generation, result, error))
+
+    def on_chunk_hashed(self, generation, results, error):
+        """Compare hashed queued files with the project and with each other"""
+        app = App.get_running_app()
+        if generation != self.scan_generation or error is not None or not app.repository:
+            return
+
+        # Ingest reuses these hashes instead of computing them again
+        app.repository.remember_source_hashes(results)
+        for path, value in results:
+            if not value:
+                continue
+            matches = app.repository.find_near_duplicates(value)
+            if matches:
+                distance, filename = matches[0]
+                self.duplicate_matches.append((path, f"project image {filename}", distance))
+            else:
+                batch_matches = self.batch_hashes.find(value)
+                if batch_matches:
+                    distance, other = batch_matches[0]
+                    self.duplicate_matches.append((path, os.path.basename(other), distance))
+            self.batch_hashes.add(value, path)
+
+        self.update_batch_confirmation()
+
+    def on_scan_done(self, total, error):
+        """Called when the folder scan has finished"""
+        Logger.info(f"UploadScreen: Folder scan finished with {total} images")
+
+        if error is not None:
+            self.dismiss_batch_confirmation()
+            self.show_error_message(f"Error scanning folder: {str(error)}")
+            return
+
+        if total == 0:
+            self.dismiss_batch_confirmation()
+            if self.scanner and self.scanner.skipped:
+                self.show_error_message(
+                    f"All {self.scanner.skipped} images in the selected folder are already in the project.")
             else:
-                # Show message if no images found
                 self.show_error_message("No image files found in the selected folder.")
+            return
 
-        except Exception as e:
-            Logger.error(f"UploadScreen: Error scanning folder: {str(e)}")
-            self.show_error_message(f"Error scanning folder: {str(e)}")
+        self.check_scan_finished()
+        self.update_batch_confirmation()
+
+    def check_scan_finished(self):
+        """Report the end of scanning and validation"""
+        if self.is_scanning() or not self.validation_report:
+            return
+
+        Logger.info(f"UploadScreen: Validation finished: {self.validation_report.summary()}")
+        if not self.validation_report.accepted and self.batch_popup:
+            self.dismiss_batch_confirmation()
+            self.show_error_message(
+                f"None of the images in the selected folder can be used.\n\n{self.validation_report.details()}")
 
     def show_batch_confirmation(self, count):
         """Show a confirmation popup before starting batch processing"""
         content = BoxLayout(orientation='vertical', padding=10, spacing=10)
 
-        # Message
-        content.add_widget(Label(
-            text=f"Found {count} images to process.\nDo you want to start batch processing?",
+        # Message, updated live while the scan is running
+        self.batch_status_label = Label(
+            text=self.batch_status_text(count),
             halign='center',
             valign='middle',
             text_size=(400, None)
-        ))
+        )
+        content.add_widget(self.batch_status_label)
 
         # Buttons
         buttons = BoxLayout(size_hint_y=None, height=50, spacing=10)
 
         cancel_btn = Button(text="Cancel")
-        start_btn = Button(
+        report_btn = Button(text="Report")
+        self.bulk_ingest_button = Button(
+            text="Bulk Ingest",
+            disabled=count == 0 or self.is_scanning()
+        )
+        self.batch_start_button = Button(
             text="Start Processing",
             background_color=(0.2, 0.7, 0.3, 1),
-            background_normal=''
+            background_normal='',
+            disabled=count == 0
         )
 
         buttons.add_widget(cancel_btn)
-        buttons.add_widget(start_btn)
+        buttons.add_widget(report_btn)
+        buttons.add_widget(self.bulk_ingest_button)
+        buttons.add_widget(self.batch_start_button)
         content.add_widget(buttons)
 
         # Create popup
@@ -454,44 +628,304 @@ class UploadScreen(Screen):
             size_hint=(0.8, 0.4),
             auto_dismiss=False
         )
+        self.batch_popup = popup
 
         # Button bindings
         cancel_btn.bind(on_press=lambda x: self.cancel_batch_processing(popup))
-        start_btn.bind(on_press=lambda x: self.start_batch_processing(popup))
+        report_btn.bind(on_press=lambda x: self.show_validation_report())
+        self.bulk_ingest_button.bind(on_press=lambda x: self.show_bulk_ingest_options(popup))
+        self.batch_start_button.bind(on_press=lambda x: self.start_batch_processing(popup))
 
         # Show popup
         popup.open()
 
+    def batch_status_text(self, count):
+        """Text of the batch confirmation popup"""
+        report = self.validation_report
+        checked = f"\nChecked {report.total} files: {report.summary()}" if report else ""
+        if self.scanner and self.scanner.skipped:
+            checked += f"\nSkipped {self.scanner.skipped} files already in the project"
+        if self.duplicate_matches:
+            checked += f"\n{len(self.duplicate_matches)} look like duplicates, see Report"
+        if self.is_scanning():
+            return (f"Scanning... {count} valid images so far.{checked}\n"
+                    f"You can start processing while the scan continues.")
+        return f"Found {count} images to process.{checked}\nDo you want to start batch processing?"
+
+    def show_validation_report(self):
+        """Show the files that were rejected or found corrupt during validation"""
+        report = self.validation_report
+        if not report:
+            return
+
+        text = report.details()
+        if self.duplicate_matches:
+            duplicates = "\n".join(f"{os.path.basename(path)}: looks like {match} ({distance} bits apart)"
+                                   for path, match, distance in self.duplicate_matches)
+            text = f"{text}\n\nPossible duplicates:\n{duplicates}"
+
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        content.add_widget(Label(text=report.summary(), size_hint_y=None, height=30))
+
+        # Scrollable list of problem files
+        scroll = ScrollView()
+        details = Label(text=text, halign='left', valign='top', size_hint_y=None)
+        details.bind(width=lambda instance, width: setattr(instance, 'text_size', (width, None)),
+                     texture_size=lambda instance, size: setattr(instance, 'height', size[1]))
+        scroll.add_widget(details)
+        content.add_widget(scroll)
+
+        close_btn = Button(text="Close", size_hint_y=None, height=50)
+        content.add_widget(close_btn)
+
+        popup = Popup(
+            title="Validation Report",
+            content=content,
+            size_hint=(0.9, 0.8)
+        )
+        close_btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    def update_batch_confirmation(self):
+        """Refresh the live count in the batch confirmation popup"""
+        if not self.batch_popup:
+            return
+        count = self.queued_count()
+        self.batch_status_label.text = self.batch_status_text(count)
+        self.batch_start_button.disabled = count == 0
+        # Bulk ingest needs the complete queue
+        self.bulk_ingest_button.disabled = count == 0 or self.is_scanning()
+
+    def dismiss_batch_confirmation(self):
+        """Close the batch confirmation popup if it is open"""
+        if self.batch_popup:
+            self.batch_popup.dismiss()
+            self.batch_popup = None
+
     def cancel_batch_processing(self, popup):
         """Cancel batch processing and close popup"""
-        self.image_queue = []
+        if self.scanner:
+            self.scanner.cancel()
+            self.scanner = None
+        self.scan_generation += 1
+        self.pending_validations = 0
+        if self.batch_session:
+            self.discard_batch_session(self.batch_session)
+            self.batch_session = None
+        self.batch_popup = None
         popup.dismiss()
 
+    def discard_batch_session(self, session):
+        """Delete a batch session and the staged thumbnails of its unfinished images"""
+        app = App.get_running_app()
+        if app.repository:
+            app.repository.discard_staged_thumbnails(session.unfinished_paths())
+        session.discard()
+
+    def is_scanning(self):
+        """Return True while a folder scan or its validation is still adding images to the queue"""
+        return bool(self.scanner and self.scanner.running) or self.pending_validations > 0
+
     def start_batch_processing(self, popup):
         """Start processing the queued images"""
-        if not self.image_queue:
-            popup.dismiss()
+        # Dismiss popup, the scan (if still running) keeps filling the queue
+        self.batch_popup = None
+        popup.dismiss()
+
+        if not self.queued_count():
             return
+        self.begin_batch()
 
-        # Process the first image in the queue
+    def begin_batch(self):
+        """Enter batch mode and show the next image of the batch session"""
         app = App.get_running_app()
-
-        # Set batch processing mode
         app.batch_processing = True
-        app.batch_current = "1"
-        app.batch_total = str(len(self.image_queue))
+        app.batch_total = str(len(self.batch_session))
 
-        # Take the first image from the queue
-        app.selected_file = self.image_queue.pop(0)
+        # Takes the next image, prepares the upcoming ones and opens the description screen
+        app.process_next_batch_image()
 
-        # Dismiss popup
-        popup.dismiss()
+    def offer_resume(self):
+        """Offer to resume an unfinished batch session of the current project"""
+        try:
+            session = BatchSession.load(self.uploads_path())
+        except Exception as e:
+            Logger.error(f"UploadScreen: Error loading batch session: {str(e)}")
+            return
+        if session is None:
+            return
+        if not session.has_next():
+            session.discard()
+            return
+
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        content.add_widget(Label(
+            text=f"An unfinished batch upload from {session.created or 'an earlier session'} was found.\n"
+                 f"{session.completed_count()} of {len(session)} images are done, "
+                 f"{session.remaining()} remain.\nDo you want to resume it?",
+            halign='center',
+            valign='middle',
+            text_size=(400, None)
+        ))
+
+        buttons = BoxLayout(size_hint_y=None, height=50, spacing=10)
+        discard_btn = Button(text="Discard")
+        later_btn = Button(text="Later")
+        resume_btn = Button(
+            text="Resume",
+            background_color=(0.2, 0.7, 0.3, 1),
+            background_normal=''
+        )
+        buttons.add_widget(discard_btn)
+        buttons.add_widget(later_btn)
+        buttons.add_widget(resume_btn)
+        content.add_widget(buttons)
+
+        popup = Popup(
+            title="Resume Batch Upload",
+            content=content,
+            size_hint=(0.8, 0.4),
+            auto_dismiss=False
+        )
+
+        def resume(instance):
+            popup.dismiss()
+            Logger.info(f"UploadScreen: Resuming batch session with {session.remaining()} images left")
+            self.batch_session = session
+            self.begin_batch()
+
+        def discard(instance):
+            popup.dismiss()
+            self.discard_batch_session(session)
+
+        resume_btn.bind(on_press=resume)
+        discard_btn.bind(on_press=discard)
+        later_btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    def show_bulk_ingest_options(self, confirmation_popup):
+        """Ask for the name pattern, description and tags shared by every queued image"""
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+
+        content.add_widget(Label(
+            text=f"Ingest {self.queued_count()} images without reviewing them one by one.\n"
+                 "Name pattern placeholders: {name} file name, {n} number, {date} today",
+            halign='center',
+            valign='middle',
+            text_size=(400, None)
+        ))
+
+        name_input = TextInput(text=DEFAULT_NAME_PATTERN, hint_text="Name pattern",
+                               multiline=False, size_hint_y=None, height=40)
+        description_input = TextInput(hint_text="Description for all images", size_hint_y=None, height=80)
+        tags_input = TextInput(hint_text="Tags for all images, separated by commas",
+                               multiline=False, size_hint_y=None, height=40)
+        content.add_widget(name_input)
+        content.add_widget(description_input)
+        content.add_widget(tags_input)
+
+        # Buttons
+        buttons = BoxLayout(size_hint_y=None, height=50, spacing=10)
+        cancel_btn = Button(text="Cancel")
+        start_btn = Button(
+            text="Start Bulk Ingest",
+            background_color=(0.2, 0.7, 0.3, 1),
+            background_normal=''
+        )
+        buttons.add_widget(cancel_btn)
+        buttons.add_widget(start_btn)
+        content.add_widget(buttons)
+
+        popup = Popup(
+            title="Bulk Ingest",
+            content=content,
+            size_hint=(0.8, 0.7),
+            auto_dismiss=False
+        )
 
-        # Navigate to description screen
+        def start(instance):
+            popup.dismiss()
+            self.dismiss_batch_confirmation()
+            self.start_bulk_ingest(
+                name_input.text.strip() or DEFAULT_NAME_PATTERN,
+                description_input.text,
+                [tag.strip() for tag in tags_input.text.split(',') if tag.strip()]
+            )
+
+        cancel_btn.bind(on_press=popup.dismiss)
+        start_btn.bind(on_press=start)
+        popup.open()
+
+    def start_bulk_ingest(self, name_pattern, description, tags):
+        """Ingest the whole queue in the background with shared metadata"""
+        app = App.get_running_app()
+        session = self.batch_session
+        paths = session.take_remaining()
+        self.batch_session = None
+        self.scanner = None
+
+        repository = app.repository or ProjectRepository(self.uploads_path(), worker=app.derivative_worker)
+
+        Logger.info(f"UploadScreen: Bulk ingesting {len(paths)} images into {repository.project_path}")
+        progress_popup = ProgressPopup("Bulk Ingest", cancellable=True)
+        progress_popup.open()
+
+        def run():
+            try:
+                ingested, failures = repository.add_images(
+                    paths,
+                    name_pattern=name_pattern,
+                    description=description,
+                    tags=tags,
+                    album_name=DEFAULT_ALBUM_NAME,
+                    progress=lambda done, total: progress_popup.update(
+                        done, total, f"Ingesting images... {done} of {total}"),
+                    cancelled=progress_popup.cancelled
+                )
+                # Images are ingested in queue order, so the handled ones are a prefix of paths
+                handled = len(ingested) + len(failures)
+                # Images that failed are not ingested, they keep no staged thumbnails
+                repository.discard_staged_thumbnails([path for path, _ in failures])
+                if handled < len(paths):
+                    # Cancelled: keep the rest of the queue so the batch can be resumed
+                    session.finish_taken(handled, [path for path, _ in failures])
+                    Clock.schedule_once(lambda dt: self.on_bulk_ingest_cancelled(ingested, failures), 0)
+                else:
+                    session.discard()
+                    Clock.schedule_once(lambda dt: self.on_bulk_ingest_done(ingested, failures), 0)
+            except Exception as e:
+                Logger.error(f"UploadScreen: Error during bulk ingest: {str(e)}")
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Error during bulk ingest: {error}"), 0)
+            finally:
+                progress_popup.finish()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_bulk_ingest_cancelled(self, ingested, failures):
+        """Report a cancelled bulk ingest and offer to resume the images that are left"""
+        Logger.info(f"UploadScreen: Bulk ingest cancelled after {len(ingested)} images")
+        if failures:
+            lines = "\n".join(f"{os.path.basename(path)}: {error}" for path, error in failures[:10])
+            self.show_error_message(f"{len(failures)} images could not be ingested:\n{lines}")
+        self.offer_resume()
+
+    def on_bulk_ingest_done(self, ingested, failures):
+        """Show the result of a bulk ingest"""
+        if failures:
+            lines = "\n".join(f"{os.path.basename(path)}: {error}" for path, error in failures[:10])
+            self.show_error_message(f"{len(failures)} images could not be ingested:\n{lines}")
+
+        if not ingested:
+            return
+
+        # The upload complete screen reports batch results from these
+        app = App.get_running_app()
+        app.batch_processing = True
+        app.batch_current = str(len(ingested))
+        app.batch_total = str(len(ingested))
         if self.manager:
-            self.manager.current = 'img_description'
-        else:
-            Logger.error("UploadScreen: No screen manager found")
+            self.manager.current = 'upload_complete'
 
     def handle_selected_file(self, selection, popup=None):
         """Process the selected file"""
@@ -513,11 +947,11 @@ class UploadScreen(Screen):
                 Logger.error(f"UploadScreen: Selected file does not exist: {file_path}")
                 return
 
-            # Check file extension
-            ext = os.path.splitext(file_path)[1].lower()
-            if ext not in ['.jpg', '.jpeg', '.png', '.gif']:
-                Logger.error(f"UploadScreen: Selected file is not a supported image: {file_path}")
-                self.show_error_message("Please select a valid image file (jpg, jpeg, png, gif)")
+            # Check the file content, not just its extension
+            _, status, reason = validate_image(file_path)
+            if status != STATUS_ACCEPTED:
+                Logger.error(f"UploadScreen: Selected file is not a usable image: {file_path}: {reason}")
+                self.show_error_message(f"Please select a valid image file (jpg, jpeg, png, gif)\n\n{reason}")
                 return
 
             # Store in app's data
@@ -525,6 +959,12 @@ class UploadScreen(Screen):
             app.selected_file = file_path
             app.batch_processing = False  # Single file mode
 
+            # Warn about near-duplicates while the user fills in the description
+            worker = getattr(app, 'derivative_worker', None)
+            if worker and app.repository:
+                worker.submit(("dhash", file_path), hash_images, ([file_path],), PRIORITY_VISIBLE,
+                              lambda key, result, error: self.on_selected_file_hashed(result, error))
+
             # Navigate to image description screen
             if self.manager:
                 self.manager.current = 'img_description'
@@ -535,7 +975,29 @@ class UploadScreen(Screen):
             Logger.error(f"UploadScreen: Error handling selected file: {str(e)}")
             self.show_error_message(f"Error processing file: {str(e)}")
 
-    def show_error_message(self, message):
+    def on_selected_file_hashed(self, results, error):
+        """Tell the user if the selected file looks like an image already in the project"""
+        app = App.get_running_app()
+        if error is not None or not results or not app.repository:
+            return
+        path, value = results[0]
+        if not value or path != app.selected_file:
+            return
+
+        app.repository.remember_source_hashes(results)
+        matches = app.repository.find_near_duplicates(value)
+        if not matches:
+            return
+
+        Logger.info(f"UploadScreen: {path} looks like {len(matches)} project images")
+        names = []
+        for distance, filename in matches[:5]:
+            metadata = app.repository.get_image(filename) or {}
+            names.append(f"{metadata.get('display_name', filename)} ({distance} bits apart)")
+        self.show_error_message("This image looks like an image already in the project:\n\n" + "\n".join(names),
+                                title="Possible Duplicate")
+
+    def show_error_message(self, message, title="Error"):
         """Display an error message to the user in a popup"""
         content = BoxLayout(orientation='vertical', padding=10, spacing=10)
 
@@ -558,7 +1020,7 @@ class UploadScreen(Screen):
 
         # Create popup
         popup = Popup(
-            title="Error",
+            title=title,
             content=content,
             size_hint=(0.8, 0.4),
             auto_dismiss=False
@@ -51,9 +51,9 @@ class UploadCompleteScreen(Screen):
         app.batch_processing = False
         app.batch_current = "0"
 
-        # Clean up the image queue in the upload screen
+        # Clean up the batch session in the upload screen
         upload_screen = self.manager.get_screen('upload')
-        upload_screen.image_queue = []
+        upload_screen.batch_session = None
 
         # Log navigation for debugging
         Logger.info("UploadCompleteScreen: Navigating back to upload screen")
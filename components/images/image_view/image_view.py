@@ -6,7 +6,6 @@ from kivy.lang import Builder
 from kivy.uix.label import Label
 from kivy.uix.boxlayout import BoxLayout
 import os
-import json
 
 
 class ImageViewScreen(Screen):
@@ -17,6 +16,9 @@ class ImageViewScreen(Screen):
     image_tags = StringProperty("")
     album_name = StringProperty("")
     upload_date = StringProperty("")
+    capture_info = StringProperty("")
+    # Screen that opened the image, go_back returns there
+    back_screen = StringProperty("album_view")
 
     def __init__(self, **kwargs):
         super(ImageViewScreen, self).__init__(**kwargs)
@@ -42,7 +44,6 @@ class ImageViewScreen(Screen):
 
         # Get paths to necessary directories
         images_dir = os.path.join(app.current_project_path, "images")
-        images_meta_dir = os.path.join(app.current_project_path, "images_metadata")
 
         # Construct full path to image
         self.image_path = os.path.join(images_dir, image_filename)
@@ -53,26 +54,25 @@ class ImageViewScreen(Screen):
             self._show_error(f"Image not found: {image_filename}")
             return
 
-        # Update UI with image path
+        # Update UI with the image, decoded once and then served from the texture cache
         if hasattr(self, 'ids') and hasattr(self.ids, 'image_display'):
-            self.ids.image_display.source = self.image_path
-
-        # Get image metadata
-        image_meta_path = os.path.join(images_meta_dir, f"{os.path.splitext(image_filename)[0]}.json")
-        if not os.path.exists(image_meta_path):
-            Logger.warning(f"ImageViewScreen: Image metadata not found: {image_meta_path}")
+            self.ids.image_display.texture = None
+            app.texture_cache.request(
+                self.image_path, lambda texture, path=self.image_path: self._show_texture(path, texture))
+
+        # Get image metadata (cached by the project repository)
+        metadata = app.repository.get_image(image_filename)
+        if metadata is None:
+            Logger.warning(f"ImageViewScreen: Image metadata not found for {image_filename}")
             # If no metadata, just show image with filename
             self.image_name = os.path.splitext(image_filename)[0]
             self.image_description = "No description available"
             self.image_tags = "No tags"
             self.album_name = "Unknown album"
             self.upload_date = "Unknown"
+            self.capture_info = "Unknown"
         else:
-            # Load metadata
             try:
-                with open(image_meta_path, 'r') as f:
-                    metadata = json.load(f)
-
                 # Extract metadata fields
                 self.image_name = metadata.get('display_name', os.path.splitext(image_filename)[0])
                 self.image_description = metadata.get('description', "No description available")
@@ -81,6 +81,11 @@ class ImageViewScreen(Screen):
                 self.album_name = metadata.get('album', "Unknown album")
                 self.upload_date = metadata.get('upload_date', "Unknown")
 
+                # Camera data read at ingest
+                exif = metadata.get('exif') or {}
+                capture = [value for value in (exif.get('capture_date'), exif.get('camera')) if value]
+                self.capture_info = ", ".join(capture) if capture else "Unknown"
+
                 # Update UI
                 self.update_ui_with_metadata()
 
@@ -88,6 +93,11 @@ class ImageViewScreen(Screen):
                 Logger.error(f"ImageViewScreen: Error loading image metadata: {str(e)}")
                 self._show_error(f"Error loading image metadata: {str(e)}")
 
+    def _show_texture(self, path, texture):
+        """Display a decoded image unless another image was opened meanwhile"""
+        if path == self.image_path:
+            self.ids.image_display.texture = texture
+
     def update_ui_with_metadata(self):
         """Update UI elements with image metadata"""
         if hasattr(self, 'ids'):
@@ -103,10 +113,10 @@ class ImageViewScreen(Screen):
                 self.ids.image_date_text.text = self.upload_date
 
     def go_back(self):
-        """Return to album view screen"""
+        """Return to the screen that opened the image"""
         Logger.info("ImageViewScreen: go_back called")
         if self.manager:
-            self.manager.current = 'album_view'
+            self.manager.current = self.back_screen
         else:
             Logger.error("ImageViewScreen: No screen manager found")
 
@@ -55,7 +55,8 @@ class ProjectSelectionScreen(Screen):
         try:
             for item in os.listdir(self.projects_dir):
                 item_path = os.path.join(self.projects_dir, item)
-                if os.path.isdir(item_path):
+                # Hidden directories are imports in progress or projects being removed
+                if os.path.isdir(item_path) and not item.startswith('.'):
                     self.projects.append(item)
         except Exception as e:
             Logger.error(f"ProjectSelectionScreen: Error loading projects: {str(e)}")
@@ -1,23 +1,53 @@
 from kivy.uix.screenmanager import Screen
 from kivy.app import App
 from kivy.logger import Logger
+from kivy.clock import Clock
 from kivy.lang import Builder
+from kivy.properties import ListProperty
 from kivy.uix.popup import Popup
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.filechooser import FileChooserListView
+from kivy.uix.scrollview import ScrollView
 import os
 import shutil
 import json
 import threading
 import subprocess
 import tempfile
-from datetime import datetime
+import time
+import hashlib
+from components.core.project_index.project_index import close_project_index, rebuild_project_index
+from components.core.thumbnails.thumbnails import missing_tiers
+from components.core.derivative_worker.derivative_worker import PRIORITY_BACKFILL
+from components.core.project_repository.project_repository import (
+    new_album_data, load_project_settings, DEFAULT_ALBUM_NAME, DEFAULT_ALBUM_DESCRIPTION, HASH_CHUNK_SIZE
+)
+from components.core.file_copy.file_copy import (
+    copy_function, copy_tree, CopyCancelled, COPY_MODES, COPY_MODE_COPY, COPY_MODE_HARDLINK
+)
+from components.core.progress_popup.progress_popup import ProgressPopup
+from components.core.ballot_ledger.ballot_ledger import find_ledgers, votes_dir, LedgerConflictError
+from components.core.batch_session.batch_session import session_path
+from components.core.trash.trash import move_to_trash
+from components.core.project_archive.project_archive import (
+    export_project, import_archive, read_manifest, ArchiveCancelled, ARCHIVE_EXTENSION
+)
+
+
+def format_bytes(size):
+    """Human readable file size, e.g. 1.5 GB"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
 
 
 class SettingsScreen(Screen):
     """Settings screen for the application"""
+    # Choices for the project's ingest copy mode
+    copy_modes = ListProperty(COPY_MODES)
 
     def __init__(self, **kwargs):
         super(SettingsScreen, self).__init__(**kwargs)
@@ -39,6 +69,22 @@ class SettingsScreen(Screen):
             else:
                 self.ids.current_project_label.text = "No project selected"
 
+        # Show the copy mode of the current project
+        if hasattr(self, 'ids') and hasattr(self.ids, 'copy_mode_spinner') and app.repository:
+            self.ids.copy_mode_spinner.text = app.repository.copy_mode
+
+    def set_copy_mode(self, mode):
+        """Save how files are copied into the current project"""
+        app = App.get_running_app()
+        if not app.repository or mode not in COPY_MODES or mode == app.repository.copy_mode:
+            return
+        try:
+            app.repository.update_settings(copy_mode=mode)
+            Logger.info(f"SettingsScreen: Copy mode set to {mode}")
+        except Exception as e:
+            Logger.error(f"SettingsScreen: Error saving copy mode: {str(e)}")
+            self.show_error_message(f"Error saving copy mode: {str(e)}")
+
     def change_project(self):
         """Go to project selection screen"""
         Logger.info("SettingsScreen: change_project called")
@@ -67,7 +113,7 @@ class SettingsScreen(Screen):
 
         # Message
         content.add_widget(Label(
-            text=f"Are you sure you want to clear all contents from project '{app.current_project}'?\n\nThis will delete all images and album data, but keep the project itself.",
+            text=f"Are you sure you want to clear all contents from project '{app.current_project}'?\n\nThis will delete all images, album data and votes, but keep the project itself.",
             halign='center',
             valign='middle',
             text_size=(400, None)
@@ -122,50 +168,30 @@ class SettingsScreen(Screen):
             # Close popup first
             popup.dismiss()
 
-            # Get project directory paths
-            project_path = app.current_project_path
-            images_dir = os.path.join(project_path, "images")
-            images_meta_dir = os.path.join(project_path, "images_metadata")
-            albums_meta_dir = os.path.join(project_path, "albums_metadata")
-
-            # Clear images directory
-            if os.path.exists(images_dir):
-                for item in os.listdir(images_dir):
-                    item_path = os.path.join(images_dir, item)
-                    if os.path.isfile(item_path):
-                        os.remove(item_path)
-                        Logger.info(f"SettingsScreen: Removed image file {item_path}")
-
-            # Clear images metadata directory
-            if os.path.exists(images_meta_dir):
-                for item in os.listdir(images_meta_dir):
-                    item_path = os.path.join(images_meta_dir, item)
-                    if os.path.isfile(item_path):
-                        os.remove(item_path)
-                        Logger.info(f"SettingsScreen: Removed image metadata file {item_path}")
-
-            # Clear albums metadata directory
-            if os.path.exists(albums_meta_dir):
-                for item in os.listdir(albums_meta_dir):
-                    item_path = os.path.join(albums_meta_dir, item)
-                    if os.path.isfile(item_path):
-                        os.remove(item_path)
-                        Logger.info(f"SettingsScreen: Removed album metadata file {item_path}")
-
-            # Recreate Unsigned Images album
-            unsigned_album_file = os.path.join(albums_meta_dir, "Unsigned_Images.json")
-            if not os.path.exists(albums_meta_dir):
-                os.makedirs(albums_meta_dir)
-
-            album_data = {
-                "name": "Unsigned Images",
-                "description": "Default album for newly uploaded images",
-                "created_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "images": []
-            }
-
-            with open(unsigned_album_file, 'w') as f:
-                json.dump(album_data, f, indent=4)
+            # Any unfinished batch refers to the images being removed
+            upload_screen = self.manager.get_screen('upload') if self.manager else None
+            if upload_screen and upload_screen.batch_session:
+                upload_screen.batch_session.discard()
+                upload_screen.batch_session = None
+
+            # Move the project contents, ballots included, into the trash in one rename per directory
+            repository = app.repository
+            repository.close()
+            entry = move_to_trash(
+                [repository.images_dir, repository.images_meta_dir, repository.albums_meta_dir,
+                 repository.thumbnails_dir(), votes_dir(repository.project_path),
+                 session_path(repository.project_path)],
+                app.data_dir(),
+                f"clear_{app.current_project}"
+            )
+            Logger.info(f"SettingsScreen: Moved project contents to {entry}")
+
+            # Reset the project index and recreate the empty structure with the Unsigned Images album
+            repository.index.clear()
+            repository.ensure_structure()
+
+            # Delete the old contents in the background
+            app.trash_purger.purge()
 
             # Show success message
             self.show_success_message("Project cleared successfully")
@@ -174,6 +200,198 @@ class SettingsScreen(Screen):
             Logger.error(f"SettingsScreen: Error clearing project: {str(e)}")
             self.show_error_message(f"Error clearing project: {str(e)}")
 
+    def generate_thumbnails(self):
+        """Generate missing thumbnails for every image of the current project"""
+        Logger.info("SettingsScreen: generate_thumbnails called")
+        app = App.get_running_app()
+
+        if not app.current_project or not app.current_project_path:
+            self.show_error_message("No project is selected")
+            return
+
+        repository = app.repository
+
+        # Listing a large project takes a while, keep it off the UI thread
+        def find_missing():
+            try:
+                filenames = []
+                if os.path.isdir(repository.images_dir):
+                    with os.scandir(repository.images_dir) as entries:
+                        filenames = [entry.name for entry in entries if entry.is_file()]
+                missing = []
+                for filename in filenames:
+                    tiers = missing_tiers(repository.project_path, filename)
+                    if tiers:
+                        missing.append((filename, tiers))
+                Clock.schedule_once(lambda dt: self.queue_thumbnail_backfill(repository, missing), 0)
+            except Exception as e:
+                Logger.error(f"SettingsScreen: Error scanning for missing thumbnails: {str(e)}")
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Error generating thumbnails: {error}"), 0)
+
+        threading.Thread(target=find_missing, daemon=True).start()
+
+    def queue_thumbnail_backfill(self, repository, missing):
+        """Hand missing thumbnails to the derivative worker at backfill priority"""
+        Logger.info(f"SettingsScreen: Queuing thumbnails for {len(missing)} images")
+        if not missing:
+            self.show_success_message("All thumbnails are up to date")
+            return
+
+        progress = {"done": 0, "failed": 0}
+
+        def on_done(key, result, error):
+            progress["done"] += 1
+            if error:
+                progress["failed"] += 1
+            if progress["done"] == len(missing):
+                message = f"Generated thumbnails for {len(missing) - progress['failed']} images"
+                if progress["failed"]:
+                    message += f"\n{progress['failed']} images could not be processed"
+                self.show_success_message(message)
+
+        for filename, tiers in missing:
+            repository.request_thumbnails(filename, tiers, PRIORITY_BACKFILL, callback=on_done)
+
+    def find_duplicates(self):
+        """Hash images that have no perceptual hash yet, then report groups of near-duplicates"""
+        Logger.info("SettingsScreen: find_duplicates called")
+        app = App.get_running_app()
+
+        if not app.current_project or not app.current_project_path:
+            self.show_error_message("No project is selected")
+            return
+
+        repository = app.repository
+        try:
+            missing = repository.missing_hashes()
+        except Exception as e:
+            Logger.error(f"SettingsScreen: Error reading the project index: {str(e)}")
+            self.show_error_message(f"Error finding duplicates: {str(e)}")
+            return
+
+        if not missing:
+            self.run_duplicate_report(repository)
+            return
+
+        Logger.info(f"SettingsScreen: Hashing {len(missing)} images")
+        progress_popup = ProgressPopup("Hashing Images")
+        progress_popup.open()
+        chunks = [missing[start:start + HASH_CHUNK_SIZE] for start in range(0, len(missing), HASH_CHUNK_SIZE)]
+        progress = {"chunks": 0, "images": 0}
+
+        def on_hashed(key, result, error):
+            progress["chunks"] += 1
+            progress["images"] += len(result or ())
+            progress_popup.update(progress["images"], len(missing),
+                                  f"Hashed {progress['images']} of {len(missing)} images")
+            if progress["chunks"] == len(chunks):
+                progress_popup.finish()
+                self.run_duplicate_report(repository)
+
+        for chunk in chunks:
+            repository.request_hashes(chunk, PRIORITY_BACKFILL, callback=on_hashed)
+
+    def run_duplicate_report(self, repository):
+        """Group the project's images by perceptual hash in the background"""
+        def run():
+            try:
+                groups = repository.duplicate_report()
+            except Exception as e:
+                Logger.error(f"SettingsScreen: Error finding duplicates: {str(e)}")
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Error finding duplicates: {error}"), 0)
+                return
+            Clock.schedule_once(lambda dt: self.show_duplicate_report(repository, groups), 0)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def show_duplicate_report(self, repository, groups):
+        """Show groups of near-duplicate images"""
+        Logger.info(f"SettingsScreen: Found {len(groups)} groups of near-duplicates")
+        if not groups:
+            self.show_success_message("No duplicate images found")
+            return
+
+        lines = []
+        for number, group in enumerate(groups, 1):
+            lines.append(f"Group {number} ({len(group)} images):")
+            for filename in group:
+                metadata = repository.get_image(filename) or {}
+                lines.append(f"    {metadata.get('display_name', filename)}  [{filename}]")
+
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        content.add_widget(Label(
+            text=f"{len(groups)} groups of near-duplicates, {sum(len(group) for group in groups)} images",
+            size_hint_y=None,
+            height=30
+        ))
+
+        # Scrollable list of the groups
+        scroll = ScrollView()
+        details = Label(text="\n".join(lines), halign='left', valign='top', size_hint_y=None)
+        details.bind(width=lambda instance, width: setattr(instance, 'text_size', (width, None)),
+                     texture_size=lambda instance, size: setattr(instance, 'height', size[1]))
+        scroll.add_widget(details)
+        content.add_widget(scroll)
+
+        close_btn = Button(text="Close", size_hint_y=None, height=50)
+        content.add_widget(close_btn)
+
+        popup = Popup(
+            title="Duplicate Report",
+            content=content,
+            size_hint=(0.9, 0.8)
+        )
+        close_btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    def merge_kiosk_ballots(self):
+        """Merge the ballot ledgers of offline voting kiosks into the current project"""
+        app = App.get_running_app()
+        if not app.current_project_path:
+            self.show_error_message("No project is selected")
+            return
+
+        self.show_path_chooser("Select a Folder with Kiosk Ballot Ledgers", "Merge",
+                               self.run_ballot_merge, dirselect=True)
+
+    def run_ballot_merge(self, path):
+        """Merge every ledger found at path in the background"""
+        repository = App.get_running_app().repository
+        ledgers = find_ledgers(path)
+        if not ledgers:
+            self.show_error_message(f"No ballot ledgers found in {path}")
+            return
+
+        Logger.info(f"SettingsScreen: Merging {len(ledgers)} ballot ledgers from {path}")
+        progress_popup = ProgressPopup("Merging Ballots")
+        progress_popup.open()
+
+        def run():
+            try:
+                # One merge for all ledgers, so a conflict in any of them leaves the project untouched
+                progress_popup.update(0, 1, f"Merging {len(ledgers)} ledgers")
+                totals = repository.merge_ballots(ledgers)
+            except LedgerConflictError as e:
+                Logger.error(f"SettingsScreen: Ballot ledgers conflict: {str(e)}")
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Nothing was merged: {error}"), 0)
+                return
+            except Exception as e:
+                Logger.error(f"SettingsScreen: Error merging ballots: {str(e)}")
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Error merging ballots: {error}"), 0)
+                return
+            finally:
+                progress_popup.finish()
+
+            message = (f"Merged {len(ledgers)} ledgers: {totals['added']} new ballots, "
+                       f"{totals['duplicate']} already recorded, {totals['skipped']} unreadable")
+            Clock.schedule_once(lambda dt: self.show_success_message(message), 0)
+
+        threading.Thread(target=run, daemon=True).start()
+
     def delete_project(self):
         """Delete the entire current project"""
         Logger.info("SettingsScreen: delete_project called")
@@ -253,10 +471,12 @@ class SettingsScreen(Screen):
             # Close popup
             popup.dismiss()
 
-            # Delete project directory
+            # Move the project directory into the trash, it is deleted in the background
             if os.path.exists(project_path):
-                shutil.rmtree(project_path)
-                Logger.info(f"SettingsScreen: Deleted project directory {project_path}")
+                app.repository.close()
+                move_to_trash([project_path], app.data_dir(), f"delete_{project_name}")
+                app.trash_purger.purge()
+                Logger.info(f"SettingsScreen: Moved project directory {project_path} to the trash")
 
             # Reset app's current project
             app.current_project = ""
@@ -466,7 +686,6 @@ class SettingsScreen(Screen):
             return
 
         # Check if project already exists
-        app = App.get_running_app()
         projects_dir = os.path.join(os.getcwd(), 'data', 'projects')
         dest_path = os.path.join(projects_dir, project_name)
 
@@ -474,34 +693,8 @@ class SettingsScreen(Screen):
             self.show_import_conflict_dialog(folder_path, project_name, dest_path)
             return
 
-        # Validate the folder structure (simplified check)
-        if not self.validate_project_folder(folder_path):
-            # Just create required directories
-            self.create_project_structure(folder_path)
-
-        # Copy the project to the projects directory
-        try:
-            # Make sure projects directory exists
-            if not os.path.exists(projects_dir):
-                os.makedirs(projects_dir)
-
-            # Copy the directory
-            shutil.copytree(folder_path, dest_path)
-            Logger.info(f"SettingsScreen: Copied project from {folder_path} to {dest_path}")
-
-            # Show success message
-            self.show_success_message(f"Project '{project_name}' imported successfully")
-
-            # Set as current project
-            app.current_project = project_name
-            app.current_project_path = dest_path
-
-            # Update UI
-            self.update_project_info()
-
-        except Exception as e:
-            Logger.error(f"SettingsScreen: Error importing project: {str(e)}")
-            self.show_error_message(f"Error importing project: {str(e)}")
+        # Copy the project to the projects directory in the background
+        self.run_project_import(folder_path, dest_path, project_name)
 
     def show_import_conflict_dialog(self, source_path, project_name, dest_path):
         """Show dialog for handling project name conflict during import"""
@@ -579,24 +772,8 @@ class SettingsScreen(Screen):
                     dest_path = os.path.join(os.path.dirname(dest_path), project_name)
                     counter += 1
 
-            # Create project structure if needed
-            if not self.validate_project_folder(source_path):
-                self.create_project_structure(source_path)
-
-            # Copy the directory
-            shutil.copytree(source_path, dest_path)
-            Logger.info(f"SettingsScreen: Copied project from {source_path} to {dest_path}")
-
-            # Show success message
-            self.show_success_message(f"Project imported successfully as '{project_name}'")
-
-            # Set as current project
-            app = App.get_running_app()
-            app.current_project = project_name
-            app.current_project_path = dest_path
-
-            # Update UI
-            self.update_project_info()
+            # Copy the project in the background
+            self.run_project_import(source_path, dest_path, project_name)
 
         except Exception as e:
             Logger.error(f"SettingsScreen: Error importing project with new name: {str(e)}")
@@ -610,34 +787,282 @@ class SettingsScreen(Screen):
             # Close popup
             popup.dismiss()
 
-            # Delete existing project
-            if os.path.exists(dest_path):
-                shutil.rmtree(dest_path)
-                Logger.info(f"SettingsScreen: Deleted existing project directory {dest_path}")
+            # The existing project is only replaced once the new copy is complete
+            self.run_project_import(source_path, dest_path, project_name, overwrite=True)
 
-            # Create project structure if needed
-            if not self.validate_project_folder(source_path):
-                self.create_project_structure(source_path)
+        except Exception as e:
+            Logger.error(f"SettingsScreen: Error overwriting project: {str(e)}")
+            self.show_error_message(f"Error importing project: {str(e)}")
+
+    def run_project_import(self, source_path, dest_path, project_name, overwrite=False):
+        """
+        Copy a project into the projects directory on a background thread
+
+        Files are copied in parallel into a hidden staging directory next to the
+        destination. Cancelling or a failed copy removes the staging directory again.
+        The project is only moved into place, and switched to, once the copy is complete.
+        """
+        projects_dir = os.path.dirname(dest_path)
+        staging_path = os.path.join(projects_dir, f".{project_name}.importing")
+        copy = self.import_copy_function(source_path)
+
+        progress_popup = ProgressPopup(f"Importing '{project_name}'", cancellable=True)
+        progress_popup.open()
+        started = time.monotonic()
 
-            # Copy the directory
-            shutil.copytree(source_path, dest_path)
-            Logger.info(f"SettingsScreen: Copied project from {source_path} to {dest_path}")
+        def report(files_done, files_total, bytes_done, bytes_total):
+            progress_popup.update(bytes_done, bytes_total, self.import_progress_text(
+                files_done, files_total, bytes_done, bytes_total, time.monotonic() - started))
+
+        def run():
+            try:
+                os.makedirs(projects_dir, exist_ok=True)
+                if os.path.exists(staging_path):
+                    # Left over from an interrupted import
+                    shutil.rmtree(staging_path)
+
+                skipped = []
+                copy_tree(source_path, staging_path, copy, progress=report, cancelled=progress_popup.cancelled,
+                          skipped=skipped)
+                Logger.info(f"SettingsScreen: Copied project from {source_path} to {staging_path}")
+                for path in skipped:
+                    Logger.warning(f"SettingsScreen: Skipped dangling or looping symlink {path}")
+
+                # Create project structure if needed
+                if not self.validate_project_folder(staging_path):
+                    self.create_project_structure(staging_path)
+
+                # Build a fresh index from the imported JSON files
+                progress_popup.update(1, 1, "Indexing project...")
+                rebuild_project_index(staging_path)
+                close_project_index(staging_path)
+
+                Clock.schedule_once(
+                    lambda dt: self.commit_project_import(staging_path, dest_path, project_name, overwrite), 0)
+            except CopyCancelled:
+                Logger.info(f"SettingsScreen: Import of {source_path} cancelled")
+                shutil.rmtree(staging_path, ignore_errors=True)
+            except Exception as e:
+                Logger.error(f"SettingsScreen: Error importing project: {str(e)}")
+                close_project_index(staging_path)
+                shutil.rmtree(staging_path, ignore_errors=True)
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Error importing project: {error}"), 0)
+            finally:
+                progress_popup.finish()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def commit_project_import(self, staging_path, dest_path, project_name, overwrite):
+        """Move a completely copied project into place and switch to it"""
+        app = App.get_running_app()
+        try:
+            if overwrite and os.path.exists(dest_path):
+                # Release the project being replaced and move it into the trash
+                if app.repository and os.path.abspath(app.repository.project_path) == os.path.abspath(dest_path):
+                    app.repository.close()
+                close_project_index(dest_path)
+                move_to_trash([dest_path], app.data_dir(), f"replace_{project_name}")
+                app.trash_purger.purge()
+
+            os.rename(staging_path, dest_path)
+            Logger.info(f"SettingsScreen: Imported project {project_name} to {dest_path}")
 
             # Show success message
             self.show_success_message(f"Project '{project_name}' imported successfully")
 
             # Set as current project
-            app = App.get_running_app()
             app.current_project = project_name
             app.current_project_path = dest_path
+            if app.repository:
+                app.repository.invalidate()
 
             # Update UI
             self.update_project_info()
 
         except Exception as e:
-            Logger.error(f"SettingsScreen: Error overwriting project: {str(e)}")
+            Logger.error(f"SettingsScreen: Error importing project: {str(e)}")
             self.show_error_message(f"Error importing project: {str(e)}")
 
+    def import_progress_text(self, files_done, files_total, bytes_done, bytes_total, elapsed):
+        """Status line of the import progress popup"""
+        text = (f"Copied {files_done} of {files_total} files\n"
+                f"{format_bytes(bytes_done)} of {format_bytes(bytes_total)}")
+        if bytes_done and elapsed > 1:
+            remaining = (bytes_total - bytes_done) / (bytes_done / elapsed)
+            minutes, seconds = divmod(int(remaining), 60)
+            text += f"\nAbout {minutes}m {seconds:02d}s left"
+        return text
+
+    def import_copy_function(self, source_path):
+        """Copy function for importing a project, using the copy mode stored in the project"""
+        mode = load_project_settings(source_path)["copy_mode"]
+        copy_images = copy_function(mode)
+        copy_other = copy_function(COPY_MODE_COPY if mode == COPY_MODE_HARDLINK else mode)
+        images_dir = os.path.join(os.path.abspath(source_path), "images") + os.sep
+
+        # Metadata files are rewritten in place, so only image files may share data with the source
+        def copy(src, dst):
+            if os.path.abspath(src).startswith(images_dir):
+                return copy_images(src, dst)
+            return copy_other(src, dst)
+        return copy
+
+    def export_project_archive(self):
+        """Export the current project into a single .vpic archive file"""
+        app = App.get_running_app()
+        if not app.current_project_path:
+            self.show_error_message("No project is selected")
+            return
+
+        self.show_path_chooser("Select a Folder for the Archive", "Export Here",
+                               self.run_archive_export, dirselect=True)
+
+    def run_archive_export(self, folder_path):
+        """Write the current project to <folder>/<project>.vpic in the background"""
+        if not os.path.isdir(folder_path):
+            self.show_error_message(f"Selected path is not a directory: {folder_path}")
+            return
+
+        app = App.get_running_app()
+        project_path = app.current_project_path
+        archive_path = os.path.join(folder_path, app.current_project + ARCHIVE_EXTENSION)
+
+        progress_popup = ProgressPopup(f"Exporting '{app.current_project}'", cancellable=True)
+        progress_popup.open()
+        started = time.monotonic()
+
+        def report(files_done, files_total, bytes_done, bytes_total):
+            progress_popup.update(bytes_done, bytes_total, self.import_progress_text(
+                files_done, files_total, bytes_done, bytes_total, time.monotonic() - started))
+
+        def run():
+            try:
+                # Ballots still queued for the ledger belong in the archive
+                app.repository.ballots().flush()
+                count = export_project(project_path, archive_path, progress=report,
+                                       cancelled=progress_popup.cancelled)
+                Logger.info(f"SettingsScreen: Exported {count} files to {archive_path}")
+                Clock.schedule_once(lambda dt: self.show_success_message(
+                    f"Project exported to {archive_path}"), 0)
+            except ArchiveCancelled:
+                Logger.info(f"SettingsScreen: Export to {archive_path} cancelled")
+            except Exception as e:
+                Logger.error(f"SettingsScreen: Error exporting project: {str(e)}")
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Error exporting project: {error}"), 0)
+            finally:
+                progress_popup.finish()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def import_project_archive(self):
+        """Import a project from a .vpic archive file"""
+        self.show_path_chooser("Select a Project Archive", "Import",
+                               self.run_archive_import, filters=['*' + ARCHIVE_EXTENSION])
+
+    def run_archive_import(self, archive_path):
+        """
+        Extract a .vpic archive into the projects directory in the background
+
+        The staging directory is derived from the archive file, so importing the same
+        archive again after a cancelled or interrupted import resumes it.
+        """
+        try:
+            manifest = read_manifest(archive_path)
+        except Exception as e:
+            Logger.error(f"SettingsScreen: Error reading archive: {str(e)}")
+            self.show_error_message(f"Error reading archive: {str(e)}")
+            return
+
+        # Import under the archived project name, or a free variant of it
+        projects_dir = os.path.join(os.getcwd(), 'data', 'projects')
+        project_name = manifest.get("project") or os.path.splitext(os.path.basename(archive_path))[0]
+        base_name = project_name
+        counter = 1
+        while os.path.exists(os.path.join(projects_dir, project_name)):
+            project_name = f"{base_name}_{counter}"
+            counter += 1
+        dest_path = os.path.join(projects_dir, project_name)
+
+        stat = os.stat(archive_path)
+        archive_key = f"{os.path.abspath(archive_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        staging_path = os.path.join(
+            projects_dir, f".{base_name}.{hashlib.sha1(archive_key.encode('utf-8')).hexdigest()[:12]}.importing")
+
+        progress_popup = ProgressPopup(f"Importing '{project_name}'", cancellable=True)
+        progress_popup.open()
+        started = time.monotonic()
+
+        def report(files_done, files_total, bytes_done, bytes_total):
+            progress_popup.update(bytes_done, bytes_total, self.import_progress_text(
+                files_done, files_total, bytes_done, bytes_total, time.monotonic() - started))
+
+        def run():
+            try:
+                import_archive(archive_path, staging_path, progress=report, cancelled=progress_popup.cancelled)
+
+                # Create project structure if needed and index the imported JSON files
+                if not self.validate_project_folder(staging_path):
+                    self.create_project_structure(staging_path)
+                progress_popup.update(1, 1, "Indexing project...")
+                rebuild_project_index(staging_path)
+                close_project_index(staging_path)
+
+                Clock.schedule_once(
+                    lambda dt: self.commit_project_import(staging_path, dest_path, project_name, False), 0)
+            except ArchiveCancelled:
+                # The extracted files are kept so the import can be resumed
+                Logger.info(f"SettingsScreen: Import of {archive_path} paused")
+            except Exception as e:
+                Logger.error(f"SettingsScreen: Error importing archive: {str(e)}")
+                close_project_index(staging_path)
+                shutil.rmtree(staging_path, ignore_errors=True)
+                error = str(e)
+                Clock.schedule_once(lambda dt: self.show_error_message(f"Error importing archive: {error}"), 0)
+            finally:
+                progress_popup.finish()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def show_path_chooser(self, title, select_text, on_select, dirselect=False, filters=None):
+        """Show Kivy's file chooser and call on_select(path) with the chosen file or folder"""
+        content = BoxLayout(orientation='vertical')
+
+        chooser = FileChooserListView(
+            path=os.path.expanduser('~'),
+            dirselect=dirselect,
+            filters=filters or [''],
+            show_hidden=False
+        )
+        content.add_widget(chooser)
+
+        # Buttons layout
+        buttons = BoxLayout(size_hint_y=None, height=50, spacing=5)
+        cancel_btn = Button(text='Cancel')
+        select_btn = Button(text=select_text)
+        buttons.add_widget(cancel_btn)
+        buttons.add_widget(select_btn)
+        content.add_widget(buttons)
+
+        popup = Popup(
+            title=title,
+            content=content,
+            size_hint=(0.9, 0.9),
+            auto_dismiss=False
+        )
+
+        def select(instance):
+            popup.dismiss()
+            # Without a selection a folder chooser uses the folder being shown
+            selection = chooser.selection or ([chooser.path] if dirselect else [])
+            if selection:
+                on_select(selection[0])
+
+        cancel_btn.bind(on_press=popup.dismiss)
+        select_btn.bind(on_press=select)
+        popup.open()
+
     def validate_project_folder(self, folder_path):
         """Validate that the folder has proper project structure"""
         # Check if it has the basic required subdirectories
@@ -661,12 +1086,7 @@ class SettingsScreen(Screen):
         # Create default Unsigned Images album
         unsigned_album_file = os.path.join(folder_path, "albums_metadata", "Unsigned_Images.json")
         if not os.path.exists(unsigned_album_file):
-            album_data = {
-                "name": "Unsigned Images",
-                "description": "Default album for newly uploaded images",
-                "created_date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "images": []
-            }
+            album_data = new_album_data(DEFAULT_ALBUM_NAME, DEFAULT_ALBUM_DESCRIPTION)
 
             with open(unsigned_album_file, 'w') as f:
                 json.dump(album_data, f, indent=4)
@@ -0,0 +1,75 @@
+from kivy.uix.screenmanager import Screen
+from kivy.properties import StringProperty
+from kivy.uix.label import Label
+from kivy.clock import Clock
+from kivy.app import App
+from kivy.logger import Logger
+
+
+# Number of images on the leaderboard and how often it is refreshed, in seconds
+LEADERBOARD_SIZE = 50
+LEADERBOARD_REFRESH = 1.0
+
+
+class StatisticsScreen(Screen):
+    """Screen with the live leaderboard of the project's head-to-head voting"""
+    summary_text = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super(StatisticsScreen, self).__init__(**kwargs)
+        self._refresh_event = None
+        # (ballot count, fit count) the leaderboard was last built for
+        self._shown_version = None
+        Logger.info("StatisticsScreen: Initialized")
+
+    def on_enter(self):
+        """Show the leaderboard and keep it updated while the screen is visible"""
+        Logger.info("StatisticsScreen: on_enter called")
+        self._shown_version = None
+        self.refresh()
+        self._refresh_event = Clock.schedule_interval(lambda dt: self.refresh(), LEADERBOARD_REFRESH)
+
+    def on_leave(self):
+        """Stop refreshing the leaderboard"""
+        if self._refresh_event:
+            self._refresh_event.cancel()
+            self._refresh_event = None
+
+    def refresh(self):
+        """Rebuild the leaderboard if ballots arrived or the ranking was refitted"""
+        app = App.get_running_app()
+        if not hasattr(app, 'current_project_path') or not app.current_project_path:
+            self.summary_text = "Please select a project first"
+            self.ids.leaderboard_container.clear_widgets()
+            return
+
+        ballots = app.repository.ballots()
+        version = (ballots.seq, ballots.fit_count)
+        if version == self._shown_version:
+            return
+        self._shown_version = version
+
+        try:
+            leaderboard = app.repository.leaderboard(LEADERBOARD_SIZE)
+        except Exception as e:
+            Logger.error(f"StatisticsScreen: Error loading the leaderboard: {str(e)}")
+            self.summary_text = f"Error loading the leaderboard: {str(e)}"
+            return
+
+        self.summary_text = f"{ballots.total} votes, {ballots.comparison_count()} head-to-head comparisons"
+        self.update_leaderboard_ui(leaderboard)
+
+    def update_leaderboard_ui(self, leaderboard):
+        """Show one row per ranked image"""
+        container = self.ids.leaderboard_container
+        container.clear_widgets()
+        if not leaderboard:
+            container.add_widget(Label(text="No head-to-head votes yet", size_hint_y=None, height='40dp'))
+            return
+
+        for place, (filename, display_name, rating, wins, games) in enumerate(leaderboard, 1):
+            for text, halign in ((f"{place}.", 'right'), (display_name, 'left'),
+                                 (f"{rating:.0f}", 'right'), (f"{wins} / {games}", 'right')):
+                label = Label(text=text, size_hint_y=None, height='30dp', halign=halign, shorten=True)
+                label.bind(size=lambda instance, size: setattr(instance, 'text_size', size))
+                container.add_widget(label)
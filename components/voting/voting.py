@@ -0,0 +1,244 @@
+from kivy.uix.screenmanager import Screen
+from kivy.properties import ListProperty, NumericProperty, StringProperty
+from kivy.app import App
+from kivy.logger import Logger
+from components.core.project_repository.project_repository import DEFAULT_ALBUM_NAME
+from components.core.thumbnails.thumbnails import select_tier
+
+
+# Longest edge, in pixels, of the image shown for voting
+VOTING_IMAGE_SIZE = 1024
+
+# Number of upcoming images decoded ahead of the voter
+VOTING_LOOKAHEAD = 2
+
+
+# Voting modes: one vote per image, or picking the better image of a pair
+MODE_SINGLE = "single"
+MODE_PAIRS = "pairs"
+
+
+class VotingScreen(Screen):
+    """Screen for voting on the images of an album, one at a time or head to head"""
+    mode = StringProperty(MODE_SINGLE)
+    album_names = ListProperty([])
+    album_name = StringProperty("")
+    image_name = StringProperty("")
+    position_text = StringProperty("")
+    votes_text = StringProperty("")
+    # Index of the shown image in self.images, -1 when the album is empty
+    position = NumericProperty(-1)
+    # Display name of the second image in head-to-head mode
+    right_name = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super(VotingScreen, self).__init__(**kwargs)
+        # (filename, display_name) tuples of the album being voted on
+        self.images = []
+        self.display_names = {}
+        # Filenames of the pair being compared, None outside pair mode
+        self.pair = None
+        # Picks the pairs of the album in head-to-head mode
+        self.scheduler = None
+        self._scheduler_fits = 0
+        Logger.info("VotingScreen: Initialized")
+
+    def on_enter(self):
+        """Reload the albums, they may have changed since the last visit"""
+        Logger.info("VotingScreen: on_enter called")
+        app = App.get_running_app()
+        if not hasattr(app, 'current_project_path') or not app.current_project_path:
+            Logger.warning("VotingScreen: No project selected")
+            self._show_message("Please select a project first")
+            return
+
+        try:
+            self.album_names = app.repository.list_albums()
+        except Exception as e:
+            Logger.error(f"VotingScreen: Error loading albums: {str(e)}")
+            self._show_message(f"Error loading albums: {str(e)}")
+            return
+
+        # Prefer the album the user was last looking at
+        for name in (self.album_name, app.current_album, DEFAULT_ALBUM_NAME):
+            if name in self.album_names:
+                self.select_album(name)
+                return
+        if self.album_names:
+            self.select_album(self.album_names[0])
+
+    def select_album(self, album_name):
+        """Start voting on an album from its first image"""
+        if not album_name:
+            return
+        app = App.get_running_app()
+        try:
+            self.images = app.repository.get_album_page(album_name)
+            self.display_names = dict(self.images)
+        except Exception as e:
+            Logger.error(f"VotingScreen: Error loading album {album_name}: {str(e)}")
+            self._show_message(f"Error loading album: {str(e)}")
+            return
+
+        Logger.info(f"VotingScreen: Voting on {len(self.images)} images of {album_name}")
+        keep_position = album_name == self.album_name and 0 <= self.position < len(self.images)
+        self.album_name = album_name
+        self.scheduler = None
+        if self.mode == MODE_PAIRS:
+            self.next_pair()
+        else:
+            self.show_image(self.position if keep_position else 0)
+
+    def set_mode(self, mode):
+        """Switch between single votes and head-to-head comparisons"""
+        if mode == self.mode:
+            return
+        Logger.info(f"VotingScreen: Switching to {mode} mode")
+        self.mode = mode
+        self.ids.image_display_right.texture = None
+        if mode == MODE_PAIRS:
+            self.next_pair()
+        else:
+            self.pair = None
+            self.show_image(max(self.position, 0))
+
+    def show_image(self, position):
+        """Show one image of the album and its current votes"""
+        if not self.images:
+            self.position = -1
+            self._show_message("This album has no images")
+            return
+
+        self.position = position % len(self.images)
+        filename, display_name = self.images[self.position]
+        self.image_name = display_name
+        self.position_text = f"{self.position + 1} / {len(self.images)}"
+        self.update_votes()
+
+        self.ids.image_display.texture = None
+        self._request_texture(filename, self._show_texture)
+
+        # Decode the next images now, so voting never waits for a load
+        for step in range(1, VOTING_LOOKAHEAD + 1):
+            upcoming = self.images[(self.position + step) % len(self.images)][0]
+            self._request_texture(upcoming, lambda filename, texture: None)
+
+    def next_image(self):
+        """Move on to the next image"""
+        if self.images:
+            self.show_image(self.position + 1)
+
+    def previous_image(self):
+        """Go back to the previous image"""
+        if self.images:
+            self.show_image(self.position - 1)
+
+    def vote(self):
+        """Vote for the shown image and move on to the next one"""
+        if self.position < 0:
+            return
+        app = App.get_running_app()
+        filename = self.images[self.position][0]
+        try:
+            # Only updates in-memory tallies, the ledger is written by a background thread
+            app.repository.cast_vote(filename, self.album_name)
+        except Exception as e:
+            Logger.error(f"VotingScreen: Error recording vote for {filename}: {str(e)}")
+            self._show_message(f"Error recording vote: {str(e)}")
+            return
+        self.next_image()
+
+    def next_pair(self):
+        """Show the next pair chosen by the scheduler side by side"""
+        app = App.get_running_app()
+        ballots = app.repository.ballots()
+        if self.scheduler is None:
+            self.scheduler = app.repository.pair_scheduler([filename for filename, _ in self.images])
+            self._scheduler_fits = ballots.fit_count
+        elif ballots.fit_count != self._scheduler_fits:
+            # The ratings were refitted, re-rank the album
+            self.scheduler.rebuild()
+            self._scheduler_fits = ballots.fit_count
+
+        self.pair = self.scheduler.next_pair()
+        if self.pair is None:
+            self._show_message("Head-to-head voting needs at least two images")
+            return
+        self.show_pair()
+
+        # Decode the images of the next pairs now, so voting never waits for a load
+        for filename in self.scheduler.upcoming_images():
+            self._request_texture(filename, lambda filename, texture: None)
+
+    def show_pair(self):
+        """Show the images of the current pair and their ratings"""
+        left, right = self.pair
+        self.image_name = self.display_names.get(left, left)
+        self.right_name = self.display_names.get(right, right)
+        self.position_text = f"{App.get_running_app().repository.ballots().comparison_count()} comparisons"
+        self.update_votes()
+
+        self.ids.image_display.texture = None
+        self.ids.image_display_right.texture = None
+        self._request_texture(left, self._show_texture)
+        self._request_texture(right, self._show_texture)
+
+    def choose(self, side):
+        """Record the left (0) or right (1) image of the pair as the better one and show the next pair"""
+        if self.pair is None:
+            return
+        app = App.get_running_app()
+        winner = self.pair[side]
+        loser = self.pair[1 - side]
+        try:
+            app.repository.cast_pair(winner, loser, self.album_name)
+        except Exception as e:
+            Logger.error(f"VotingScreen: Error recording comparison {winner} > {loser}: {str(e)}")
+            self._show_message(f"Error recording vote: {str(e)}")
+            return
+        self.next_pair()
+
+    def update_votes(self):
+        """Show the votes of the shown image and of the album, or the ratings of the pair"""
+        ballots = App.get_running_app().repository.ballots()
+        if self.mode == MODE_PAIRS and self.pair is not None:
+            left, right = (ballots.rating(filename) for filename in self.pair)
+            self.votes_text = f"Rating: {left:.0f}          Rating: {right:.0f}"
+            return
+        if self.position < 0:
+            self.votes_text = ""
+            return
+        filename = self.images[self.position][0]
+        self.votes_text = f"Votes: {ballots.tally(filename)}   Album total: {ballots.album_tally(self.album_name)}"
+
+    def _request_texture(self, filename, callback):
+        """Decode the voting-size thumbnail of an image through the app's texture cache"""
+        app = App.get_running_app()
+        tier = select_tier(VOTING_IMAGE_SIZE)
+
+        def on_ready(path):
+            app.texture_cache.request(path, lambda texture: callback(filename, texture), tier)
+
+        on_ready(app.repository.thumbnail_source(filename, VOTING_IMAGE_SIZE, on_ready=on_ready))
+
+    def _show_texture(self, filename, texture):
+        """Display a decoded image unless the voter moved on meanwhile"""
+        if self.mode == MODE_PAIRS:
+            if self.pair is None:
+                return
+            if self.pair[0] == filename:
+                self.ids.image_display.texture = texture
+            if self.pair[1] == filename:
+                self.ids.image_display_right.texture = texture
+        elif 0 <= self.position < len(self.images) and self.images[self.position][0] == filename:
+            self.ids.image_display.texture = texture
+
+    def _show_message(self, message):
+        """Show a message in place of the image"""
+        self.image_name = message
+        self.right_name = ""
+        self.position_text = ""
+        self.votes_text = ""
+        if hasattr(self, 'ids') and hasattr(self.ids, 'image_display'):
+            self.ids.image_display.texture = None
+            self.ids.image_display_right.texture = None
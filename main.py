@@ -4,6 +4,7 @@ from kivy.lang import Builder
 from kivy.properties import StringProperty, ObjectProperty, BooleanProperty
 from kivy.clock import Clock
 import os
+import threading
 
 # Import all screen classes needed by app.kv
 from components.project.project_selection.project_selection import ProjectSelectionScreen
@@ -15,18 +16,25 @@ from components.images.image_upload.upload_complete.upload_complete import Uploa
 from components.albums.albums import AlbumsScreen
 from components.albums.create_album.create_album import CreateAlbumScreen
 from components.albums.album_view.album_view import AlbumViewScreen
+from components.albums.timeline.timeline import TimelineScreen
 from components.images.image_view.image_view import ImageViewScreen
+from components.images.image_search.image_search import ImageSearchScreen
 from components.project.project_settings.project_settings import SettingsScreen
+from components.voting.voting import VotingScreen
+from components.statistics.statistics import StatisticsScreen
+from components.core.project_repository.project_repository import ProjectRepository
+from components.core.derivative_worker.derivative_worker import DerivativeWorker
+from components.core.image_grid.image_grid import ImageGrid
+from components.core.texture_cache.texture_cache import TextureCache
+from components.core.preview_prefetcher.preview_prefetcher import PreviewPrefetcher
+from components.core.trash.trash import TrashPurger
+from components.core.ballot_ledger.ballot_ledger import load_device_id
 
 # Load navigation component first
 Builder.load_file('components/core/navigation/navigation.kv')
 
-
-# Placeholder screen classes (for screens you haven't implemented yet)
-class VotingScreen(Screen): pass
-
-
-class StatisticsScreen(Screen): pass
+# Number of queued batch images whose derivatives are prepared ahead of the operator
+BATCH_LOOKAHEAD = 5
 
 
 class PictureVotingApp(App):
@@ -40,6 +48,9 @@ class PictureVotingApp(App):
     current_project = StringProperty("")
     current_project_path = StringProperty("")
 
+    # Shared metadata repository of the current project
+    repository = ObjectProperty(None, allownone=True)
+
     # Album property for passing between screens
     current_album = StringProperty("")
 
@@ -54,13 +65,40 @@ class PictureVotingApp(App):
     batch_current = StringProperty("0")
     batch_total = StringProperty("0")
 
+    # Aggregate progress of the background trash purge, empty when idle
+    trash_status = StringProperty("")
+
     # Reference to navigation component
     navigation = ObjectProperty(None)
 
+    def build_config(self, config):
+        """Default values for the app's settings file"""
+        # 0 picks one worker process per CPU core, minus one for the UI
+        config.setdefaults('performance', {
+            'derivative_workers': 0,
+            'texture_cache_mb': 256
+        })
+
     def build(self):
         # Create necessary directories
         self.create_app_directories()
 
+        # Background processes for thumbnails and other image derivatives
+        self.derivative_worker = DerivativeWorker(self.config.getint('performance', 'derivative_workers'))
+
+        # Decoded textures shared by the image grids and the image viewer
+        self.texture_cache = TextureCache(self.config.getint('performance', 'texture_cache_mb') * 1024 * 1024)
+
+        # Decodes previews of the upcoming batch images ahead of the operator
+        self.preview_prefetcher = PreviewPrefetcher(self.texture_cache)
+
+        # Deletes removed projects and cleared project contents in the background
+        self.trash_purger = TrashPurger(self.data_dir(), on_progress=self.on_trash_progress)
+        self.trash_purger.purge()
+
+        # Identifies this installation in recorded ballots, so kiosk ledgers can be merged
+        self.device_id = load_device_id(self.data_dir())
+
         # Load component KV files
         self.load_components()
 
@@ -76,6 +114,7 @@ class PictureVotingApp(App):
         """Load KV files for all components"""
         # Core components
         # Already loaded: navigation.kv
+        Builder.load_file("components/core/image_grid/image_grid.kv")
 
         # Project components
         Builder.load_file("components/project/project_selection/project_selection.kv")
@@ -90,11 +129,19 @@ class PictureVotingApp(App):
         Builder.load_file("components/images/image_tags/image_tags.kv")
         Builder.load_file("components/images/image_upload/upload_complete/upload_complete.kv")
         Builder.load_file("components/images/image_view/image_view.kv")
+        Builder.load_file("components/images/image_search/image_search.kv")
 
         # Album components
         Builder.load_file("components/albums/albums.kv")
         Builder.load_file("components/albums/create_album/create_album.kv")
         Builder.load_file("components/albums/album_view/album_view.kv")
+        Builder.load_file("components/albums/timeline/timeline.kv")
+
+        # Voting components
+        Builder.load_file("components/voting/voting.kv")
+
+        # Statistics components
+        Builder.load_file("components/statistics/statistics.kv")
 
     def set_initial_screen(self, main_widget):
         """Set the initial screen after the app is fully loaded"""
@@ -113,6 +160,43 @@ class PictureVotingApp(App):
         else:
             print("No project selected")
 
+    def on_current_project_path(self, instance, value):
+        """Open a fresh repository whenever the current project path changes"""
+        if self.repository:
+            self.repository.close()
+        self.repository = ProjectRepository(value, worker=self.derivative_worker,
+                                            device_id=self.device_id) if value else None
+
+        # Load the duplicate detection index off the main thread, ingest needs it soon
+        if self.repository:
+            threading.Thread(target=self.repository.hash_index, daemon=True).start()
+            # Staged thumbnails of batches that were abandoned while the app was closed
+            threading.Thread(target=self.repository.sweep_staged_thumbnails, daemon=True).start()
+
+        # Offer to continue a batch upload that was interrupted in this project
+        if value and self.root:
+            upload_screen = self.root.ids.screen_manager.get_screen('upload')
+            Clock.schedule_once(lambda dt: upload_screen.offer_resume(), 0.5)
+
+    def on_stop(self):
+        """Stop background workers when the app closes"""
+        self.derivative_worker.shutdown()
+        self.trash_purger.stop()
+        # Write out queued ballots and a fresh tally snapshot
+        if self.repository:
+            self.repository.close()
+
+    def data_dir(self):
+        """Return the app's data directory"""
+        return os.path.join(os.getcwd(), 'data')
+
+    def on_trash_progress(self, files, size, running):
+        """Show how far the background trash purge got"""
+        if running:
+            self.trash_status = f"Freeing disk space: {files} files ({size / (1024 * 1024):.0f} MB) removed"
+        else:
+            self.trash_status = ""
+
     def refresh_ui(self):
         """Force a refresh of the UI when project changes"""
         # This method is mainly called to trigger UI updates based on project selection
@@ -138,29 +222,52 @@ class PictureVotingApp(App):
             os.makedirs(projects_dir)
 
     def process_next_batch_image(self):
-        """Process the next image in the batch queue"""
-        # Get a reference to the upload screen
-        upload_screen = None
-        for screen in self.root.ids.screen_manager.screens:
-            if isinstance(screen, UploadScreen):
-                upload_screen = screen
-                break
-
-        if not upload_screen or not upload_screen.image_queue:
-            # No more images in queue, go to upload complete
-            self.root.ids.screen_manager.current = 'upload_complete'
+        """Process the next image in the batch session"""
+        screen_manager = self.root.ids.screen_manager
+        upload_screen = screen_manager.get_screen('upload')
+        session = upload_screen.batch_session
+
+        if session and not session.has_next() and upload_screen.is_scanning():
+            # The folder scan has not delivered the next images yet, try again shortly
+            Clock.schedule_once(lambda dt: self.process_next_batch_image(), 0.2)
             return
 
         # Get the next image
-        self.selected_file = upload_screen.image_queue.pop(0)
-        self.image_name = ""  # Reset name for the new image
-        self.image_description = ""  # Reset description for the new image
+        next_file = session.next() if session else None
+        if next_file is None:
+            # No more images in queue, the session is finished
+            if session:
+                self.batch_current = str(session.completed_count())
+                session.discard()
+                upload_screen.batch_session = None
+            screen_manager.current = 'upload_complete'
+            return
+
+        # Restore name and description entered before the batch was interrupted
+        item = session.current_item()
+        self.selected_file = next_file
+        self.image_name = item.get("name", "")
+        self.image_description = item.get("description", "")
 
         # Update batch count
-        self.batch_current = str(int(self.batch_current) + 1)
+        self.batch_current = str(session.current + 1)
+        self.batch_total = str(len(session))
+
+        # Keep derivatives of the upcoming images ahead of the operator
+        self.prefetch_batch_derivatives()
 
         # Go to description screen for this image
-        self.root.ids.screen_manager.current = 'img_description'
+        if screen_manager.current == 'img_description':
+            # Skipping from the description screen, refresh it for the new image
+            screen_manager.current_screen.on_pre_enter()
+        else:
+            screen_manager.current = 'img_description'
+
+    def prefetch_batch_derivatives(self):
+        """Stage thumbnails and decode previews of the current and the next queued batch images"""
+        session = self.root.ids.screen_manager.get_screen('upload').batch_session
+        paths = [self.selected_file] + (session.upcoming(BATCH_LOOKAHEAD) if session else [])
+        self.preview_prefetcher.prefetch(paths, self.repository)
 
 
 if __name__ == '__main__':